@@ -0,0 +1,22 @@
+"""add (video_id, frame_number) index to pose_data
+
+Revision ID: 5c8e2f4a7b91
+Revises: a9d4c6e1f2b7
+Create Date: 2026-10-17 19:26:05.114702
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c8e2f4a7b91'
+down_revision = 'a9d4c6e1f2b7'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # 重新匯入時依 video_id 刪除舊資料、依幀序讀取單支影片的 pose
+    op.create_index("ix_pose_data_video_id_frame_number", "pose_data", ["video_id", "frame_number"], unique=False)
+
+def downgrade():
+    op.drop_index("ix_pose_data_video_id_frame_number", table_name="pose_data")
@@ -0,0 +1,27 @@
+"""add quick_hash to videos, make file_hash nullable
+
+Revision ID: 8b2d4e6f1a3c
+Revises: 3fde56e316f3
+Create Date: 2026-10-17 10:12:40.218311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2d4e6f1a3c'
+down_revision = '3fde56e316f3'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # tier-1 取樣指紋；tiered 掃描模式下完整 SHA-256 可延後計算（file_hash 暫為 NULL）
+    op.add_column("videos", sa.Column("quick_hash", sa.String(length=64), nullable=True))
+    op.create_index("ix_videos_quick_hash", "videos", ["quick_hash"], unique=False)
+    op.alter_column("videos", "file_hash", existing_type=sa.String(length=64), nullable=True)
+
+def downgrade():
+    op.alter_column("videos", "file_hash", existing_type=sa.String(length=64), nullable=False)
+    op.drop_index("ix_videos_quick_hash", table_name="videos")
+    op.drop_column("videos", "quick_hash")
@@ -0,0 +1,23 @@
+"""add interpolated flag to pose_data
+
+Revision ID: a9d4c6e1f2b7
+Revises: e7a3b9c2d4f1
+Create Date: 2026-10-17 18:04:12.381920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d4c6e1f2b7'
+down_revision = 'e7a3b9c2d4f1'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # stride 取樣時未執行 pose 模型、由前後 keyframe 線性內插的幀
+    op.add_column("pose_data", sa.Column("interpolated", sa.Boolean(), nullable=False, server_default=sa.false()))
+
+def downgrade():
+    op.drop_column("pose_data", "interpolated")
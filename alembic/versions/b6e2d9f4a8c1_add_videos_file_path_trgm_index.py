@@ -0,0 +1,36 @@
+"""add pg_trgm GIN index on videos.file_path
+
+Revision ID: b6e2d9f4a8c1
+Revises: f3c7a1d9e2b4
+Create Date: 2026-10-17 23:18:05.204713
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2d9f4a8c1'
+down_revision = 'f3c7a1d9e2b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GET /api/v1/videos?q=：ILIKE '%q%' 與 match=fuzzy（%> / word_similarity）都可使用 gin_trgm_ops 索引
+    # pg_trgm 屬於 postgresql-contrib；未安裝時略過，搜尋照常運作（整表掃描），fuzzy 回傳 501
+    bind = op.get_bind()
+    available = bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).first()
+    if available is None:
+        print("⚠️  pg_trgm extension not available, skipping ix_videos_file_path_trgm")
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_videos_file_path_trgm", "videos", ["file_path"], unique=False,
+        postgresql_using="gin", postgresql_ops={"file_path": "gin_trgm_ops"},
+    )
+
+
+def downgrade():
+    # extension 保留（可能有其他物件使用）
+    op.execute("DROP INDEX IF EXISTS ix_videos_file_path_trgm")
@@ -0,0 +1,40 @@
+"""add scan_jobs table
+
+Revision ID: c41f7a92d5e0
+Revises: 8b2d4e6f1a3c
+Create Date: 2026-10-17 14:03:11.902145
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f7a92d5e0'
+down_revision = '8b2d4e6f1a3c'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # 背景掃描工作紀錄（POST /api/v1/videos/scan）
+    op.create_table(
+        "scan_jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("directory", sa.Text(), nullable=False),
+        sa.Column("mode", sa.String(length=20), nullable=False),
+        sa.Column("options", sa.JSON()),
+        sa.Column("status", sa.String(length=20)),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("started_at", sa.DateTime()),
+        sa.Column("finished_at", sa.DateTime()),
+        sa.Column("progress", sa.JSON()),
+        sa.Column("error", sa.Text()),
+    )
+    op.create_index("ix_scan_jobs_status", "scan_jobs", ["status"], unique=False)
+    op.create_index("ix_scan_jobs_created_at", "scan_jobs", ["created_at"], unique=False)
+
+def downgrade():
+    op.drop_index("ix_scan_jobs_created_at", table_name="scan_jobs")
+    op.drop_index("ix_scan_jobs_status", table_name="scan_jobs")
+    op.drop_table("scan_jobs")
@@ -0,0 +1,35 @@
+"""add pose_segments table
+
+Revision ID: d2b6f8a1c3e5
+Revises: 5c8e2f4a7b91
+Create Date: 2026-10-17 20:12:48.530217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b6f8a1c3e5'
+down_revision = '5c8e2f4a7b91'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # 每筆存一段連續幀的 landmarks（float32 打包成 bytea），取代 pose_data 一幀一筆 JSON
+    op.create_table(
+        "pose_segments",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("video_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("videos.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("start_frame", sa.Integer(), nullable=False),
+        sa.Column("end_frame", sa.Integer(), nullable=False),
+        sa.Column("frame_count", sa.Integer(), nullable=False),
+        sa.Column("compression", sa.String(length=10), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+    )
+    op.create_index("ix_pose_segments_video_id_start_frame", "pose_segments", ["video_id", "start_frame"], unique=True)
+
+def downgrade():
+    op.drop_index("ix_pose_segments_video_id_start_frame", table_name="pose_segments")
+    op.drop_table("pose_segments")
@@ -0,0 +1,23 @@
+"""add perceptual_hash to videos
+
+Revision ID: e7a3b9c2d4f1
+Revises: c41f7a92d5e0
+Create Date: 2026-10-17 15:21:47.603118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3b9c2d4f1'
+down_revision = 'c41f7a92d5e0'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # 64-bit 感知雜湊（hex）；近似重複以 Hamming distance 比對，於應用層建索引，不需要 DB index
+    op.add_column("videos", sa.Column("perceptual_hash", sa.String(length=16), nullable=True))
+
+def downgrade():
+    op.drop_column("videos", "perceptual_hash")
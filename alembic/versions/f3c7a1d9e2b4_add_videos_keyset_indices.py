@@ -0,0 +1,33 @@
+"""add (order column, id) indices for videos keyset pagination
+
+Revision ID: f3c7a1d9e2b4
+Revises: d2b6f8a1c3e5
+Create Date: 2026-10-17 21:42:18.530117
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c7a1d9e2b4'
+down_revision = 'd2b6f8a1c3e5'
+branch_labels = None
+depends_on = None
+
+KEYSET_COLUMNS = ("upload_date", "training_date", "file_size_bytes", "fps")
+
+
+def upgrade():
+    # GET /api/v1/videos 的 keyset 分頁：WHERE (col, id) > (:v, :id) ORDER BY col, id
+    for col in KEYSET_COLUMNS:
+        op.create_index(f"ix_videos_{col}_id", "videos", [col, "id"], unique=False)
+    # 複合索引已涵蓋單欄索引（以 init_db 建立的資料庫沒有這兩個索引）
+    op.execute("DROP INDEX IF EXISTS ix_videos_upload_date")
+    op.execute("DROP INDEX IF EXISTS ix_videos_training_date")
+
+
+def downgrade():
+    op.create_index("ix_videos_training_date", "videos", ["training_date"], unique=False)
+    op.create_index("ix_videos_upload_date", "videos", ["upload_date"], unique=False)
+    for col in reversed(KEYSET_COLUMNS):
+        op.drop_index(f"ix_videos_{col}_id", table_name="videos")
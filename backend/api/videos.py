@@ -2,26 +2,37 @@
 Video-related API routes under /api/v1/videos
 """
 
+import os
 from typing import List, Optional
 from uuid import UUID
-import threading
+import uuid
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, desc, asc
 
-from backend.database.connection import get_db
+from backend.database.connection import get_async_db, get_db
 from backend.models.schemas import Video
+from backend.services.filename_search import fuzzy_filter, fuzzy_score, substring_filter, trigram_available
+from backend.services.near_duplicates import get_near_duplicate_index
+from backend.services.pagination import InvalidCursor, decode_cursor, encode_cursor, estimate_count, keyset_page
+from backend.services.response_cache import get_response_cache
+from backend.services.scan_jobs import get_scan_job_manager
+from backend.utils.perceptual_hash import NEAR_DUPLICATE_MAX_DISTANCE
 
 
 router = APIRouter(prefix="/api/v1/videos", tags=["videos"])
 
+DB_ASYNC = os.getenv("DB_ASYNC", "0") == "1"
+
 
 def _video_to_dict(v: Video) -> dict:
     return {
         "id": str(v.id),
         "file_path": v.file_path,
         "file_hash": v.file_hash,
+        "perceptual_hash": v.perceptual_hash,
         "upload_date": v.upload_date.isoformat() if v.upload_date else None,
         "duration_seconds": v.duration_seconds,
         "fps": v.fps,
@@ -34,20 +45,113 @@ def _video_to_dict(v: Video) -> dict:
     }
 
 
-@router.get("")
-def list_videos(
-    db: Session = Depends(get_db),
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+# 列表可選的欄位（fields=），key 與 _video_to_dict 相同；需要轉換的欄位附上 formatter
+VIDEO_FIELDS = (
+    "id", "file_path", "file_hash", "perceptual_hash", "upload_date", "duration_seconds", "fps", "resolution",
+    "file_size_bytes", "processing_status", "training_date", "training_type", "location",
+)
+_FIELD_FORMATTERS = {"id": str, "upload_date": _isoformat, "training_date": _isoformat}
+
+
+def parse_fields(fields: Optional[str]) -> Optional[tuple]:
+    """fields=id,file_path → 依 VIDEO_FIELDS 順序排列、去重後的 tuple；未指定時回傳 None（全部欄位）"""
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested - set(VIDEO_FIELDS))
+    if unknown:
+        raise HTTPException(400, detail=f"Unknown fields: {', '.join(unknown)}; allowed: {', '.join(VIDEO_FIELDS)}")
+    return tuple(name for name in VIDEO_FIELDS if name in requested) or None
+
+
+def _rows_to_dicts(rows, fields: tuple) -> List[dict]:
+    """欄位查詢的 Row → dict（不經過 ORM 物件；fields 的位置與查詢欄位的前幾個相同）"""
+    spec = [(i, name, _FIELD_FORMATTERS.get(name)) for i, name in enumerate(fields)]
+    return [{name: fmt(row[i]) if fmt else row[i] for i, name, fmt in spec} for row in rows]
+
+
+def list_video_params(
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (keyset pagination)"),
+    total: str = Query("exact", pattern="^(exact|estimate|none)$",
+                       description="exact: COUNT(*); estimate: planner row estimate; none: skip"),
     training_type: Optional[str] = None,
     location: Optional[str] = None,
     date_from: Optional[str] = Query(None, description="YYYY-MM-DD"),
     date_to: Optional[str] = Query(None, description="YYYY-MM-DD"),
     q: Optional[str] = Query(None, description="filename substring"),
+    match: str = Query("substring", pattern="^(substring|fuzzy)$",
+                       description="substring: ILIKE '%q%'; fuzzy: trigram similarity, ranked by relevance"),
     order_by: str = Query("upload_date", pattern="^(upload_date|training_date|file_size_bytes|fps)$"),
     order_dir: str = Query("desc", pattern="^(asc|desc)$"),
-):
-    qset = db.query(Video)
+    fields: Optional[str] = Query(None, description="comma-separated subset of columns, e.g. id,file_path,training_date"),
+) -> dict:
+    return {
+        "limit": limit, "offset": offset, "cursor": cursor, "total": total,
+        "training_type": training_type, "location": location, "date_from": date_from, "date_to": date_to,
+        "q": q, "match": match, "order_by": order_by, "order_dir": order_dir, "fields": parse_fields(fields),
+    }
+
+
+def list_videos(request: Request, db: Session = Depends(get_db), params: dict = Depends(list_video_params)):
+    """
+    分頁：
+      - cursor：傳入上一頁的 next_cursor（keyset，深頁也不變慢）；不可與 offset 同時使用
+      - offset：舊的 offset / limit 分頁，仍支援
+    回應的 next_cursor 為 None 表示沒有下一頁。
+    total：exact 為精確筆數；estimate 為 PostgreSQL planner 估計值（大表很快，但可能有誤差）；none 回傳 null。
+    match=fuzzy：以 pg_trgm 相似度搜尋檔名（需要 q），依相似度排序（忽略 order_by / order_dir），items 附 score。
+    fields：只回傳指定欄位（逗號分隔，例如 id,file_path,training_date），只查詢這些欄位；未指定時回傳全部欄位。
+    回應經 response cache 快取（掃描寫入後失效），帶 ETag；If-None-Match 相同時回 304。
+    """
+    return get_response_cache().respond(
+        "videos:list", params, lambda: _list_videos(db, **params), request.headers.get("if-none-match")
+    )
+
+
+async def list_videos_async(request: Request, db: AsyncSession = Depends(get_async_db),
+                            params: dict = Depends(list_video_params)):
+    """list_videos 的 async 版本：查詢邏輯相同，以 run_sync 在 asyncpg 連線上執行，不佔用 threadpool"""
+
+    async def build():
+        return await db.run_sync(lambda session: _list_videos(session, **params))
+
+    return await get_response_cache().respond_async("videos:list", params, build, request.headers.get("if-none-match"))
+
+
+# DB_ASYNC=1：列表與詳情改用 async engine（asyncpg）
+router.add_api_route("", list_videos_async if DB_ASYNC else list_videos, methods=["GET"])
+
+
+def _list_videos(db: Session, limit: int, offset: int, cursor: Optional[str], total: str,
+                 training_type: Optional[str], location: Optional[str], date_from: Optional[str],
+                 date_to: Optional[str], q: Optional[str], order_by: str, order_dir: str,
+                 fields: Optional[tuple] = None, match: str = "substring") -> dict:
+    if cursor and offset:
+        raise HTTPException(400, detail="Use either cursor or offset, not both")
+    fuzzy = match == "fuzzy"
+    if fuzzy and not q:
+        raise HTTPException(400, detail="match=fuzzy requires q")
+    if fuzzy and not trigram_available(db):
+        raise HTTPException(501, detail="Fuzzy search requires the pg_trgm extension (alembic upgrade head)")
+
+    # 只查詢需要的欄位（Row，不建立 ORM 物件、不進 identity map）；id 與排序欄位供 next_cursor 使用
+    fields = fields or VIDEO_FIELDS
+    if fuzzy:
+        # 依相似度排序，cursor 記住 (score, id)
+        col = fuzzy_score(Video.file_path, q)
+        order_by, order_dir = "relevance", "desc"
+        columns = [getattr(Video, name) for name in fields] + ([] if "id" in fields else [Video.id])
+        columns.append(col.label("score"))
+    else:
+        col = getattr(Video, order_by)
+        columns = [getattr(Video, name) for name in list(fields) + [n for n in ("id", order_by) if n not in fields]]
+    qset = db.query(*columns)
 
     if training_type:
         qset = qset.filter(Video.training_type == training_type)
@@ -66,44 +170,124 @@ def list_videos(
         except ValueError:
             raise HTTPException(400, detail="Invalid date_to")
     if q:
-        # 檔名片段搜尋
-        like = f"%{q}%"
-        qset = qset.filter(Video.file_path.ilike(like))
+        # 檔名搜尋（有 pg_trgm GIN 索引時兩種方式都走索引）
+        qset = qset.filter(fuzzy_filter(Video.file_path, q) if fuzzy else substring_filter(Video.file_path, q))
 
-    # 排序
-    col = getattr(Video, order_by)
-    qset = qset.order_by(desc(col) if order_dir == "desc" else asc(col))
+    after = None
+    if cursor:
+        try:
+            value, row_id = decode_cursor(cursor, order_by, order_dir, col)
+            after = (value, uuid.UUID(row_id))
+        except (InvalidCursor, ValueError) as e:
+            raise HTTPException(400, detail=f"Invalid cursor: {e}")
 
-    total = qset.count()
-    items = [_video_to_dict(v) for v in qset.offset(offset).limit(limit).all()]
-    return {"total": total, "count": len(items), "items": items}
+    if total == "exact":
+        total_count = qset.count()
+    elif total == "estimate":
+        total_count = estimate_count(db, qset)
+    else:
+        total_count = None
 
+    if offset:
+        # 排序（id 作為 tiebreaker，與 keyset 分頁的順序一致）
+        order = desc if order_dir == "desc" else asc
+        rows = qset.order_by(order(col), order(Video.id)).offset(offset).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+    else:
+        rows, has_more = keyset_page(qset, col, Video.id, order_dir, limit, after)
 
-@router.get("/{video_id}")
-def get_video(video_id: UUID, db: Session = Depends(get_db)):
-    v: Optional[Video] = db.query(Video).filter(Video.id == video_id).first()
-    if not v:
-        raise HTTPException(status_code=404, detail="Video not found")
-    return _video_to_dict(v)
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(order_by, order_dir, last.score if fuzzy else getattr(last, order_by), last.id)
+    items = _rows_to_dicts(rows, fields)
+    if fuzzy:
+        for item, row in zip(items, rows):
+            item["score"] = round(row.score, 4)
+    return {"total": total_count, "count": len(items), "items": items, "next_cursor": next_cursor}
 
 
 @router.post("/scan", status_code=202)
 def trigger_scan(
     directory: str = Body(default="Midea", embed=True),
-    mode: str = Body(default="incremental", embed=True)  # 'incremental' or 'full'
+    mode: str = Body(default="incremental", embed=True),  # 'incremental' or 'full'
+    workers: int = Body(default=1, ge=1, le=32, embed=True),
+    phash: bool = Body(default=False, embed=True),
 ):
     """
-    觸發背景掃描。
+    排入背景掃描工作（由 scan job 佇列以固定 worker 數執行）。
     mode:
       - incremental: 跳過 DB 已存在的檔案（現行行為）
       - full: 重新處理（傳遞旗標給掃描器）
+    phash: 掃描後計算感知雜湊，供近似重複查詢
+    相同參數且仍在排隊中的工作會合併，回傳既有的 job_id。
     """
+    if mode not in ("incremental", "full"):
+        raise HTTPException(status_code=400, detail="mode must be 'incremental' or 'full'")
     try:
-        import scripts.scan_videos as sv  # type: ignore
-        kwargs = {"directory": directory, "mode": mode}
-        t = threading.Thread(target=sv.scan_videos, kwargs=kwargs, daemon=True)
-        t.start()
-        return {"status": "started", "directory": directory, "mode": mode}
+        job, deduplicated = get_scan_job_manager().submit(directory, mode, workers=workers, phash=phash)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start scan: {e}")
-    
\ No newline at end of file
+    return {**job, "deduplicated": deduplicated}
+
+
+@router.get("/scan")
+def list_scan_jobs(limit: int = Query(20, ge=1, le=200)):
+    """最近的掃描工作（含已結束的歷史紀錄）"""
+    return {"items": get_scan_job_manager().list(limit=limit)}
+
+
+@router.get("/scan/{job_id}")
+def get_scan_job(job_id: UUID):
+    job = get_scan_job_manager().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    return job
+
+
+@router.post("/scan/{job_id}/cancel", status_code=202)
+def cancel_scan_job(job_id: UUID):
+    job = get_scan_job_manager().cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    return job
+
+
+def get_video(video_id: UUID, db: Session = Depends(get_db)):
+    v: Optional[Video] = db.query(Video).filter(Video.id == video_id).first()
+    if not v:
+        raise HTTPException(status_code=404, detail="Video not found")
+    return _video_to_dict(v)
+
+
+async def get_video_async(video_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    v: Optional[Video] = await db.get(Video, video_id)
+    if not v:
+        raise HTTPException(status_code=404, detail="Video not found")
+    return _video_to_dict(v)
+
+
+router.add_api_route("/{video_id}", get_video_async if DB_ASYNC else get_video, methods=["GET"])
+
+
+@router.get("/{video_id}/near-duplicates")
+def get_near_duplicates(
+    video_id: UUID,
+    db: Session = Depends(get_db),
+    max_distance: int = Query(NEAR_DUPLICATE_MAX_DISTANCE, ge=0, le=16,
+                              description="Hamming distance on the 64-bit perceptual hash"),
+):
+    """重新編碼 / 改解析度 / 略剪的同一段影片（依 perceptual_hash 的 Hamming distance）"""
+    v: Optional[Video] = db.query(Video).filter(Video.id == video_id).first()
+    if not v:
+        raise HTTPException(status_code=404, detail="Video not found")
+    if not v.perceptual_hash:
+        raise HTTPException(status_code=409, detail="Perceptual hash not computed yet (scan with --phash)")
+
+    matches = [(d, vid) for d, vid in get_near_duplicate_index().search(db, v.perceptual_hash, max_distance)
+               if vid != v.id]
+    videos = {x.id: x for x in db.query(Video).filter(Video.id.in_([vid for _, vid in matches])).all()} if matches else {}
+    items = [{**_video_to_dict(videos[vid]), "distance": d} for d, vid in matches if vid in videos]
+    return {"video_id": str(v.id), "perceptual_hash": v.perceptual_hash, "max_distance": max_distance,
+            "count": len(items), "items": items}
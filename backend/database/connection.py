@@ -1,5 +1,9 @@
 """
 Database Connection and Session Management
+
+- 同步：engine / SessionLocal / get_db（psycopg2），腳本與同步 route 使用
+- 非同步：get_async_engine / get_async_db（SQLAlchemy asyncio + asyncpg），DB_ASYNC=1 時 videos API 使用；
+  asyncpg 只在第一次使用時才 import，未安裝時同步路徑不受影響
 """
 
 from sqlalchemy import create_engine
@@ -14,12 +18,49 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 engine = create_engine(
     DATABASE_URL,
     echo=os.getenv("DB_ECHO", "False") == "True",
-    pool_size=5,
-    max_overflow=10
+    pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+_async_engine = None
+_async_session_factory = None
+
+
+def async_database_url(url: str) -> str:
+    """postgresql:// 或 postgresql+psycopg2:// → postgresql+asyncpg://"""
+    scheme, sep, rest = url.partition("://")
+    if scheme.split("+")[0] in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+
+def get_async_engine():
+    """第一次呼叫時建立 async engine（連線池在 event loop 內使用，不佔用 threadpool）"""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        _async_engine = create_async_engine(
+            async_database_url(os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL),
+            echo=os.getenv("DB_ECHO", "False") == "True",
+            pool_size=int(os.getenv("DB_ASYNC_POOL_SIZE", "20")),
+            max_overflow=int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "20")),
+        )
+        _async_session_factory = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+async def dispose_async_engine():
+    """關閉 async 連線池（app shutdown、或測試切換 event loop 前）"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
+
+
 def get_db():
     """Dependency for getting database session"""
     db = SessionLocal()
@@ -28,6 +69,14 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    """Dependency for getting an async database session"""
+    get_async_engine()
+    async with _async_session_factory() as db:
+        yield db
+
+
 def init_db():
     """Initialize database tables"""
     from backend.models.schemas import Base
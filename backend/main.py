@@ -2,6 +2,7 @@
 BoxTech FastAPI Application
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
@@ -9,10 +10,21 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # 關閉 async 連線池（DB_ASYNC=1 時才會建立）
+    from backend.database.connection import dispose_async_engine
+
+    await dispose_async_engine()
+
+
 app = FastAPI(
     title="BoxTech API",
     description="AI Boxing Training Analysis System",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS
@@ -2,7 +2,7 @@
 SQLAlchemy Database Models
 """
 
-from sqlalchemy import Column, String, Integer, Float, DateTime, Boolean, JSON, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, Float, DateTime, Boolean, JSON, ForeignKey, Text, Index, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import relationship
@@ -28,7 +28,9 @@ class Video(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     file_path = Column(Text, nullable=False)
-    file_hash = Column(String(64), unique=True, nullable=False)
+    file_hash = Column(String(64), unique=True)  # 完整 SHA-256；tiered 掃描時可能延後回填
+    quick_hash = Column(String(64), index=True)  # tier-1 取樣指紋（size + 取樣區塊）
+    perceptual_hash = Column(String(16))  # 64-bit 感知雜湊（hex），近似重複比對用
     upload_date = Column(DateTime, default=datetime.utcnow)
     duration_seconds = Column(Float)
     fps = Column(Integer)
@@ -45,6 +47,12 @@ class Video(Base):
     user = relationship("User", back_populates="videos")
     actions = relationship("Action", back_populates="video")
 
+    # GET /api/v1/videos 的 keyset 分頁（排序欄位 + id tiebreaker）
+    # file_path 的 pg_trgm GIN 索引（q 搜尋）需要 extension，只由 migration b6e2d9f4a8c1 建立，init_db 不建立
+    __table_args__ = tuple(
+        Index(f"ix_videos_{col}_id", col, "id") for col in ("upload_date", "training_date", "file_size_bytes", "fps")
+    )
+
 class Action(Base):
     __tablename__ = "actions"
     
@@ -86,9 +94,28 @@ class PoseData(Base):
     frame_number = Column(Integer, nullable=False)
     timestamp = Column(Float, nullable=False)
     landmarks = Column(JSON, nullable=False)  # 33 個 MediaPipe 關鍵點
+    interpolated = Column(Boolean, nullable=False, default=False, server_default="false")  # stride 取樣時由前後幀內插
+    
+    video = relationship("Video")
+
+    __table_args__ = (Index("ix_pose_data_video_id_frame_number", "video_id", "frame_number"),)
+
+class PoseSegment(Base):
+    """連續一段幀（SEGMENT_FRAMES 幀）的 landmarks 打包成一筆：RECORD_DTYPE 陣列的 bytes，可 zlib 壓縮"""
+    __tablename__ = "pose_segments"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    video_id = Column(UUID(as_uuid=True), ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
+    start_frame = Column(Integer, nullable=False)  # 區段涵蓋 [start_frame, end_frame]
+    end_frame = Column(Integer, nullable=False)
+    frame_count = Column(Integer, nullable=False)  # 實際有 landmarks 的幀數
+    compression = Column(String(10), nullable=False, default="none")  # none / zlib
+    data = Column(LargeBinary, nullable=False)
     
     video = relationship("Video")
 
+    __table_args__ = (Index("ix_pose_segments_video_id_start_frame", "video_id", "start_frame", unique=True),)
+
 class TrainingSession(Base):
     __tablename__ = "training_sessions"
     
@@ -123,3 +150,17 @@ class AbilityAssessment(Base):
     level_name = Column(String(50))
     
     user = relationship("User")
+
+class ScanJob(Base):
+    __tablename__ = "scan_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    directory = Column(Text, nullable=False)
+    mode = Column(String(20), nullable=False)
+    options = Column(JSON)  # {'workers': 1, ...}
+    status = Column(String(20), default="queued", index=True)  # queued / running / completed / failed / cancelled / interrupted
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    progress = Column(JSON)  # ScanStats 快照：files_seen / inserted / errors / throughput ...
+    error = Column(Text)
@@ -0,0 +1,53 @@
+"""
+Filename search for GET /api/v1/videos (q=)
+
+- match=substring（預設）：file_path ILIKE '%q%'。前置萬用字元用不到 B-tree 索引；migration b6e2d9f4a8c1
+  建立 pg_trgm 的 GIN 索引（file_path gin_trgm_ops）後，PostgreSQL 先由 trigram 索引找出候選列再 recheck，
+  不再整表掃描（q 需能抽出至少一個 trigram，約 3 個字元以上效果才明顯）
+- match=fuzzy：依 word_similarity(q, file_path) 排序，即 q 與 file_path 中最相似的一段的 trigram 相似度（0~1）。
+  以 `file_path %> q` 過濾（門檻為 pg_trgm.word_similarity_threshold，預設 0.6，同樣走 GIN 索引）。
+  可容許大小寫、分隔符號與少量錯字，例如 "團課 打靶01" 可找到 "20251102-團課-打靶 01.MOV"
+- pg_trgm 依資料庫的 LC_CTYPE 判斷哪些字元算「字」：UTF-8 locale（en_US.UTF-8、zh_TW.UTF-8 等）下中文字元
+  也會產生 trigram；LC_CTYPE=C 時只有 ASCII 英數字參與，中文部分只能靠 substring 比對
+- 未安裝 pg_trgm 時 substring 照常運作（整表掃描），fuzzy 無法使用
+"""
+
+from typing import Dict
+
+from sqlalchemy import Float, cast, func, text
+
+MATCH_MODES = ("substring", "fuzzy")
+
+_trigram_available: Dict[str, bool] = {}
+
+
+def escape_like(value: str) -> str:
+    """讓 q 中的 % 與 _ 以字面比對（搭配 escape='!'；反斜線在不同 driver / 編譯方式下的跳脫規則不一致）"""
+    return value.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+
+def substring_filter(column, q: str):
+    return column.ilike(f"%{escape_like(q)}%", escape="!")
+
+
+def fuzzy_filter(column, q: str):
+    # `col %> q` 等同 word_similarity(q, col) >= 門檻，且可使用 gin_trgm_ops 索引
+    return column.op("%>")(q)
+
+
+def fuzzy_score(column, q: str):
+    # word_similarity 回傳 real；轉成 double precision，讓 ORDER BY、回傳的 score 與 cursor 的比較值型別一致
+    # （real 與 float8 參數比較時，無法以 real 精確表示的分數會造成翻頁重複或遺漏）
+    return cast(func.word_similarity(q, column), Float(53))
+
+
+def trigram_available(db) -> bool:
+    """資料庫是否已安裝 pg_trgm（每個連線 URL 只查一次；安裝後需重新啟動 API）"""
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    key = str(bind.url)
+    if key not in _trigram_available:
+        row = db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first()
+        _trigram_available[key] = row is not None
+    return _trigram_available[key]
@@ -0,0 +1,360 @@
+"""
+Streaming landmark sinks for pose extraction
+
+pose_extract_and_visualize 每處理完一幀就交給 sink，sink 累積 chunk_size 幀後寫出，
+記憶體用量與影片長度無關；中途當機時已寫出的 chunk 仍保留。
+
+- JsonSink：與舊版相同的 {"video_path", "fps", "data": [...], "total_frames", ...} 文件，逐幀串流寫出
+- NdjsonSink：第一行 {"meta": {...}}、每幀一行、結束時一行 {"summary": {...}}；中斷時檔案仍可逐行讀取
+- BinarySink：.lmk（見 backend/utils/landmark_file.py）
+- DbSink：每個 chunk 以 COPY（PostgreSQL）或 executemany 寫入 pose_data 並 commit，重跑時取代舊資料
+- SegmentSink：寫入 pose_segments（每區段一筆打包的 float32 陣列，見 backend/services/pose_segments.py）
+
+介面：write(frame, timestamp, landmarks, interpolated)，close(**summary)。
+checkpoint(last_frame) 寫出目前所有資料並回傳狀態；以 resume=狀態 重新建立 sink 時，
+會丟掉 checkpoint 之後寫出的部分，從 last_frame 之後接著寫。
+"""
+
+import io
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+from sqlalchemy import delete, insert
+
+from backend.models.schemas import PoseData
+from backend.services.pose_segments import SEGMENT_FRAMES, PoseSegmentRepository, segment_start
+from backend.utils.landmark_file import FLAG_INTERPOLATED, RECORD_DTYPE, LandmarkWriter, landmarks_to_array
+
+DEFAULT_CHUNK_SIZE = 256
+
+PathLike = Union[str, Path]
+
+
+class LandmarkSink:
+    chunk_size = DEFAULT_CHUNK_SIZE
+
+    def write(self, frame: int, timestamp: float, landmarks: List[Dict], interpolated: bool = False):
+        raise NotImplementedError
+
+    def close(self, **summary):
+        pass
+
+    def flush(self):
+        pass
+
+    def checkpoint(self, last_frame: int) -> Dict:
+        """寫出 last_frame 為止的所有資料，回傳之後 resume 所需的狀態"""
+        self.flush()
+        return {"count": self.count, "last_frame": last_frame}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _frame_dict(frame: int, timestamp: float, landmarks: List[Dict], interpolated: bool) -> Dict:
+    return {"frame": frame, "timestamp": timestamp, "landmarks": landmarks, "interpolated": interpolated}
+
+
+class _TextSink(LandmarkSink):
+    """文字格式共用：序列化後的字串先放在 buffer，每 chunk_size 幀寫出一次"""
+
+    def __init__(self, path: PathLike, chunk_size: int = DEFAULT_CHUNK_SIZE, resume: Optional[Dict] = None):
+        self.path = Path(path)
+        self.chunk_size = max(1, chunk_size)
+        self.count = 0
+        self._buffer: List[str] = []
+        if resume:
+            # 截掉 checkpoint 之後的內容（含中斷時寫出的結尾），接著寫
+            self._fh = open(self.path, "r+b")
+            self._fh.truncate(resume["offset"])
+            self._fh.seek(resume["offset"])
+            self.count = resume["count"]
+        else:
+            self._fh = open(self.path, "wb")
+
+    def _append(self, text: str):
+        self._buffer.append(text)
+        self.count += 1
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def _write_text(self, text: str):
+        self._fh.write(text.encode("utf-8"))
+
+    def flush(self):
+        if self._buffer:
+            self._write_text("".join(self._buffer))
+            self._buffer.clear()
+        self._fh.flush()
+
+    def checkpoint(self, last_frame: int) -> Dict:
+        self.flush()
+        return {"count": self.count, "last_frame": last_frame, "offset": self._fh.tell()}
+
+
+class JsonSink(_TextSink):
+    def __init__(self, path: PathLike, meta: Optional[Dict] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 resume: Optional[Dict] = None):
+        super().__init__(path, chunk_size, resume)
+        if not resume:
+            head = json.dumps(dict(meta or {}), ensure_ascii=False)
+            # 先寫 metadata 與 "data": [，結束時再補上 ] 與 summary 欄位
+            self._write_text(head[:-1] + (", " if len(head) > 2 else "") + '"data": [')
+
+    def write(self, frame, timestamp, landmarks, interpolated=False):
+        sep = ", " if self.count else ""
+        self._append(sep + json.dumps(_frame_dict(frame, timestamp, landmarks, interpolated)))
+
+    def close(self, **summary):
+        if self._fh.closed:
+            return
+        self.flush()
+        tail = "".join(f", {json.dumps(k)}: {json.dumps(v, ensure_ascii=False)}" for k, v in summary.items())
+        self._write_text("]" + tail + "}")
+        self._fh.close()
+
+
+class NdjsonSink(_TextSink):
+    def __init__(self, path: PathLike, meta: Optional[Dict] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 resume: Optional[Dict] = None):
+        super().__init__(path, chunk_size, resume)
+        if not resume:
+            self._write_text(json.dumps({"meta": dict(meta or {})}, ensure_ascii=False) + "\n")
+
+    def write(self, frame, timestamp, landmarks, interpolated=False):
+        self._append(json.dumps(_frame_dict(frame, timestamp, landmarks, interpolated)) + "\n")
+
+    def close(self, **summary):
+        if self._fh.closed:
+            return
+        self.flush()
+        self._write_text(json.dumps({"summary": summary}, ensure_ascii=False) + "\n")
+        self._fh.close()
+
+
+def iter_ndjson_landmarks(path: PathLike) -> Iterator[Dict]:
+    """逐行讀取 NdjsonSink 的輸出，只產生幀資料（略過 meta / summary 行與中斷時不完整的最後一行）"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            if "frame" in item:
+                yield item
+
+
+class BinarySink(LandmarkSink):
+    def __init__(self, path: PathLike, meta: Optional[Dict] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 resume: Optional[Dict] = None):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self._writer = LandmarkWriter(path, meta, chunk_size=chunk_size,
+                                      resume_count=resume["count"] if resume else None)
+
+    @property
+    def count(self) -> int:
+        return self._writer.count
+
+    def write(self, frame, timestamp, landmarks, interpolated=False):
+        self._writer.write(frame, timestamp, landmarks, interpolated)
+
+    def flush(self):
+        self._writer.flush()
+
+    def close(self, **summary):
+        self._writer.close(**summary)
+
+
+POSE_DATA_COLUMNS = ("id", "video_id", "frame_number", "timestamp", "landmarks", "interpolated")
+
+
+def _copy_text(value: str) -> str:
+    """COPY text format 的跳脫"""
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _landmarks_json(landmarks: List[Dict]) -> str:
+    """landmarks 的 JSON 文字；欄位固定，直接格式化比 json.dumps 快數倍（COPY 時是主要成本）"""
+    return "[" + ", ".join(
+        f'{{"x": {lm["x"]!r}, "y": {lm["y"]!r}, "z": {lm["z"]!r}, '
+        f'"visibility": {"null" if lm.get("visibility") is None else repr(lm["visibility"])}}}'
+        for lm in landmarks
+    ) + "]"
+
+
+class DbSink(LandmarkSink):
+    """把 landmarks 分批寫入 pose_data，每 chunk_size 幀 commit 一次。
+
+    - PostgreSQL：COPY FROM STDIN，整個 chunk 一次送出
+    - 其他資料庫（測試用 sqlite 等）：executemany INSERT
+    - replace=True：第一個 chunk 之前先刪除該影片既有的 pose_data（同一個 transaction），重跑不會重複；
+      resume 時只刪除 checkpoint 之後的幀
+    """
+
+    def __init__(self, db, video_id, chunk_size: int = DEFAULT_CHUNK_SIZE, replace: bool = True,
+                 resume: Optional[Dict] = None):
+        self.db = db
+        self.video_id = video_id
+        self.chunk_size = max(1, chunk_size)
+        self.replace = replace
+        self.method = "copy" if db.get_bind().dialect.name == "postgresql" else "executemany"
+        self.resume_after: Optional[int] = resume["last_frame"] if resume else None
+        self.count = resume["count"] if resume else 0
+        self.resumed_count = self.count  # checkpoint 之前已寫入的列，不計入本次的 rows_per_second
+        self.seconds = 0.0
+        self._rows: List[Dict] = []
+        self._started = False
+
+    @property
+    def rows_per_second(self) -> float:
+        return (self.count - self.resumed_count) / self.seconds if self.seconds else 0.0
+
+    def write(self, frame, timestamp, landmarks, interpolated=False):
+        self._rows.append(
+            {
+                "id": uuid.uuid4(),
+                "video_id": self.video_id,
+                "frame_number": frame,
+                "timestamp": timestamp,
+                "landmarks": landmarks,
+                "interpolated": interpolated,
+            }
+        )
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+
+    def _start(self):
+        self._started = True
+        table = PoseData.__table__
+        if self.resume_after is not None:
+            self.db.execute(
+                delete(table).where(table.c.video_id == self.video_id, table.c.frame_number > self.resume_after)
+            )
+        elif self.replace:
+            self.db.execute(delete(table).where(table.c.video_id == self.video_id))
+
+    def _copy_rows(self, rows: List[Dict]):
+        buf = io.StringIO()
+        for r in rows:
+            buf.write(
+                f"{r['id']}\t{r['video_id']}\t{r['frame_number']}\t{r['timestamp']!r}\t"
+                f"{_copy_text(_landmarks_json(r['landmarks']))}\t{'t' if r['interpolated'] else 'f'}\n"
+            )
+        buf.seek(0)
+        # 用 session 目前的 connection，COPY 與刪除舊資料在同一個 transaction
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {PoseData.__tablename__} ({', '.join(POSE_DATA_COLUMNS)}) FROM STDIN", buf)
+        finally:
+            cursor.close()
+
+    def flush(self):
+        if not self._rows and self._started:
+            return
+        t0 = time.perf_counter()
+        if not self._started:
+            self._start()
+        if self._rows:
+            if self.method == "copy":
+                self._copy_rows(self._rows)
+            else:
+                self.db.execute(insert(PoseData.__table__), self._rows)
+        self.db.commit()
+        self.seconds += time.perf_counter() - t0
+        self.count += len(self._rows)
+        self._rows = []
+
+    def close(self, **summary):
+        self.flush()
+
+
+class SegmentSink(LandmarkSink):
+    """寫入 pose_segments：累積一個區段（segment_frames 幀）後打包成一筆並 commit。
+
+    checkpoint 時先寫出目前不完整的區段，之後同一區段再寫出時會取代這一筆。
+    """
+
+    def __init__(self, db, video_id, segment_frames: int = SEGMENT_FRAMES, compression: str = "none",
+                 replace: bool = True, resume: Optional[Dict] = None):
+        self.db = db
+        self.video_id = video_id
+        self.repository = PoseSegmentRepository(db, segment_frames=segment_frames, compression=compression)
+        self.replace = replace
+        self.method = f"segments/{compression}"
+        self.count = 0
+        self.resumed_count = 0  # checkpoint 之前已寫入的幀，不計入本次的 rows_per_second
+        self.segments = 0
+        self.seconds = 0.0
+        self._buffer = np.zeros(segment_frames, dtype=RECORD_DTYPE)
+        self._pending = 0
+        self._segment_start: Optional[int] = None
+        self._started = False
+        self.resume_after: Optional[int] = None
+        if resume:
+            # 把 checkpoint 所在區段已寫入的幀載回 buffer，之後與新的幀一起重寫這個區段
+            self.resume_after = resume["last_frame"]
+            self.count = resume["count"]
+            self._segment_start = segment_start(self.resume_after + 1, segment_frames)
+            self.resumed_count = self.count
+            partial = self.repository.read_range(video_id, self._segment_start, self.resume_after)
+            self._buffer[: len(partial)] = partial
+            self._pending = len(partial)
+
+    @property
+    def rows_per_second(self) -> float:
+        return (self.count - self.resumed_count) / self.seconds if self.seconds else 0.0
+
+    def write(self, frame, timestamp, landmarks, interpolated=False):
+        start = segment_start(frame, self.repository.segment_frames)
+        if self._segment_start is not None and start != self._segment_start:
+            self._write_segment()
+            self.segments += bool(self._pending)
+            self._pending = 0
+        self._segment_start = start
+        rec = self._buffer[self._pending]
+        rec["landmarks"] = landmarks_to_array(landmarks)
+        rec["timestamp"] = timestamp
+        rec["frame"] = frame
+        rec["flags"] = FLAG_INTERPOLATED if interpolated else 0
+        self._pending += 1
+        self.count += 1
+
+    def _write_segment(self):
+        t0 = time.perf_counter()
+        if not self._started:
+            self._started = True
+            if self.resume_after is not None:
+                self.repository.delete_video(self.video_id, from_frame=self._segment_start)
+            elif self.replace:
+                self.repository.delete_video(self.video_id)
+        if self._pending:
+            self.repository.delete_segment(self.video_id, self._segment_start)
+            self.repository.write_segment(self.video_id, self._segment_start, self._buffer[: self._pending])
+        self.db.commit()
+        self.seconds += time.perf_counter() - t0
+
+    def flush(self):
+        """寫出目前的區段（可能不完整）；buffer 保留到區段結束"""
+        self._write_segment()
+
+    def close(self, **summary):
+        self._write_segment()
+        self.segments += bool(self._pending)
+        self._pending = 0
+
+
+FILE_SINKS = {"json": JsonSink, "ndjson": NdjsonSink, "binary": BinarySink}
+FILE_SUFFIXES = {"json": ".json", "ndjson": ".ndjson", "binary": ".lmk"}
+
+
+def open_file_sink(landmark_format: str, path: PathLike, meta: Optional[Dict] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE, resume: Optional[Dict] = None) -> LandmarkSink:
+    return FILE_SINKS[landmark_format](path, meta, chunk_size=chunk_size, resume=resume)
@@ -0,0 +1,58 @@
+"""
+In-memory near-duplicate index for GET /api/v1/videos/{video_id}/near-duplicates
+
+perceptual_hash 載入記憶體建成 HammingIndex（10 萬筆約 0.3 秒），之後每次查詢約 1–2 ms。
+已有雜湊的影片數量改變、或超過 REFRESH_SECONDS 時重新建索引（掃描器新增雜湊後自動生效）。
+"""
+
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func
+
+from backend.database.connection import SessionLocal
+from backend.models.schemas import Video
+from backend.utils.perceptual_hash import NEAR_DUPLICATE_MAX_DISTANCE, HammingIndex, phash_to_int
+
+REFRESH_SECONDS = 300.0
+
+
+class NearDuplicateIndex:
+    def __init__(self, session_factory: Callable = SessionLocal, max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE):
+        self._session_factory = session_factory
+        self.max_distance = max_distance
+        self._index: Optional[HammingIndex[UUID]] = None
+        self._count = -1
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def _ensure_fresh(self, db) -> HammingIndex:
+        count = db.query(func.count(Video.perceptual_hash)).scalar()
+        with self._lock:
+            stale = time.monotonic() - self._built_at > REFRESH_SECONDS
+            if self._index is None or count != self._count or stale:
+                rows = db.query(Video.id, Video.perceptual_hash).filter(Video.perceptual_hash.isnot(None)).all()
+                self._index = HammingIndex(
+                    ((phash_to_int(phash), vid) for vid, phash in rows), max_distance=self.max_distance
+                )
+                self._count = count
+                self._built_at = time.monotonic()
+            return self._index
+
+    def search(self, db, phash: str, max_distance: Optional[int] = None) -> List[Tuple[int, UUID]]:
+        """回傳 (distance, video_id)，依距離排序"""
+        return self._ensure_fresh(db).search(phash_to_int(phash), max_distance)
+
+
+_index: Optional[NearDuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex()
+        return _index
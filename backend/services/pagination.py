@@ -0,0 +1,99 @@
+"""
+Keyset (cursor) pagination for GET /api/v1/videos
+
+offset 分頁越往後越慢：資料庫必須掃過並丟掉前面 offset 筆。keyset 分頁改為記住上一頁最後一筆的
+(排序欄位, id)，下一頁從該位置之後開始，配合 (排序欄位, id) 複合索引，每一頁的成本與頁數無關。
+
+- cursor 是 opaque token（base64url JSON），內含 order_by / order_dir，換了排序方式的 cursor 視為無效
+- id 作為 tiebreaker，排序欄位相同的影片也有唯一且穩定的順序
+- 排序欄位可能是 NULL：沿用 PostgreSQL 的預設（ASC 時 NULL 在最後、DESC 時在最前），
+  分成「非 NULL」與「NULL」兩段各自查詢，每一段都是 (col, id) 索引上的 range scan
+- total：exact（COUNT(*)）、estimate（planner 估計的列數，來自 EXPLAIN）、none（不計算）
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import asc, bindparam, desc, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query
+
+TOTAL_MODES = ("exact", "estimate", "none")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def encode_cursor(order_by: str, order_dir: str, value: Any, row_id: Any) -> str:
+    payload = json.dumps({"o": order_by, "d": order_dir, "v": _encode_value(value), "id": str(row_id)},
+                         separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, order_by: str, order_dir: str, column) -> Tuple[Any, str]:
+    """回傳 (排序欄位的值, id)；token 格式錯誤或排序方式不同時拋出 InvalidCursor"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        value, row_id = payload["v"], payload["id"]
+        if payload["o"] != order_by or payload["d"] != order_dir:
+            raise InvalidCursor("Cursor was issued for a different order_by / order_dir")
+        if value is not None and column.type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+    except InvalidCursor:
+        raise
+    except (ValueError, KeyError, TypeError, binascii.Error) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    return value, row_id
+
+
+def keyset_page(query: Query, column, id_column, order_dir: str, limit: int,
+                after: Optional[Tuple[Any, Any]] = None) -> Tuple[list, bool]:
+    """依 (column, id_column) 取 after 之後的 limit 筆，回傳 (rows, 是否還有下一頁)"""
+    descending = order_dir == "desc"
+    order = desc if descending else asc
+    # PostgreSQL 預設：ASC NULLS LAST、DESC NULLS FIRST（與 (col, id) 索引反向掃描的順序一致）
+    phases = ["null", "value"] if descending else ["value", "null"]
+    if after is not None and after[0] is None:
+        phases = phases[phases.index("null"):]
+    elif after is not None:
+        phases = phases[phases.index("value"):]
+
+    rows: List = []
+    for phase in phases:
+        if phase == "value":
+            q = query.filter(column.isnot(None))
+            if after is not None and after[0] is not None:
+                key = tuple_(column, id_column)
+                bound = tuple_(bindparam(None, after[0], type_=column.type),
+                               bindparam(None, after[1], type_=id_column.type))
+                q = q.filter(key < bound if descending else key > bound)
+            q = q.order_by(order(column), order(id_column))
+        else:
+            q = query.filter(column.is_(None))
+            if after is not None and after[0] is None:
+                q = q.filter(id_column < after[1] if descending else id_column > after[1])
+            q = q.order_by(order(id_column))
+        rows.extend(q.limit(limit + 1 - len(rows)).all())
+        if len(rows) > limit:
+            return rows[:limit], True
+    return rows, False
+
+
+def estimate_count(db, query: Query) -> Optional[int]:
+    """planner 估計的列數（PostgreSQL EXPLAIN）；其他資料庫回傳 None"""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    # 以 named paramstyle 編譯再交給 text()，psycopg2 與 asyncpg 都適用
+    compiled = query.statement.compile(dialect=postgresql.dialect(paramstyle="named"))
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"), compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,137 @@
+"""
+Packed pose storage (pose_segments)
+
+pose_data 一幀一筆 JSON，一支影片動輒 10 萬筆以上，讀取時每筆都要解析 JSON。
+pose_segments 把每 SEGMENT_FRAMES 幀打包成一筆：
+- data：該區段內有 landmarks 的幀，RECORD_DTYPE（見 backend/utils/landmark_file.py）陣列的 bytes，
+  可選 zlib 壓縮
+- 區段以 frame number 對齊：[1, 300]、[301, 600] …，依 (video_id, start_frame) 建唯一索引
+
+PoseSegmentRepository 讀任意幀範圍時只取涵蓋該範圍的區段，未壓縮的區段以 np.frombuffer 直接當陣列使用。
+"""
+
+import zlib
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+
+from backend.models.schemas import PoseSegment
+from backend.utils.landmark_file import RECORD_DTYPE
+
+SEGMENT_FRAMES = 300
+COMPRESSIONS = ("none", "zlib")
+
+
+def segment_start(frame: int, segment_frames: int = SEGMENT_FRAMES) -> int:
+    """frame 所屬區段的第一幀（frame number 從 1 開始）"""
+    return (frame - 1) // segment_frames * segment_frames + 1
+
+
+def pack_records(records: np.ndarray, compression: str = "none") -> bytes:
+    data = np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes()
+    if compression == "zlib":
+        return zlib.compress(data, 1)
+    if compression != "none":
+        raise ValueError(f"Unknown compression: {compression}")
+    return data
+
+
+def unpack_records(data, compression: str) -> np.ndarray:
+    """回傳唯讀的 RECORD_DTYPE 陣列（未壓縮時直接引用 data，不複製）"""
+    if compression == "zlib":
+        data = zlib.decompress(data)
+    elif compression != "none":
+        raise ValueError(f"Unknown compression: {compression}")
+    return np.frombuffer(data, dtype=RECORD_DTYPE)
+
+
+def split_segments(records: np.ndarray, segment_frames: int = SEGMENT_FRAMES) -> Iterator[tuple]:
+    """依區段切開（records 的 frame 需遞增），產生 (start_frame, records)"""
+    if not len(records):
+        return
+    starts = (records["frame"] - 1) // segment_frames
+    bounds = np.flatnonzero(np.diff(starts)) + 1
+    for chunk in np.split(records, bounds):
+        yield segment_start(int(chunk["frame"][0]), segment_frames), chunk
+
+
+class PoseSegmentRepository:
+    def __init__(self, db, segment_frames: int = SEGMENT_FRAMES, compression: str = "none"):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.db = db
+        self.segment_frames = segment_frames
+        self.compression = compression
+
+    def delete_video(self, video_id, from_frame: Optional[int] = None):
+        """刪除影片的區段；from_frame 指定時只刪除從該幀所在區段開始的區段"""
+        table = PoseSegment.__table__
+        query = delete(table).where(table.c.video_id == video_id)
+        if from_frame is not None:
+            query = query.where(table.c.end_frame >= from_frame)
+        self.db.execute(query)
+
+    def delete_segment(self, video_id, start_frame: int):
+        table = PoseSegment.__table__
+        self.db.execute(delete(table).where(table.c.video_id == video_id, table.c.start_frame == start_frame))
+
+    def write_segment(self, video_id, start_frame: int, records: np.ndarray) -> int:
+        """寫入一個區段（records 需都落在 start_frame 的區段內），回傳寫入的 bytes"""
+        data = pack_records(records, self.compression)
+        self.db.execute(
+            insert(PoseSegment.__table__),
+            [
+                {
+                    "video_id": video_id,
+                    "start_frame": start_frame,
+                    "end_frame": start_frame + self.segment_frames - 1,
+                    "frame_count": len(records),
+                    "compression": self.compression,
+                    "data": data,
+                }
+            ],
+        )
+        return len(data)
+
+    def write_records(self, video_id, records: np.ndarray) -> int:
+        """依區段切開後寫入，回傳區段數"""
+        count = 0
+        for start_frame, chunk in split_segments(records, self.segment_frames):
+            self.write_segment(video_id, start_frame, chunk)
+            count += 1
+        return count
+
+    def _segments(self, video_id, start: int, end: Optional[int]) -> Iterable[tuple]:
+        table = PoseSegment.__table__
+        query = (
+            select(table.c.compression, table.c.data)
+            .where(table.c.video_id == video_id, table.c.end_frame >= start)
+            .order_by(table.c.start_frame)
+        )
+        if end is not None:
+            query = query.where(table.c.start_frame <= end)
+        return self.db.execute(query)
+
+    def read_range(self, video_id, start: int = 1, end: Optional[int] = None) -> np.ndarray:
+        """frame number 在 [start, end] 的 records；end=None 表示到最後一幀"""
+        parts: List[np.ndarray] = []
+        for compression, data in self._segments(video_id, start, end):
+            records = unpack_records(data, compression)
+            lo, hi = np.searchsorted(records["frame"], [start, end + 1 if end is not None else np.iinfo(np.int32).max])
+            if hi > lo:
+                parts.append(records[lo:hi])
+        if not parts:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def read_landmarks(self, video_id, start: int = 1, end: Optional[int] = None) -> tuple:
+        """回傳 (frames int32[N], timestamps float64[N], landmarks float32[N, 33, 4])"""
+        records = self.read_range(video_id, start, end)
+        return records["frame"], records["timestamp"], records["landmarks"]
+
+    def frame_count(self, video_id) -> int:
+        table = PoseSegment.__table__
+        return self.db.execute(
+            select(func.coalesce(func.sum(table.c.frame_count), 0)).where(table.c.video_id == video_id)
+        ).scalar()
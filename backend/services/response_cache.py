@@ -0,0 +1,233 @@
+"""
+Response cache for GET /api/v1/videos
+
+前端以少數幾組篩選條件輪詢影片列表，每次都重跑查詢、count 與 _video_to_dict。這裡快取序列化後的回應：
+- key：路由名稱 + 正規化後的查詢參數（套用預設值後排序），再加上目前的 generation
+- generation：掃描器寫入 / 更新 videos 後呼叫 bump_generation()，舊的 key 不再被查到，由 LRU / TTL 自然淘汰
+- 後端：預設為 process 內的 LRU + TTL；RESPONSE_CACHE_BACKEND=redis 時改用 REDIS_URL（多個 API worker
+  與命令列掃描共用 generation）。Redis 無法連線時當作 cache miss，不影響 API
+- ETag 為回應內容的雜湊；If-None-Match 相同時回 304，不重送內容
+- 序列化：有安裝 orjson 時使用 orjson（快數倍），否則使用 jsonable_encoder + json；兩者輸出相同的緊湊 UTF-8 JSON
+
+process 內的後端只看得到同一個 process 的 bump（API 觸發的掃描）；命令列執行 scan_videos 時，
+未使用 Redis 的 API 最多延遲 RESPONSE_CACHE_TTL 秒才看到新資料。
+
+環境變數：RESPONSE_CACHE_BACKEND（memory|redis，預設 memory）、RESPONSE_CACHE_TTL（秒，預設 30，0 = 停用）、
+RESPONSE_CACHE_SIZE（memory 後端的最大筆數，預設 256）。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # 未安裝時改用標準 json
+    orjson = None
+
+GENERATION_KEY = "boxtech:videos:generation"
+KEY_PREFIX = "boxtech:response:"
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_content(cls, content) -> "CachedResponse":
+        if orjson is not None:
+            # orjson 不支援的型別（Decimal 等）交給 jsonable_encoder
+            body = orjson.dumps(content, default=jsonable_encoder)
+        else:
+            body = json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return cls(body=body, etag=f'"{hashlib.sha1(body).hexdigest()}"')
+
+    def to_response(self, if_none_match: Optional[str] = None, hit: bool = False) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache", "X-Cache": "hit" if hit else "miss"}
+        if if_none_match and self.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+class LRUTTLCache:
+    """執行緒安全的 LRU；每筆在寫入 ttl 秒後過期"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if self._clock() >= expires_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MemoryBackend:
+    def __init__(self, max_entries: int = 256, ttl: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.cache = LRUTTLCache(max_entries, ttl, clock)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        return self._generation
+
+    def bump(self) -> int:
+        with self._lock:
+            self._generation += 1
+            return self._generation
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: CachedResponse):
+        self.cache.set(key, value)
+
+
+class RedisBackend:
+    """以 Redis 存放回應與 generation；連線錯誤時 get 回傳 None、set / bump 略過"""
+
+    def __init__(self, url: str, ttl: float = 30.0):
+        import redis
+
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._errors = (redis.RedisError, OSError)
+        self.ttl = ttl
+
+    def generation(self) -> int:
+        try:
+            return int(self._redis.get(GENERATION_KEY) or 0)
+        except self._errors:
+            return -1
+
+    def bump(self) -> int:
+        try:
+            return int(self._redis.incr(GENERATION_KEY))
+        except self._errors:
+            return -1
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        try:
+            raw = self._redis.hmget(KEY_PREFIX + key, "etag", "body")
+        except self._errors:
+            return None
+        if raw[0] is None:
+            return None
+        return CachedResponse(body=raw[1], etag=raw[0].decode())
+
+    def set(self, key: str, value: CachedResponse):
+        try:
+            with self._redis.pipeline() as pipe:
+                pipe.hset(KEY_PREFIX + key, mapping={"etag": value.etag, "body": value.body})
+                pipe.expire(KEY_PREFIX + key, max(1, int(self.ttl)))
+                pipe.execute()
+        except self._errors:
+            pass
+
+
+class ResponseCache:
+    def __init__(self, backend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+
+    def key(self, route: str, params: Dict) -> Optional[str]:
+        """正規化參數後的 key；generation 無法取得（Redis 連不上）時回傳 None，表示不使用快取"""
+        generation = self.backend.generation()
+        if generation < 0:
+            return None
+        normalized = json.dumps(jsonable_encoder(params), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        return f"{route}:{generation}:{digest}"
+
+    def _lookup(self, route: str, params: Dict) -> tuple:
+        key = self.key(route, params) if self.enabled else None
+        return key, (self.backend.get(key) if key is not None else None)
+
+    def _store(self, key: Optional[str], content) -> CachedResponse:
+        cached = CachedResponse.from_content(content)
+        if key is not None:
+            self.backend.set(key, cached)
+        return cached
+
+    def respond(self, route: str, params: Dict, build: Callable[[], object],
+                if_none_match: Optional[str] = None) -> Response:
+        """有快取時直接回應；否則呼叫 build() 產生內容並寫入快取"""
+        key, cached = self._lookup(route, params)
+        if cached is not None:
+            return cached.to_response(if_none_match, hit=True)
+        return self._store(key, build()).to_response(if_none_match)
+
+    async def respond_async(self, route: str, params: Dict, build: Callable[[], Awaitable[object]],
+                            if_none_match: Optional[str] = None) -> Response:
+        """respond() 的 async 版本：build 為 coroutine function"""
+        key, cached = self._lookup(route, params)
+        if cached is not None:
+            return cached.to_response(if_none_match, hit=True)
+        return self._store(key, await build()).to_response(if_none_match)
+
+    def bump_generation(self) -> int:
+        return self.backend.bump()
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def _create_cache() -> ResponseCache:
+    ttl = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+    if os.getenv("RESPONSE_CACHE_BACKEND", "memory") == "redis":
+        url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        try:
+            return ResponseCache(RedisBackend(url, ttl=ttl), enabled=ttl > 0)
+        except ImportError:
+            print("⚠️  redis package not installed, using in-process response cache")
+    size = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+    return ResponseCache(MemoryBackend(max_entries=size, ttl=ttl), enabled=ttl > 0)
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = _create_cache()
+        return _cache
+
+
+def bump_generation():
+    """videos 內容改變後呼叫（掃描器 commit 之後）；快取不可用時靜默略過"""
+    try:
+        get_response_cache().bump_generation()
+    except Exception:  # noqa: BLE001 - 快取失效不可影響掃描
+        pass
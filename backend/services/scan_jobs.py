@@ -0,0 +1,237 @@
+"""
+Scan job queue for POST /api/v1/videos/scan
+
+- 固定大小的 worker pool（SCAN_JOB_WORKERS，預設 1），同時最多只跑這麼多個掃描
+- 相同參數且仍在排隊中的工作直接合併，回傳既有 job
+- 進度來自掃描器的 ScanStats，定期寫回 scan_jobs 表；API 重啟後仍可查詢歷史
+- 取消：排隊中直接取消；執行中則設定 cancel_event，掃描器在檔案之間停止
+
+假設單一 API process 管理掃描工作；啟動時仍為 queued / running 的紀錄會標記為 interrupted。
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.database.connection import SessionLocal
+from backend.models.schemas import ScanJob
+
+ACTIVE_STATUSES = ("queued", "running", "cancelling")
+PERSIST_INTERVAL_SECONDS = 2.0
+
+
+@dataclass
+class _Job:
+    id: uuid.UUID
+    directory: str
+    mode: str
+    options: dict
+    status: str = "queued"
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    stats: object = None
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    future: Optional[Future] = None
+    last_persist: float = 0.0
+
+    @property
+    def key(self) -> Tuple:
+        return (self.directory, self.mode, tuple(sorted(self.options.items())))
+
+    def progress(self) -> dict:
+        progress = self.stats.as_dict() if self.stats is not None else {}
+        if self.started_at is not None:
+            end = self.finished_at or datetime.utcnow()
+            elapsed = max(1e-6, (end - self.started_at).total_seconds())
+            progress["elapsed_seconds"] = round(elapsed, 3)
+            progress["files_per_second"] = round(progress.get("files_seen", 0) / elapsed, 3)
+            progress["mb_per_second"] = round(progress.get("bytes_hashed", 0) / (1024 * 1024) / elapsed, 3)
+        return progress
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": str(self.id),
+            "directory": self.directory,
+            "mode": self.mode,
+            "options": self.options,
+            "status": self.status,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "progress": self.progress(),
+            "error": self.error,
+        }
+
+
+def _row_to_dict(row: ScanJob) -> dict:
+    return {
+        "job_id": str(row.id),
+        "directory": row.directory,
+        "mode": row.mode,
+        "options": row.options or {},
+        "status": row.status,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "started_at": row.started_at.isoformat() if row.started_at else None,
+        "finished_at": row.finished_at.isoformat() if row.finished_at else None,
+        "progress": row.progress or {},
+        "error": row.error,
+    }
+
+
+class ScanJobManager:
+    def __init__(
+        self,
+        max_workers: int = int(os.getenv("SCAN_JOB_WORKERS", "1")),
+        session_factory: Callable = SessionLocal,
+        scan_func: Optional[Callable] = None,
+        recover: bool = True,
+    ):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="scan-job")
+        self._session_factory = session_factory
+        self._scan_func = scan_func
+        self._jobs: Dict[str, _Job] = {}
+        self._lock = threading.Lock()
+        if recover:
+            self._mark_interrupted()
+
+    # ---- public API ----
+
+    def submit(self, directory: str, mode: str = "incremental", **options) -> Tuple[dict, bool]:
+        """排入掃描工作；回傳 (job, deduplicated)"""
+        job = _Job(id=uuid.uuid4(), directory=str(Path(directory)), mode=mode, options=options)
+        with self._lock:
+            for existing in self._jobs.values():
+                if existing.status == "queued" and existing.key == job.key:
+                    return existing.to_dict(), True
+            self._jobs[str(job.id)] = job
+        self._persist(job, force=True)
+        job.future = self._executor.submit(self._run, job)
+        return job.to_dict(), False
+
+    def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(str(job_id))
+        if job is not None:
+            return job.to_dict()
+        db = self._session_factory()
+        try:
+            row = db.query(ScanJob).filter(ScanJob.id == uuid.UUID(str(job_id))).first()
+            return _row_to_dict(row) if row else None
+        finally:
+            db.close()
+
+    def list(self, limit: int = 20) -> List[dict]:
+        db = self._session_factory()
+        try:
+            rows = db.query(ScanJob).order_by(ScanJob.created_at.desc()).limit(limit).all()
+        finally:
+            db.close()
+        items = []
+        for row in rows:
+            job = self._jobs.get(str(row.id))
+            items.append(job.to_dict() if job is not None else _row_to_dict(row))
+        return items
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(str(job_id))
+        if job is None:
+            return self.get(job_id)
+        job.cancel_event.set()
+        if job.status == "queued" and job.future is not None and job.future.cancel():
+            self._finish(job, "cancelled")
+        elif job.status == "running":
+            job.status = "cancelling"
+            self._persist(job, force=True)
+        return job.to_dict()
+
+    def shutdown(self, wait: bool = False):
+        for job in list(self._jobs.values()):
+            job.cancel_event.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    # ---- internals ----
+
+    def _run(self, job: _Job):
+        if job.cancel_event.is_set():
+            self._finish(job, "cancelled")
+            return
+        scan_func = self._scan_func
+        if scan_func is None:
+            import scripts.scan_videos as sv  # type: ignore
+            scan_func = sv.scan_videos
+            job.stats = sv.ScanStats(cancel_event=job.cancel_event, on_progress=lambda _: self._persist(job))
+
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        self._persist(job, force=True)
+        try:
+            scan_func(directory=job.directory, mode=job.mode, stats=job.stats, **job.options)
+            self._finish(job, "cancelled" if job.cancel_event.is_set() else "completed")
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, "failed")
+
+    def _finish(self, job: _Job, status: str):
+        job.status = status
+        job.finished_at = datetime.utcnow()
+        self._persist(job, force=True)
+        with self._lock:
+            self._jobs.pop(str(job.id), None)
+
+    def _persist(self, job: _Job, force: bool = False):
+        """寫回 scan_jobs；執行中的進度最多每 PERSIST_INTERVAL_SECONDS 秒寫一次"""
+        now = time.monotonic()
+        if not force and now - job.last_persist < PERSIST_INTERVAL_SECONDS:
+            return
+        job.last_persist = now
+        db = self._session_factory()
+        try:
+            row = db.get(ScanJob, job.id) or ScanJob(id=job.id)
+            row.directory = job.directory
+            row.mode = job.mode
+            row.options = job.options
+            row.status = job.status
+            row.created_at = job.created_at
+            row.started_at = job.started_at
+            row.finished_at = job.finished_at
+            row.progress = job.progress()
+            row.error = job.error
+            db.add(row)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️  Could not persist scan job {job.id}: {e}")
+        finally:
+            db.close()
+
+    def _mark_interrupted(self):
+        db = self._session_factory()
+        try:
+            db.query(ScanJob).filter(ScanJob.status.in_(ACTIVE_STATUSES)).update(
+                {"status": "interrupted", "finished_at": datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️  Could not recover scan job history: {e}")
+        finally:
+            db.close()
+
+
+_manager: Optional[ScanJobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_scan_job_manager() -> ScanJobManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ScanJobManager()
+        return _manager
@@ -0,0 +1,155 @@
+"""
+Filesystem watcher for continuous incremental indexing
+
+監看影片資料夾，新檔或被修改的檔案在「寫入完成」後才交給掃描器：
+- 事件來源：watchdog（Linux 為 inotify、Windows 為 ReadDirectoryChangesW），未安裝時改用輪詢
+- 去抖動：檔案大小與 mtime 連續 settle_seconds 秒未變才視為寫入完成
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class StableFileTracker:
+    """追蹤有變動的檔案，直到大小 / mtime 穩定 settle_seconds 秒後才放行。
+
+    已放行過且 (size, mtime) 未變的檔案不會再次放行（例如掃描器自己讀檔觸發的 atime 事件）。
+    """
+
+    def __init__(self, settle_seconds: float = 5.0):
+        self.settle_seconds = settle_seconds
+        self._pending: Dict[str, Tuple[int, int, float]] = {}  # path -> (size, mtime_ns, last change)
+        self._released: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, path, now: Optional[float] = None):
+        """記錄一次變動事件（可由 watcher 執行緒呼叫）"""
+        with self._lock:
+            self._pending[str(path)] = (-1, -1, time.monotonic() if now is None else now)
+
+    def pop_ready(self, now: Optional[float] = None) -> List[Path]:
+        """回傳已穩定的檔案並自待處理清單移除；已被刪除的檔案直接丟棄"""
+        now = time.monotonic() if now is None else now
+        ready = []
+        with self._lock:
+            for path, (size, mtime_ns, changed_at) in list(self._pending.items()):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    del self._pending[path]
+                    continue
+                signature = (st.st_size, st.st_mtime_ns)
+                if self._released.get(path) == signature:
+                    del self._pending[path]
+                elif signature != (size, mtime_ns):
+                    self._pending[path] = (*signature, now)
+                elif now - changed_at >= self.settle_seconds:
+                    ready.append(Path(path))
+                    self._released[path] = signature
+                    del self._pending[path]
+        return ready
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+
+class PollingSnapshot:
+    """watchdog 不可用時的輪詢後備方案：每次比對整棵樹的 (size, mtime)，只 stat 不讀檔"""
+
+    def __init__(self, directory: Path, suffixes: Iterable[str]):
+        self.directory = Path(directory)
+        self.suffixes = {s.lower() for s in suffixes}
+        self._signatures = self._walk()
+
+    def _walk(self) -> Dict[str, Tuple[int, int]]:
+        signatures = {}
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if os.path.splitext(name)[1].lower() not in self.suffixes:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                signatures[path] = (st.st_size, st.st_mtime_ns)
+        return signatures
+
+    def changed_paths(self) -> List[str]:
+        current = self._walk()
+        changed = [p for p, sig in current.items() if self._signatures.get(p) != sig]
+        self._signatures = current
+        return changed
+
+
+def _start_watchdog(directory: Path, on_path: Callable[[str], None]):
+    """啟動 watchdog observer；未安裝 watchdog 時回傳 None"""
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class _Handler(FileSystemEventHandler):
+        EVENT_TYPES = {"created", "modified", "moved", "closed"}
+
+        def on_any_event(self, event):
+            if event.is_directory or event.event_type not in self.EVENT_TYPES:
+                return
+            on_path(getattr(event, "dest_path", None) or event.src_path)
+
+    observer = Observer()
+    observer.schedule(_Handler(), str(directory), recursive=True)
+    observer.start()
+    return observer
+
+
+def watch_directory(
+    directory: Path,
+    on_ready: Callable[[List[Path]], None],
+    suffixes: Iterable[str],
+    settle_seconds: float = 5.0,
+    poll_interval: float = 2.0,
+    force_polling: bool = False,
+    stop_event: Optional[threading.Event] = None,
+):
+    """阻塞式監看迴圈；穩定的檔案批次交給 on_ready。stop_event 被設定或 Ctrl+C 時結束。"""
+    suffixes = {s.lower() for s in suffixes}
+    stop_event = stop_event or threading.Event()
+    tracker = StableFileTracker(settle_seconds)
+
+    def on_path(path: str):
+        if os.path.splitext(path)[1].lower() in suffixes:
+            tracker.touch(path)
+
+    observer = None if force_polling else _start_watchdog(directory, on_path)
+    snapshot = None
+    if observer is None:
+        snapshot = PollingSnapshot(directory, suffixes)
+        print(f"👀 Watching {directory} (polling every {poll_interval:.0f}s)")
+    else:
+        print(f"👀 Watching {directory} (filesystem events)")
+    interval = poll_interval if snapshot is not None else min(1.0, max(0.1, settle_seconds / 2))
+
+    try:
+        while not stop_event.is_set():
+            if snapshot is not None:
+                for path in snapshot.changed_paths():
+                    tracker.touch(path)
+            ready = tracker.pop_ready()
+            if ready:
+                try:
+                    on_ready(ready)
+                except Exception as e:
+                    print(f"❌ Indexing failed for {len(ready)} file(s): {e}")
+            stop_event.wait(interval)
+    except KeyboardInterrupt:
+        print("\n🛑 Watch stopped")
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
@@ -0,0 +1,111 @@
+"""
+Stat fingerprint cache for the video scanner
+
+以 (resolved path, size, mtime_ns, inode) 作為檔案指紋，對應到已計算過的 file_hash
+與 quick_hash（tier-1 取樣指紋），存放於本機 sqlite 檔。incremental 掃描時只要 stat()
+結果未變，就能直接取得 hash，不必重新讀取整個檔案。
+
+快取可隨時刪除重建；表結構不符時會自動重建。
+"""
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+DEFAULT_CACHE_PATH = os.getenv("SCAN_CACHE_PATH", "output/scan_cache/fingerprints.sqlite")
+
+Fingerprint = Tuple[str, int, int, int]  # (resolved path, size, mtime_ns, inode)
+
+
+class CachedHashes(NamedTuple):
+    file_hash: Optional[str]
+    quick_hash: Optional[str]
+
+
+def stat_fingerprint(file_path) -> Tuple[Fingerprint, os.stat_result]:
+    """回傳檔案指紋與 stat 結果（只呼叫一次 stat）"""
+    resolved = str(Path(file_path).resolve())
+    st = os.stat(resolved)
+    return (resolved, st.st_size, st.st_mtime_ns, st.st_ino), st
+
+
+class FingerprintCache:
+    """sqlite 指紋快取。
+
+    開啟時把整張表載入記憶體，查詢為 dict lookup；寫入先暫存，
+    每 flush_every 筆或 close() 時批次寫回。
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, flush_every: int = 500):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self._conn = sqlite3.connect(str(self.path))
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(fingerprints)")}
+        if columns and "quick_hash" not in columns:
+            self._conn.execute("DROP TABLE fingerprints")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                file_hash TEXT,
+                quick_hash TEXT,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        self._entries: Dict[str, Tuple[int, int, int, CachedHashes]] = {
+            row[0]: (row[1], row[2], row[3], CachedHashes(row[4], row[5]))
+            for row in self._conn.execute(
+                "SELECT path, size, mtime_ns, inode, file_hash, quick_hash FROM fingerprints"
+            )
+        }
+        self._pending: List[tuple] = []
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fingerprint: Fingerprint) -> Optional[CachedHashes]:
+        """指紋完全相符時回傳快取的 (file_hash, quick_hash)，否則回傳 None"""
+        path, size, mtime_ns, inode = fingerprint
+        entry = self._entries.get(path)
+        if entry is not None and entry[:3] == (size, mtime_ns, inode):
+            self.hits += 1
+            return entry[3]
+        self.misses += 1
+        return None
+
+    def put(self, fingerprint: Fingerprint, file_hash: Optional[str], quick_hash: Optional[str] = None):
+        path, size, mtime_ns, inode = fingerprint
+        self._entries[path] = (size, mtime_ns, inode, CachedHashes(file_hash, quick_hash))
+        self._pending.append((path, size, mtime_ns, inode, file_hash, quick_hash, time.time()))
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO fingerprints (path, size, mtime_ns, inode, file_hash, quick_hash, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._pending,
+        )
+        self._conn.commit()
+        self._pending.clear()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
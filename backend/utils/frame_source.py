@@ -0,0 +1,141 @@
+"""
+Frame sources for pose extraction
+
+cv2.VideoCapture 解出原始解析度（手機 4K）的 BGR 畫面，之後才 cv2.resize + cvtColor 成模型要的 RGB 小圖，
+每幀要搬好幾次大圖。FfmpegFrameSource 改由 ffmpeg 子程序解碼：
+- -vf scale 在解碼端直接縮到 target_width（flags=area，對應 cv2.INTER_AREA），縮放與轉 rgb24 在同一步完成
+- rawvideo 經 pipe 讀進預先配置、輪流重用的 NumPy buffer（readinto，不另外配置 bytes）
+- 可選 -threads（解碼執行緒數）與 every（framestep：每 every 幀只輸出一幀，跳過的幀不縮放、不經 pipe）
+
+影片資訊（fps / 解析度，含旋轉）取自 media_probe，不需要 ffprobe；frame number 與 cv2 路徑一致（從 1 起算），
+timestamp 以 (frame_number - 1) / fps 計算，對固定幀率的影片與 cv2 的 CAP_PROP_POS_MSEC 相同。
+fps 使用容器的精確幀率（例如 30000/1001），不可取整數：29.97 fps 當成 29 時 timestamp 與 resume 的 -ss 會漂移約 3%。
+"""
+
+import shutil
+import subprocess
+from fractions import Fraction
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from backend.utils.media_probe import probe_video
+
+DECODERS = ("cv2", "ffmpeg")
+
+
+def ffmpeg_available() -> bool:
+    try:
+        import ffmpeg  # noqa: F401
+    except ImportError:
+        return False
+    return shutil.which("ffmpeg") is not None
+
+
+def scaled_size(width: int, height: int, target_width: int) -> Tuple[int, int]:
+    """與 cv2 路徑相同的縮放規則：只縮小、保持長寬比、取整數"""
+    if target_width and width > target_width:
+        scale = target_width / width
+        return int(width * scale), int(height * scale)
+    return width, height
+
+
+def video_geometry(path: str) -> Tuple[Fraction, int, int]:
+    """(frame_rate, width, height)：先解析容器標頭，不支援的格式改用 cv2（CAP_PROP_FPS 轉為有理數）"""
+    info = probe_video(path)
+    if info is not None and info["frame_rate"] > 0:
+        return info["frame_rate"], info["width"], info["height"]
+
+    import cv2
+
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise RuntimeError(f"Cannot open video: {path}")
+        return (
+            Fraction(cap.get(cv2.CAP_PROP_FPS) or 30.0).limit_denominator(100000),
+            int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        )
+    finally:
+        cap.release()
+
+
+def seek_time(frame_index: int, frame_rate: Fraction) -> str:
+    """第 frame_index 幀（從 0 起算）的 -ss 參數：以精確幀率換算，四捨五入到微秒"""
+    return f"{float(frame_index / frame_rate):.6f}"
+
+
+class FfmpegFrameSource:
+    """以 ffmpeg 子程序解碼並縮放，迭代產生 (frame_number, timestamp, RGB image)。
+
+    image 是 buffers 個輪流使用的 buffer 之一：同一時間仍被引用的幀數（例如 bounded queue 的長度）
+    必須少於 buffers，否則舊的幀會被覆寫；需要保留更久時請自行 copy()。
+    """
+
+    def __init__(self, path: str, target_width: int = 640, start_frame: int = 0, every: int = 1,
+                 threads: Optional[int] = None, buffers: int = 4):
+        self.path = path
+        self.frame_rate, self.source_width, self.source_height = video_geometry(path)
+        self.fps = float(self.frame_rate)
+        self.width, self.height = scaled_size(self.source_width, self.source_height, target_width)
+        self.start_frame = start_frame
+        self.every = max(1, every)
+        self.threads = threads
+        self._buffers = [np.empty((self.height, self.width, 3), dtype=np.uint8) for _ in range(max(2, buffers))]
+        self._proc: Optional[subprocess.Popen] = None
+
+    def command(self) -> List[str]:
+        import ffmpeg
+
+        input_options = {}
+        if self.start_frame:
+            input_options["ss"] = seek_time(self.start_frame, self.frame_rate)
+        if self.threads is not None:
+            input_options["threads"] = self.threads
+        stream = ffmpeg.input(self.path, **input_options)
+        if self.every > 1:
+            stream = stream.filter("framestep", step=self.every)
+        if (self.width, self.height) != (self.source_width, self.source_height):
+            stream = stream.filter("scale", self.width, self.height, flags="area")
+        stream = stream.output("pipe:", format="rawvideo", pix_fmt="rgb24", vsync="passthrough")
+        return stream.compile(cmd=["ffmpeg", "-v", "error", "-nostdin"])
+
+    def __iter__(self) -> Iterator[Tuple[int, float, np.ndarray]]:
+        # bufsize=0：直接 readinto 到 NumPy buffer，不經過 BufferedReader 的中間複製
+        self._proc = subprocess.Popen(self.command(), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+        frame_size = self.width * self.height * 3
+        frame_number = self.start_frame + 1
+        produced = 0
+        try:
+            while True:
+                image = self._buffers[produced % len(self._buffers)]
+                image.flags.writeable = True
+                view = memoryview(image.reshape(-1))
+                got = 0
+                while got < frame_size:
+                    n = self._proc.stdout.readinto(view[got:])
+                    if not n:
+                        break
+                    got += n
+                if got < frame_size:
+                    break
+                produced += 1
+                image.flags.writeable = False
+                yield frame_number, (frame_number - 1) / self.fps, image
+                frame_number += self.every
+            # 讀到 EOF：等 ffmpeg 自行結束
+            self._proc.stdout.close()
+            if self._proc.wait() != 0 and not produced:
+                raise RuntimeError(f"ffmpeg failed to decode {self.path} (exit code {self._proc.returncode})")
+        finally:
+            self.close()
+
+    def close(self):
+        """提前停止迭代時結束 ffmpeg 子程序"""
+        proc = self._proc
+        if proc is None or proc.returncode is not None:
+            return
+        proc.kill()
+        proc.wait()
+        proc.stdout.close()
@@ -0,0 +1,169 @@
+"""
+File hashing helpers for the video scanner
+
+- calculate_file_hash: 完整 SHA-256，可選擇讀檔策略：
+    readinto     重複使用同一塊大型 buffer（readinto + memoryview），不產生新的 bytes 物件
+    mmap         記憶體映射整個檔案後一次 update（hashlib 對大 buffer 會釋放 GIL）
+    file_digest  hashlib.file_digest（Python 3.11+）
+  'auto' 會在本機檔案上做一次小型 benchmark 挑出最快的策略，結果存於 HASH_STRATEGY_PATH。
+- calculate_quick_hash: tier-1 指紋，只讀取檔頭、檔尾與 N 個平均分布的區塊，
+  加上檔案大小一起做 SHA-256。用來快速確認「兩個檔案不同」；相同時仍需完整 hash 確認。
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+HASH_BUFFER_SIZE = 1024 * 1024  # 1 MiB，4 KiB 對齊
+HASH_STRATEGY_PATH = os.getenv("HASH_STRATEGY_PATH", "output/scan_cache/hash_strategy.json")
+QUICK_HASH_BLOCK_SIZE = 64 * 1024
+QUICK_HASH_SAMPLES = 8
+
+
+def quick_hash_offsets(size: int, samples: int = QUICK_HASH_SAMPLES, block_size: int = QUICK_HASH_BLOCK_SIZE):
+    """取樣區塊的起始位置：檔頭、N 個平均分布區塊、檔尾"""
+    last = size - block_size
+    offsets = [0] + [last * i // (samples + 1) for i in range(1, samples + 1)] + [last]
+    return sorted(set(offsets))
+
+
+def calculate_quick_hash(file_path: str, samples: int = QUICK_HASH_SAMPLES,
+                         block_size: int = QUICK_HASH_BLOCK_SIZE) -> str:
+    """計算 tier-1 取樣指紋（size + 取樣區塊的 SHA-256）。
+
+    檔案小於全部取樣量時直接讀整個檔案，此時結果等同完整內容比對。
+    """
+    size = os.path.getsize(file_path)
+    digest = hashlib.sha256(size.to_bytes(8, "little"))
+    with open(file_path, "rb") as f:
+        if size <= block_size * (samples + 2):
+            digest.update(f.read())
+        else:
+            for offset in quick_hash_offsets(size, samples, block_size):
+                f.seek(offset)
+                digest.update(f.read(block_size))
+    return digest.hexdigest()
+
+
+_buffers = threading.local()
+
+
+def _read_buffer(buffer_size: int) -> bytearray:
+    """每個執行緒重複使用同一塊 buffer，避免每個檔案重新配置 / 清零"""
+    buf = getattr(_buffers, "buf", None)
+    if buf is None or len(buf) != buffer_size:
+        buf = _buffers.buf = bytearray(buffer_size)
+    return buf
+
+
+def _hash_readinto(file_path: str, buffer_size: int = HASH_BUFFER_SIZE) -> str:
+    digest = hashlib.sha256()
+    buf = _read_buffer(buffer_size)
+    view = memoryview(buf)
+    with open(file_path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
+def _hash_mmap(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:  # mmap 不接受空檔
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            digest.update(mm)
+    return digest.hexdigest()
+
+
+def _hash_file_digest(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+HASH_STRATEGIES = {
+    "readinto": _hash_readinto,
+    "mmap": _hash_mmap,
+}
+if hasattr(hashlib, "file_digest"):
+    HASH_STRATEGIES["file_digest"] = _hash_file_digest
+
+_default_strategy: Optional[str] = None
+
+
+def set_default_strategy(strategy: str):
+    """設定 calculate_file_hash 預設策略（'auto' 會讀取已存的 benchmark 結果）"""
+    global _default_strategy
+    if strategy == "auto":
+        strategy = load_saved_strategy() or "readinto"
+    if strategy not in HASH_STRATEGIES:
+        raise ValueError(f"Unknown hash strategy: {strategy}")
+    _default_strategy = strategy
+
+
+def get_default_strategy() -> str:
+    if _default_strategy is None:
+        set_default_strategy(os.getenv("HASH_STRATEGY", "auto"))
+    return _default_strategy
+
+
+def calculate_file_hash(file_path: str, strategy: Optional[str] = None) -> str:
+    """計算檔案 SHA-256 hash"""
+    return HASH_STRATEGIES[strategy or get_default_strategy()](file_path)
+
+
+def benchmark_hash_strategies(paths: Iterable[str], strategies: Optional[Iterable[str]] = None,
+                              repeat: int = 1) -> Dict[str, float]:
+    """在指定檔案上量測各策略的吞吐量（MB/s）。
+
+    先完整讀過一次讓檔案進入 page cache，之後每個策略都在相同（熱快取）條件下比較，
+    量到的是各策略在 CPU / syscall 上的差異。
+    """
+    paths = [str(p) for p in paths]
+    total_bytes = sum(os.path.getsize(p) for p in paths) * repeat
+    for p in paths:
+        _hash_readinto(p)
+
+    results = {}
+    for name in strategies or HASH_STRATEGIES:
+        func = HASH_STRATEGIES[name]
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for p in paths:
+                func(p)
+        elapsed = max(1e-9, time.perf_counter() - t0)
+        results[name] = total_bytes / (1024 * 1024) / elapsed
+    return results
+
+
+def load_saved_strategy(path: str = HASH_STRATEGY_PATH) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            strategy = json.load(f).get("strategy")
+    except (OSError, ValueError):
+        return None
+    return strategy if strategy in HASH_STRATEGIES else None
+
+
+def select_fastest_strategy(paths: Iterable[str], save_path: Optional[str] = HASH_STRATEGY_PATH,
+                            repeat: int = 1) -> Tuple[str, Dict[str, float]]:
+    """benchmark 後選出最快的策略，設為預設並（選擇性）存檔供之後的掃描沿用。
+
+    回傳 (最快策略, 各策略 MB/s)。
+    """
+    results = benchmark_hash_strategies(paths, repeat=repeat)
+    fastest = max(results, key=results.get)
+    set_default_strategy(fastest)
+    if save_path:
+        Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(save_path, "w", encoding="utf-8") as f:
+            json.dump({"strategy": fastest, "mb_per_s": results, "measured_at": time.time()}, f, indent=2)
+    return fastest, results
@@ -0,0 +1,181 @@
+"""
+Binary landmark file (.lmk)
+
+取代 output/landmarks/*_landmarks.json：固定大小 header + 連續的定長 record，
+讀取端以 numpy.memmap 開啟，不需解析、不佔記憶體，切某段幀只是建立 view（zero copy）。
+
+檔案格式：
+- [0, HEADER_SIZE)：MAGIC + UTF-8 JSON metadata（video_path、fps、total_frames …），以空白補滿
+- 之後每幀一筆 RECORD_DTYPE（544 bytes，8-byte 對齊）：
+    landmarks   float32[33, 4]  x, y, z, visibility（visibility 缺值為 NaN）
+    timestamp   float64         秒
+    frame       int32           1-based frame number
+    flags       uint8           bit 0 = interpolated
+
+幀數由檔案大小推得：寫入中斷時只會少掉最後不完整的 record，前面的資料仍可讀。
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+MAGIC = b"BXLMK\x00\x01\n"
+HEADER_SIZE = 4096
+NUM_LANDMARKS = 33
+FLAG_INTERPOLATED = 1
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("landmarks", "<f4", (NUM_LANDMARKS, 4)),
+        ("timestamp", "<f8"),
+        ("frame", "<i4"),
+        ("flags", "u1"),
+        ("_pad", "u1", (3,)),
+    ]
+)
+LANDMARK_FIELDS = ("x", "y", "z", "visibility")
+
+PathLike = Union[str, Path]
+
+
+def _encode_header(meta: Dict) -> bytes:
+    body = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+    if len(MAGIC) + len(body) > HEADER_SIZE:
+        raise ValueError(f"landmark file metadata exceeds {HEADER_SIZE - len(MAGIC)} bytes")
+    return MAGIC + body.ljust(HEADER_SIZE - len(MAGIC), b" ")
+
+
+def landmarks_to_array(lm_list: List[Dict]) -> np.ndarray:
+    """[{"x","y","z","visibility"}, ...] → float32[33, 4]"""
+    return np.array(
+        [[np.nan if lm.get(k) is None else lm[k] for k in LANDMARK_FIELDS] for lm in lm_list],
+        dtype=np.float32,
+    )
+
+
+class LandmarkWriter:
+    """依序寫入 record；每 chunk_size 幀寫出一次，close() 時更新 header 的 metadata。
+    resume_count：接續既有檔案，保留前 resume_count 筆 record、截掉之後的內容。
+    """
+
+    def __init__(self, path: PathLike, meta: Optional[Dict] = None, chunk_size: int = 256,
+                 resume_count: Optional[int] = None):
+        self.path = Path(path)
+        self.meta = dict(meta or {})
+        self.meta.update(format="lmk", version=1, num_landmarks=NUM_LANDMARKS)
+        self._buffer = np.zeros(max(1, chunk_size), dtype=RECORD_DTYPE)
+        self._pending = 0
+        if resume_count is not None:
+            self.count = resume_count
+            self._fh = open(self.path, "r+b")
+            self._fh.truncate(HEADER_SIZE + resume_count * RECORD_DTYPE.itemsize)
+            self._fh.seek(0, os.SEEK_END)
+        else:
+            self.count = 0
+            self._fh = open(self.path, "wb")
+            self._fh.write(_encode_header(self.meta))
+
+    def write(self, frame: int, timestamp: float, landmarks, interpolated: bool = False):
+        """landmarks：float32[33, 4] 或 pose_extract 的 list of dict"""
+        rec = self._buffer[self._pending]
+        rec["landmarks"] = landmarks if isinstance(landmarks, np.ndarray) else landmarks_to_array(landmarks)
+        rec["timestamp"] = timestamp
+        rec["frame"] = frame
+        rec["flags"] = FLAG_INTERPOLATED if interpolated else 0
+        self._pending += 1
+        self.count += 1
+        if self._pending == len(self._buffer):
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._fh.write(self._buffer[: self._pending].tobytes())
+            self._pending = 0
+        self._fh.flush()
+
+    def close(self, **meta):
+        if self._fh.closed:
+            return
+        self.flush()
+        self.meta.update(meta)
+        self._fh.seek(0)
+        self._fh.write(_encode_header(self.meta))
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_landmark_file(path: PathLike, frames: Iterable[Dict], meta: Optional[Dict] = None) -> int:
+    """把 {"frame", "timestamp", "landmarks", "interpolated"} 序列寫成 .lmk，回傳幀數"""
+    with LandmarkWriter(path, meta) as writer:
+        for fd in frames:
+            writer.write(fd["frame"], fd["timestamp"], fd["landmarks"], fd.get("interpolated", False))
+        return writer.count
+
+
+class LandmarkFile:
+    """以 memmap 開啟 .lmk；所有屬性與 slice_frames() 回傳的都是檔案上的 view"""
+
+    def __init__(self, path: PathLike):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+            raise ValueError(f"Not a landmark file: {self.path}")
+        self.meta: Dict = json.loads(header[len(MAGIC):].decode("utf-8"))
+        count = (os.path.getsize(self.path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if count:
+            self.records = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def landmarks(self) -> np.ndarray:
+        """float32[N, 33, 4]"""
+        return self.records["landmarks"]
+
+    @property
+    def frames(self) -> np.ndarray:
+        return self.records["frame"]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.records["timestamp"]
+
+    @property
+    def interpolated(self) -> np.ndarray:
+        return (self.records["flags"] & FLAG_INTERPOLATED).astype(bool)
+
+    def slice_frames(self, start: int, end: int) -> np.ndarray:
+        """frame number 在 [start, end) 的 records（frame 遞增，二分搜尋定位）"""
+        frames = self.frames
+        lo, hi = np.searchsorted(frames, [start, end])
+        return self.records[lo:hi]
+
+    def to_frame_dicts(self) -> List[Dict]:
+        """轉回 JSON 格式的 per-frame dict（相容舊的分析程式）"""
+        out = []
+        for rec in self.records:
+            lms = [
+                {k: (None if np.isnan(v) else float(v)) for k, v in zip(LANDMARK_FIELDS, row)}
+                for row in rec["landmarks"]
+            ]
+            out.append(
+                {
+                    "frame": int(rec["frame"]),
+                    "timestamp": float(rec["timestamp"]),
+                    "landmarks": lms,
+                    "interpolated": bool(rec["flags"] & FLAG_INTERPOLATED),
+                }
+            )
+        return out
@@ -0,0 +1,267 @@
+"""
+Lightweight container probe for video metadata
+
+直接解析容器標頭取得 fps / 總幀數 / 解析度，不建立解碼器：
+- MP4 / MOV（ISO BMFF）：moov → trak(vide) → tkhd / mdhd / stsd / stts / stsz
+- AVI（RIFF）：hdrl → avih / strl(vids) → strh / strf
+
+只讀取 box 標頭與 moov 本身，網路磁碟上比 cv2.VideoCapture 快很多。
+回傳格式與 scan_videos.extract_video_info 相同；不支援的容器（例如 fragmented MP4）
+或解析失敗時回傳 None，由呼叫端改用 cv2。
+
+數值對齊 OpenCV（FFmpeg backend）的行為：
+- fps = 取樣數 / 軌道長度（avg_frame_rate），取整數；frame_rate 保留精確的有理數（例如 30000/1001），
+  供需要精確時間軸的呼叫端（frame_source 的 timestamp、seek、輸出影片幀率）使用
+- total_frames = stsz 的 sample_count
+- 有 90° / 270° 旋轉矩陣時寬高對調（OpenCV 預設 auto-rotate）
+"""
+
+import math
+import os
+import struct
+from fractions import Fraction
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+MP4_SUFFIXES = {'.mp4', '.mov', '.m4v', '.3gp'}
+AVI_SUFFIXES = {'.avi'}
+
+# moov 以外的大型 box 直接跳過；moov 超過此大小視為異常，交給 cv2
+MAX_MOOV_BYTES = 64 * 1024 * 1024
+
+_CONTAINER_BOXES = {b'trak', b'mdia', b'minf', b'stbl', b'edts'}
+
+
+def _build_info(fps: Fraction, total_frames: int, width: int, height: int) -> dict:
+    info = {
+        'fps': int(fps),
+        'frame_rate': fps,
+        'total_frames': int(total_frames),
+        'width': int(width),
+        'height': int(height),
+    }
+    info['duration_seconds'] = info['total_frames'] / info['fps'] if info['fps'] > 0 else 0
+    info['resolution'] = f"{info['width']}x{info['height']}"
+    return info
+
+
+# ---- ISO BMFF (MP4 / MOV) ----
+
+def _iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[bytes, int, int]]:
+    """逐一回傳 (type, payload_start, box_end)"""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                return
+            size = struct.unpack_from('>Q', data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            return
+        yield box_type, pos + header, pos + size
+        pos += size
+
+
+def _find_box(data: bytes, start: int, end: int, box_type: bytes) -> Optional[Tuple[int, int]]:
+    for t, payload, box_end in _iter_boxes(data, start, end):
+        if t == box_type:
+            return payload, box_end
+    return None
+
+
+def _find_path(data: bytes, start: int, end: int, *path: bytes) -> Optional[Tuple[int, int]]:
+    span = (start, end)
+    for box_type in path:
+        span = _find_box(data, span[0], span[1], box_type)
+        if span is None:
+            return None
+    return span
+
+
+def _read_moov(f: BinaryIO, file_size: int) -> Optional[bytes]:
+    """掃描頂層 box，只讀取 moov 的內容（moov 可能在檔尾）"""
+    pos = 0
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        header = f.read(16)
+        if len(header) < 8:
+            return None
+        size, box_type = struct.unpack_from('>I4s', header, 0)
+        header_size = 8
+        if size == 1:
+            if len(header) < 16:
+                return None
+            size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - pos
+        if size < header_size:
+            return None
+        if box_type == b'moov':
+            if size > MAX_MOOV_BYTES:
+                return None
+            f.seek(pos + header_size)
+            data = f.read(size - header_size)
+            return data if len(data) == size - header_size else None
+        pos += size
+    return None
+
+
+def _tkhd_rotation(data: bytes, payload: int) -> int:
+    """由 tkhd 的 display matrix 推算旋轉角度（0 / 90 / 180 / 270）"""
+    version = data[payload]
+    matrix_offset = payload + 4 + (32 if version == 1 else 20) + 16
+    a, b = struct.unpack_from('>ii', data, matrix_offset)
+    if a == 0 and b == 0:
+        return 0
+    return int(round(math.degrees(math.atan2(b, a)))) % 360
+
+
+def _mdhd_timescale_duration(data: bytes, payload: int) -> Tuple[int, int]:
+    version = data[payload]
+    if version == 1:
+        return struct.unpack_from('>IQ', data, payload + 4 + 16)
+    return struct.unpack_from('>II', data, payload + 4 + 8)
+
+
+def _stts_totals(data: bytes, payload: int) -> Tuple[int, int]:
+    """回傳 (sample 數, 總長度 in timescale units)"""
+    entry_count = struct.unpack_from('>I', data, payload + 4)[0]
+    samples = duration = 0
+    offset = payload + 8
+    for _ in range(entry_count):
+        count, delta = struct.unpack_from('>II', data, offset)
+        samples += count
+        duration += count * delta
+        offset += 8
+    return samples, duration
+
+
+def _stsd_dimensions(data: bytes, payload: int, end: int) -> Optional[Tuple[int, int]]:
+    """第一個 visual sample entry 的 coded width / height"""
+    entries = _iter_boxes(data, payload + 8, end)
+    for _, entry_payload, _ in entries:
+        # 6 reserved + 2 data_reference_index + 16 pre_defined/reserved
+        return struct.unpack_from('>HH', data, entry_payload + 24)
+    return None
+
+
+def _probe_video_trak(data: bytes, start: int, end: int) -> Optional[dict]:
+    hdlr = _find_path(data, start, end, b'mdia', b'hdlr')
+    if hdlr is None or data[hdlr[0] + 8:hdlr[0] + 12] != b'vide':
+        return None
+
+    mdhd = _find_path(data, start, end, b'mdia', b'mdhd')
+    stbl = _find_path(data, start, end, b'mdia', b'minf', b'stbl')
+    if mdhd is None or stbl is None:
+        return None
+    timescale, _ = _mdhd_timescale_duration(data, mdhd[0])
+
+    stts = _find_box(data, stbl[0], stbl[1], b'stts')
+    stsz = _find_box(data, stbl[0], stbl[1], b'stsz') or _find_box(data, stbl[0], stbl[1], b'stz2')
+    if stts is None or stsz is None or timescale == 0:
+        return None
+    sample_count = struct.unpack_from('>I', data, stsz[0] + 8)[0]
+    stts_samples, stts_duration = _stts_totals(data, stts[0])
+    if sample_count == 0 or stts_duration == 0:
+        return None  # fragmented MP4：樣本在 moof 裡
+    fps = Fraction(stts_samples * timescale, stts_duration)
+
+    dims = None
+    stsd = _find_box(data, stbl[0], stbl[1], b'stsd')
+    if stsd is not None:
+        dims = _stsd_dimensions(data, stsd[0], stsd[1])
+    tkhd = _find_box(data, start, end, b'tkhd')
+    rotation = _tkhd_rotation(data, tkhd[0]) if tkhd is not None else 0
+    if not dims or 0 in dims:
+        if tkhd is None:
+            return None
+        version = data[tkhd[0]]
+        size_offset = tkhd[0] + 4 + (32 if version == 1 else 20) + 16 + 36
+        w, h = struct.unpack_from('>II', data, size_offset)
+        dims = (w >> 16, h >> 16)
+
+    width, height = dims
+    if rotation in (90, 270):
+        width, height = height, width
+    return _build_info(fps, sample_count, width, height)
+
+
+def probe_mp4(f: BinaryIO, file_size: int) -> Optional[dict]:
+    moov = _read_moov(f, file_size)
+    if moov is None:
+        return None
+    for box_type, payload, box_end in _iter_boxes(moov):
+        if box_type == b'trak':
+            info = _probe_video_trak(moov, payload, box_end)
+            if info is not None:
+                return info
+    return None
+
+
+# ---- RIFF (AVI) ----
+
+def _iter_chunks(data: bytes, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    pos = start
+    while pos + 8 <= end:
+        chunk_id, size = struct.unpack_from('<4sI', data, pos)
+        payload = pos + 8
+        if payload + size > end:
+            size = end - payload
+        yield chunk_id, payload, payload + size
+        pos = payload + size + (size & 1)
+
+
+def probe_avi(f: BinaryIO, file_size: int) -> Optional[dict]:
+    head = f.read(12)
+    if len(head) < 12 or head[:4] != b'RIFF' or head[8:12] != b'AVI ':
+        return None
+    list_header = f.read(12)
+    if len(list_header) < 12 or list_header[:4] != b'LIST' or list_header[8:12] != b'hdrl':
+        return None
+    hdrl_size = struct.unpack_from('<I', list_header, 4)[0]
+    if hdrl_size > MAX_MOOV_BYTES:
+        return None
+    hdrl = f.read(hdrl_size - 4)
+
+    width = height = 0
+    for chunk_id, payload, end in _iter_chunks(hdrl, 0, len(hdrl)):
+        if chunk_id == b'avih' and end - payload >= 40:
+            width, height = struct.unpack_from('<II', hdrl, payload + 32)
+        elif chunk_id == b'LIST' and hdrl[payload:payload + 4] == b'strl':
+            strh = strf = None
+            for sub_id, sub_payload, sub_end in _iter_chunks(hdrl, payload + 4, end):
+                if sub_id == b'strh':
+                    strh = sub_payload
+                elif sub_id == b'strf':
+                    strf = sub_payload
+            if strh is None or hdrl[strh:strh + 4] != b'vids':
+                continue
+            scale, rate, _, length = struct.unpack_from('<IIII', hdrl, strh + 20)
+            if scale == 0 or rate == 0:
+                return None
+            if strf is not None:
+                width, bi_height = struct.unpack_from('<ii', hdrl, strf + 4)
+                height = abs(bi_height)
+            return _build_info(Fraction(rate, scale), length, width, height)
+    return None
+
+
+def probe_video(file_path) -> Optional[dict]:
+    """解析容器標頭取得影片資訊；不支援或解析失敗時回傳 None"""
+    suffix = os.path.splitext(str(file_path))[1].lower()
+    if suffix in MP4_SUFFIXES:
+        parser = probe_mp4
+    elif suffix in AVI_SUFFIXES:
+        parser = probe_avi
+    else:
+        return None
+    try:
+        with open(file_path, 'rb') as f:
+            return parser(f, os.fstat(f.fileno()).st_size)
+    except (OSError, struct.error, IndexError):
+        return None
@@ -0,0 +1,153 @@
+"""
+Perceptual video hash + near-duplicate index
+
+- compute_video_phash：以 videohash 產生 64-bit 感知雜湊（16 位 hex），
+  重新編碼、改解析度或頭尾略剪的同一段影片，雜湊只差少數幾個 bit
+- HammingIndex：multi-index hashing，查詢「距離 ≤ d 的影片」不必兩兩比對
+- group_near_duplicates：整批分群（報表用）
+
+videohash 需要系統上有 ffmpeg；未安裝 videohash 時 phash_available() 為 False，掃描器會略過這個階段。
+"""
+
+import os
+import shutil
+import tempfile
+from itertools import combinations
+from typing import Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+PHASH_BITS = 64
+# videohash 的 is_similar 門檻：差異 ≤ 15% bits
+NEAR_DUPLICATE_MAX_DISTANCE = int(PHASH_BITS * 0.15)
+# 每秒擷取的幀數；所有雜湊必須用同一個值才能互相比較
+PHASH_FRAME_INTERVAL = 1
+
+T = TypeVar("T")
+
+
+def phash_available() -> bool:
+    try:
+        import videohash  # noqa: F401
+    except ImportError:
+        return False
+    return shutil.which("ffmpeg") is not None
+
+
+def compute_video_phash(file_path: str) -> str:
+    """計算影片的 64-bit 感知雜湊，回傳 16 位 hex 字串"""
+    from PIL import Image
+    from videohash import VideoHash
+
+    if not hasattr(Image, "ANTIALIAS"):
+        # videohash 3.0.1 仍使用 Pillow 10 已移除的 Image.ANTIALIAS（等同 LANCZOS）
+        Image.ANTIALIAS = Image.LANCZOS
+
+    storage = tempfile.mkdtemp(prefix="phash_")
+    try:
+        # videohash 以結尾的路徑分隔符判斷是否為資料夾；每次用獨立暫存目錄，平行計算時互不干擾
+        vh = VideoHash(path=str(file_path), storage_path=os.path.join(storage, ""),
+                       frame_interval=PHASH_FRAME_INTERVAL)
+        return f"{int(vh.hash, 2):016x}"
+    finally:
+        shutil.rmtree(storage, ignore_errors=True)
+
+
+def phash_to_int(phash: str) -> int:
+    return int(phash, 16)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _masks_within(bits: int, radius: int) -> List[int]:
+    """所有 popcount ≤ radius 的 bits-bit 遮罩"""
+    masks = [0]
+    for r in range(1, radius + 1):
+        masks.extend(sum(1 << b for b in combo) for combo in combinations(range(bits), r))
+    return masks
+
+
+class HammingIndex(Generic[T]):
+    """Multi-index hashing（依 Hamming distance 的 LSH，結果為精確解）。
+
+    64-bit 雜湊切成 chunks 段，每段一張 dict。鴿籠原理：距離 ≤ max_distance 的兩個雜湊，
+    至少有一段的差異 ≤ max_distance // chunks，因此查詢只需在每張表查這個半徑內的鄰近 key，
+    再對候選逐一驗證距離。10 萬筆時每次查詢約 1–2 ms，不隨資料量線性成長。
+    （BK-tree 在 64-bit、半徑 9 的情況下幾乎要走訪整棵樹，比線性掃描還慢）
+    """
+
+    def __init__(self, items: Iterable[Tuple[int, T]] = (), max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE,
+                 chunks: int = 4):
+        self.max_distance = max_distance
+        self.chunks = chunks
+        self._chunk_bits = PHASH_BITS // chunks
+        self._chunk_mask = (1 << self._chunk_bits) - 1
+        self._probe_masks = _masks_within(self._chunk_bits, max_distance // chunks)
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(chunks)]
+        self._values: List[int] = []
+        self._items: List[T] = []
+        for value, item in items:
+            self.add(value, item)
+
+    def __len__(self):
+        return len(self._items)
+
+    def _chunk(self, value: int, i: int) -> int:
+        return (value >> (i * self._chunk_bits)) & self._chunk_mask
+
+    def add(self, value: int, item: T):
+        idx = len(self._items)
+        self._values.append(value)
+        self._items.append(item)
+        for i, table in enumerate(self._tables):
+            table.setdefault(self._chunk(value, i), []).append(idx)
+
+    def _candidates(self, value: int) -> Iterable[int]:
+        seen = set()
+        for i, table in enumerate(self._tables):
+            key = self._chunk(value, i)
+            for mask in self._probe_masks:
+                bucket = table.get(key ^ mask)
+                if bucket:
+                    seen.update(bucket)
+        return seen
+
+    def search(self, value: int, max_distance: Optional[int] = None) -> List[Tuple[int, T]]:
+        """回傳所有距離 ≤ max_distance 的 (distance, item)，依距離排序"""
+        max_distance = self.max_distance if max_distance is None else max_distance
+        if max_distance > self.max_distance:
+            candidates: Iterable[int] = range(len(self._values))  # 超出建索引時的半徑：退回線性掃描
+        else:
+            candidates = self._candidates(value)
+        results = []
+        for idx in candidates:
+            d = hamming_distance(value, self._values[idx])
+            if d <= max_distance:
+                results.append((d, self._items[idx]))
+        results.sort(key=lambda r: r[0])
+        return results
+
+
+def group_near_duplicates(items: Iterable[Tuple[int, T]],
+                          max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE) -> List[List[T]]:
+    """把距離 ≤ max_distance 的項目連成群組（union-find），只回傳 ≥ 2 個項目的群組"""
+    items = list(items)
+    index: HammingIndex[int] = HammingIndex(((value, i) for i, (value, _) in enumerate(items)), max_distance)
+    parent = list(range(len(items)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, (value, _) in enumerate(items):
+        for _, j in index.search(value):
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[rj] = ri
+
+    groups: Dict[int, List[T]] = {}
+    for i, (_, item) in enumerate(items):
+        groups.setdefault(find(i), []).append(item)
+    return [g for g in groups.values() if len(g) > 1]
@@ -0,0 +1,96 @@
+"""
+ROI tracking for pose extraction
+
+整張畫面縮到 target_width 再推論時，拳手常只佔畫面一小塊。ROI 模式改為：
+- 以上一幀的 landmarks 取外接框、加 padding 成正方形，從原始解析度的畫面裁切後推論
+  （像素更少，但拳手的有效解析度更高）
+- 推論結果從裁切座標換回整張畫面的正規化座標
+- 框只有在人快要超出內側邊界時才重新置中，框固定時 MediaPipe 內部的追蹤與平滑較穩定
+- 裁切內找不到人時回到整張畫面重新偵測
+
+座標皆為 MediaPipe 的正規化座標（0–1）；ROI 為整數像素 (x0, y0, x1, y1)，x1 / y1 不含。
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+Landmarks = List[Dict[str, Optional[float]]]
+Roi = Tuple[int, int, int, int]
+
+
+def landmark_bounds(landmarks: Landmarks) -> Tuple[float, float, float, float]:
+    """landmarks 的外接框 (x0, y0, x1, y1)，正規化座標、裁到 [0, 1]"""
+    xs = [min(1.0, max(0.0, lm["x"])) for lm in landmarks]
+    ys = [min(1.0, max(0.0, lm["y"])) for lm in landmarks]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def roi_from_landmarks(landmarks: Landmarks, frame_w: int, frame_h: int, padding: float = 0.3,
+                       min_size: float = 0.2) -> Roi:
+    """外接框四周各加 padding（相對框的長邊）後取正方形，不小於畫面短邊的 min_size，並移進畫面內"""
+    x0, y0, x1, y1 = landmark_bounds(landmarks)
+    cx, cy = (x0 + x1) / 2 * frame_w, (y0 + y1) / 2 * frame_h
+    side = max((x1 - x0) * frame_w, (y1 - y0) * frame_h) * (1 + 2 * padding)
+    side = min(max(side, min_size * min(frame_w, frame_h)), max(frame_w, frame_h))
+
+    def span(center: float, limit: int) -> Tuple[int, int]:
+        lo = int(round(center - side / 2))
+        hi = int(round(center + side / 2))
+        if lo < 0:
+            lo, hi = 0, hi - lo
+        if hi > limit:
+            lo, hi = max(0, lo - (hi - limit)), limit
+        return lo, hi
+
+    rx0, rx1 = span(cx, frame_w)
+    ry0, ry1 = span(cy, frame_h)
+    return rx0, ry0, rx1, ry1
+
+
+def to_frame_coords(landmarks: Landmarks, roi: Roi, frame_w: int, frame_h: int) -> Landmarks:
+    """裁切影像上的正規化座標 → 整張畫面的正規化座標（z 與 x 同尺度，一併換算）"""
+    x0, y0, x1, y1 = roi
+    sx, sy = (x1 - x0) / frame_w, (y1 - y0) / frame_h
+    ox, oy = x0 / frame_w, y0 / frame_h
+    return [
+        {
+            "x": ox + lm["x"] * sx,
+            "y": oy + lm["y"] * sy,
+            "z": lm["z"] * sx,
+            "visibility": lm.get("visibility"),
+        }
+        for lm in landmarks
+    ]
+
+
+class RoiTracker:
+    """保存目前的裁切框；update() 只在 landmarks 外接框超出框內 margin 範圍時重新置中"""
+
+    def __init__(self, padding: float = 0.3, margin: float = 0.1, min_size: float = 0.2):
+        self.padding = padding
+        self.margin = margin
+        self.min_size = min_size
+        self.roi: Optional[Roi] = None
+
+    def _inside(self, landmarks: Landmarks, frame_w: int, frame_h: int) -> bool:
+        x0, y0, x1, y1 = self.roi
+        mx, my = (x1 - x0) * self.margin, (y1 - y0) * self.margin
+        bx0, by0, bx1, by1 = landmark_bounds(landmarks)
+        return (
+            bx0 * frame_w >= x0 + mx or x0 == 0
+        ) and (
+            bx1 * frame_w <= x1 - mx or x1 == frame_w
+        ) and (
+            by0 * frame_h >= y0 + my or y0 == 0
+        ) and (
+            by1 * frame_h <= y1 - my or y1 == frame_h
+        )
+
+    def update(self, landmarks: Landmarks, frame_w: int, frame_h: int) -> bool:
+        """以整張畫面座標的 landmarks 更新裁切框，回傳框是否改變"""
+        if self.roi is not None and self._inside(landmarks, frame_w, frame_h):
+            return False
+        self.roi = roi_from_landmarks(landmarks, frame_w, frame_h, self.padding, self.min_size)
+        return True
+
+    def lost(self):
+        self.roi = None
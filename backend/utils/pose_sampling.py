@@ -0,0 +1,74 @@
+"""
+Frame sampling for pose extraction
+
+只對部分幀執行 pose 模型，其餘幀以前後兩個推論幀的 landmarks 線性內插：
+- 固定 stride：每 N 幀推論一次
+- adaptive stride：手肘 / 手腕移動慢時逐步拉大間隔（最多 max_stride），
+  速度突增（出拳）時立刻回到每幀推論
+
+landmarks 格式與 pose_extract_and_visualize 相同：33 個 {"x", "y", "z", "visibility"}。
+"""
+
+import math
+from typing import Dict, List, Optional
+
+Landmarks = List[Dict[str, Optional[float]]]
+
+MOTION_LANDMARKS = (13, 14, 15, 16)  # elbows, wrists
+# 每幀位移（正規化座標，1.0 = 畫面寬 / 高）
+HIGH_VELOCITY = 0.02
+LOW_VELOCITY = 0.006
+
+
+def interpolate_landmarks(a: Landmarks, b: Landmarks, t: float) -> Landmarks:
+    """a、b 之間的線性內插，t ∈ [0, 1]"""
+    out = []
+    for la, lb in zip(a, b):
+        point = {}
+        for key in ("x", "y", "z", "visibility"):
+            va, vb = la.get(key), lb.get(key)
+            point[key] = None if va is None or vb is None else va + (vb - va) * t
+        out.append(point)
+    return out
+
+
+def motion_velocity(a: Landmarks, b: Landmarks, frame_gap: int) -> float:
+    """手肘 / 手腕在兩個推論幀之間的最大每幀位移"""
+    if frame_gap <= 0:
+        return 0.0
+    moved = max(math.hypot(b[i]["x"] - a[i]["x"], b[i]["y"] - a[i]["y"]) for i in MOTION_LANDMARKS)
+    return moved / frame_gap
+
+
+class StrideSampler:
+    """決定哪些幀要執行 pose 模型（keyframe）。
+
+    每處理完一個 keyframe 呼叫 record()；adaptive 模式依手部速度調整下一個間隔：
+    低於 low_velocity 時加倍、高於 high_velocity 或偵測不到人時回到 1。
+    """
+
+    def __init__(self, stride: int = 1, adaptive: bool = False, max_stride: int = 4,
+                 high_velocity: float = HIGH_VELOCITY, low_velocity: float = LOW_VELOCITY):
+        self.adaptive = adaptive
+        self.max_stride = max(1, max_stride)
+        self.high_velocity = high_velocity
+        self.low_velocity = low_velocity
+        self.stride = 1 if adaptive else max(1, stride)
+        self._next_keyframe = 1
+        self._prev: Optional[tuple] = None  # (frame_number, landmarks)
+
+    def is_keyframe(self, frame_number: int) -> bool:
+        return frame_number >= self._next_keyframe
+
+    def record(self, frame_number: int, landmarks: Optional[Landmarks]):
+        if self.adaptive:
+            if landmarks is None or self._prev is None or self._prev[1] is None:
+                self.stride = 1
+            else:
+                velocity = motion_velocity(self._prev[1], landmarks, frame_number - self._prev[0])
+                if velocity > self.high_velocity:
+                    self.stride = 1
+                elif velocity < self.low_velocity:
+                    self.stride = min(self.max_stride, self.stride * 2)
+        self._prev = (frame_number, landmarks)
+        self._next_keyframe = frame_number + self.stride
@@ -0,0 +1,292 @@
+"""
+Batch pose extraction
+依 processing_status 與篩選條件選出 videos，分派給 N 個 worker process 擷取 pose landmarks。
+
+- 每個 worker 啟動時建立一個 MediaPipe Pose 並一直重用（免去每支影片重新 import / 載入模型）；
+  換下一支影片前 reset()，避免上一支影片的追蹤與平滑狀態帶到下一支
+- processing_status：pending → processing → completed / failed
+  領取時以條件式 UPDATE 標記為 processing，同時執行的其他批次不會重複處理；
+  中斷時尚未完成的影片還原為原本的狀態
+- 結束時回報整個 pool 的 frames/s
+- --checkpoint-every / --resume：長影片定期記錄 checkpoint，failed 的影片重跑時從上次的位置繼續
+- landmark 檔與 checkpoint 以 <檔名>_<video_id> 命名，不同資料夾的同名影片不會互相覆寫
+
+Usage examples (PowerShell):
+  python scripts/batch_pose_extract.py --workers 4 --db
+  python scripts/batch_pose_extract.py --status pending failed --location 拳擊基地 --limit 50 --save-json
+  python scripts/batch_pose_extract.py --date-from 2025-10-01 --dry-run
+  python scripts/batch_pose_extract.py --status failed --db --resume
+"""
+
+import os
+import sys
+import argparse
+import contextlib
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import update
+
+from backend.database.connection import SessionLocal
+from backend.models.schemas import Video
+from backend.services.response_cache import bump_generation
+
+CLAIM_CHUNK = 500
+
+# ---- worker process ----
+
+_pose = None
+_pose_used = False
+
+
+def _init_worker(model_complexity: int):
+    """Worker initializer：載入 mediapipe 並建立常駐的 Pose graph"""
+    global _pose
+    from scripts.pose_extract_and_visualize import create_pose
+
+    _pose = create_pose(model_complexity)
+
+
+def output_name(video_id, file_path: str) -> str:
+    """批次模式的輸出檔名：<影片檔名>_<video_id>"""
+    return f"{Path(file_path).stem}_{video_id}"
+
+
+def _process_video(video_id: str, file_path: str, model_complexity: int, save_json: bool,
+                   extract_options: Dict) -> dict:
+    """extract_options：直接傳給 extract_and_visualize 的參數（target_width、save_db、stride、roi …）"""
+    global _pose_used
+    from scripts.pose_extract_and_visualize import extract_and_visualize, make_checkpoint_path, make_output_paths
+
+    if _pose_used:
+        _pose.reset()
+    _pose_used = True
+
+    t0 = time.perf_counter()
+    result = {"video_id": video_id, "file_path": file_path, "pid": os.getpid()}
+    try:
+        # 不同資料夾常有同名影片（相機自動命名）：以 video_id 區分，避免 worker 互相覆寫輸出與 checkpoint
+        name = output_name(video_id, file_path)
+        _, json_out = make_output_paths(file_path, False, save_json, extract_options.get("landmark_format", "json"),
+                                        name=name)
+        if extract_options.get("checkpoint_every") or extract_options.get("resume"):
+            extract_options = dict(extract_options, checkpoint_path=make_checkpoint_path(file_path, name=name))
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary = extract_and_visualize(
+                file_path,
+                model_complexity=model_complexity,
+                out_json_path=json_out,
+                pose=_pose,
+                log_every=0,
+                **extract_options,
+            )
+        result.update(ok=True, frames=summary.total_frames, detected=summary.detected_frames,
+                      detection_rate=summary.detection_rate)
+    except Exception as e:
+        result.update(ok=False, frames=0, detected=0, error=str(e))
+    result["seconds"] = time.perf_counter() - t0
+    return result
+
+
+# ---- coordinator ----
+
+def select_videos(db, statuses: List[str], location: Optional[str] = None, training_type: Optional[str] = None,
+                  date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                  q: Optional[str] = None, limit: Optional[int] = None) -> List[tuple]:
+    """回傳符合條件的 (id, file_path, processing_status)"""
+    query = db.query(Video.id, Video.file_path, Video.processing_status).filter(
+        Video.processing_status.in_(statuses)
+    )
+    if location:
+        query = query.filter(Video.location == location)
+    if training_type:
+        query = query.filter(Video.training_type == training_type)
+    if date_from:
+        query = query.filter(Video.training_date >= date_from)
+    if date_to:
+        query = query.filter(Video.training_date <= date_to)
+    if q:
+        query = query.filter(Video.file_path.ilike(f"%{q}%"))
+    query = query.order_by(Video.upload_date, Video.id)
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+def claim_videos(db, rows: List[tuple], statuses: List[str]) -> Dict:
+    """把選到的影片標記為 processing；只有狀態仍在 statuses 內的才算領取成功。回傳 {id: 原狀態}"""
+    original = {vid: status for vid, _, status in rows}
+    claimed = {}
+    table = Video.__table__
+    ids = list(original)
+    for i in range(0, len(ids), CLAIM_CHUNK):
+        result = db.execute(
+            update(table)
+            .where(table.c.id.in_(ids[i:i + CLAIM_CHUNK]), table.c.processing_status.in_(statuses))
+            .values(processing_status="processing")
+            .returning(table.c.id)
+        )
+        for (vid,) in result:
+            claimed[vid] = original[vid]
+        db.commit()
+    if claimed:
+        bump_generation()  # GET /api/v1/videos 的快取失效（processing_status 已改變）
+    return claimed
+
+
+def set_status(db, video_id, status: str):
+    db.execute(update(Video.__table__).where(Video.__table__.c.id == video_id).values(processing_status=status))
+    db.commit()
+    bump_generation()
+
+
+def run_batch(rows: List[tuple], statuses: List[str], workers: int, model_complexity: int, save_json: bool,
+              extract_options: Optional[Dict] = None) -> dict:
+    db = SessionLocal()
+    claimed: Dict = {}
+    finished = set()
+    totals = {"videos": 0, "completed": 0, "failed": 0, "frames": 0, "detected": 0, "video_seconds": 0.0}
+    t0 = time.perf_counter()
+    try:
+        claimed = claim_videos(db, rows, statuses)
+        skipped = len(rows) - len(claimed)
+        if skipped:
+            print(f"⏭️  {skipped} videos were claimed by another run, skipping")
+        paths = {vid: file_path for vid, file_path, _ in rows if vid in claimed}
+        totals["videos"] = len(paths)
+        if not paths:
+            return totals
+        print(f"🚀 Processing {len(paths)} videos with {workers} workers")
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_complexity,)) as pool:
+            futures = {
+                pool.submit(_process_video, str(vid), file_path, model_complexity, save_json,
+                            extract_options or {}): vid
+                for vid, file_path in paths.items()
+            }
+            for done_count, fut in enumerate(as_completed(futures), start=1):
+                vid = futures[fut]
+                result = fut.result()
+                status = "completed" if result["ok"] else "failed"
+                set_status(db, vid, status)
+                finished.add(vid)
+                totals[status] += 1
+                totals["frames"] += result["frames"]
+                totals["detected"] += result["detected"]
+                totals["video_seconds"] += result["seconds"]
+                elapsed = max(1e-6, time.perf_counter() - t0)
+                name = Path(result["file_path"]).name
+                if result["ok"]:
+                    print(f"✅ [{done_count}/{len(paths)}] {name}: {result['frames']} frames, "
+                          f"det {result['detection_rate']:.1f}%, {result['frames'] / max(result['seconds'], 1e-6):.1f} fps "
+                          f"| pool {totals['frames'] / elapsed:.1f} fps")
+                else:
+                    print(f"❌ [{done_count}/{len(paths)}] {name}: {result['error']}")
+    except KeyboardInterrupt:
+        print("\n🛑 Interrupted")
+    finally:
+        # 尚未完成的影片還原為領取前的狀態，下次批次可再處理
+        for vid, original in claimed.items():
+            if vid not in finished:
+                set_status(db, vid, original)
+        db.close()
+    totals["wall_seconds"] = time.perf_counter() - t0
+    return totals
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    return datetime.strptime(value, "%Y-%m-%d") if value else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BoxTech batch pose extraction")
+    parser.add_argument("--workers", "-w", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Worker processes (each holds one warm MediaPipe Pose graph)")
+    parser.add_argument("--status", nargs="+", default=["pending"],
+                        help="processing_status values to pick up (e.g. pending failed)")
+    parser.add_argument("--location", type=str, default=None)
+    parser.add_argument("--training-type", type=str, default=None)
+    parser.add_argument("--date-from", type=str, default=None, help="training_date >= YYYY-MM-DD")
+    parser.add_argument("--date-to", type=str, default=None, help="training_date <= YYYY-MM-DD")
+    parser.add_argument("--q", type=str, default=None, help="file_path substring")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--target-width", type=int, default=640, help="Resize frame width for processing speed")
+    parser.add_argument("--model-complexity", type=int, default=0, choices=[0, 1, 2])
+    parser.add_argument("--stride", type=int, default=1, help="Run pose every N frames; frames in between are interpolated")
+    parser.add_argument("--adaptive-stride", action="store_true", help="Adjust stride to wrist/elbow motion")
+    parser.add_argument("--max-stride", type=int, default=4)
+    parser.add_argument("--save-json", action="store_true", help="Save landmarks to output/landmarks/<name>_<video_id>_landmarks.*")
+    parser.add_argument("--format", dest="landmark_format", choices=["json", "ndjson", "binary"], default="json",
+                        help="Landmark file format for --save-json")
+    parser.add_argument("--db", action="store_true", help="Save per-frame landmarks into pose_data")
+    parser.add_argument("--db-storage", choices=["rows", "segments"], default="rows",
+                        help="--db target: pose_data rows or packed pose_segments")
+    parser.add_argument("--roi", action="store_true", help="Run pose on a tracked full-resolution crop around the boxer")
+    parser.add_argument("--roi-width", type=int, default=384)
+    parser.add_argument("--decoder", choices=["cv2", "ffmpeg"], default="cv2",
+                        help="ffmpeg: scale and convert to RGB inside an ffmpeg subprocess")
+    parser.add_argument("--decode-threads", type=int, default=None, help="ffmpeg decoder threads per worker")
+    parser.add_argument("--decode-every", type=int, default=1, help="Only process every Nth frame")
+    parser.add_argument("--checkpoint-every", type=int, default=1800,
+                        help="Flush outputs and write a checkpoint every N frames (0 = off)")
+    parser.add_argument("--resume", action="store_true", help="Continue videos from their last checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the selected videos")
+    args = parser.parse_args()
+
+    print("🥊 BoxTech Batch Pose Extraction")
+    print("=" * 50)
+    db = SessionLocal()
+    try:
+        rows = select_videos(db, args.status, location=args.location, training_type=args.training_type,
+                             date_from=_parse_date(args.date_from), date_to=_parse_date(args.date_to),
+                             q=args.q, limit=args.limit)
+    finally:
+        db.close()
+    print(f"📹 Selected {len(rows)} videos (status in {args.status})")
+    if args.dry_run:
+        for _, file_path, status in rows:
+            print(f"   [{status}] {file_path}")
+        return
+    if not rows:
+        return
+
+    extract_options = {
+        "target_width": args.target_width,
+        "save_db": args.db,
+        "stride": args.stride,
+        "adaptive_stride": args.adaptive_stride,
+        "max_stride": args.max_stride,
+        "landmark_format": args.landmark_format,
+        "db_storage": args.db_storage,
+        "roi": args.roi,
+        "roi_width": args.roi_width,
+        "decoder": args.decoder,
+        "decode_threads": args.decode_threads,
+        "decode_every": args.decode_every,
+        "checkpoint_every": args.checkpoint_every,
+        "resume": args.resume,
+    }
+    totals = run_batch(rows, args.status, workers=args.workers, model_complexity=args.model_complexity,
+                       save_json=args.save_json, extract_options=extract_options)
+
+    wall = max(1e-6, totals.get("wall_seconds", 0.0))
+    print("\n" + "=" * 50)
+    print("📊 Batch Summary")
+    print(f"   Videos: {totals['videos']} (completed {totals['completed']}, failed {totals['failed']})")
+    print(f"   Frames: {totals['frames']} (detected {totals['detected']})")
+    print(f"   Wall time: {wall:.1f}s")
+    print(f"   Pool throughput: {totals['frames'] / wall:.1f} frames/s")
+    if totals["video_seconds"]:
+        print(f"   Per-worker avg: {totals['frames'] / totals['video_seconds']:.1f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Decode Benchmark
+比較 pose 擷取的兩種取幀方式（不含推論）：
+- cv2：VideoCapture 解出原始解析度 → cv2.resize(INTER_AREA) → cvtColor 成 RGB
+- ffmpeg：ffmpeg 子程序在解碼端 scale 並輸出 rgb24，讀進重用的 NumPy buffer（backend.utils.frame_source）
+
+回報每支影片的 decode fps，並檢查兩者的幀數與第一幀的平均像素差。
+
+Usage examples (PowerShell):
+  python scripts/benchmark_decode.py
+  python scripts/benchmark_decode.py --directory Midea --max-files 5 --target-width 640 --threads 1 2 0
+  python scripts/benchmark_decode.py --every 2 --max-frames 600
+"""
+
+import sys
+import argparse
+import statistics
+import time
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.utils.frame_source import FfmpegFrameSource, ffmpeg_available, scaled_size
+from scripts.scan_videos import collect_video_files
+
+
+def _decode_cv2(path: str, target_width: int, every: int, max_frames: Optional[int]):
+    """與 pose_extract_and_visualize._decode_frames 相同的步驟，回傳 (幀數, 第一幀 RGB)"""
+    cap = cv2.VideoCapture(path)
+    count, first, n = 0, None, 0
+    try:
+        while max_frames is None or count < max_frames:
+            if n % every:
+                if not cap.grab():
+                    break
+                n += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            n += 1
+            w, h = scaled_size(frame.shape[1], frame.shape[0], target_width)
+            if w != frame.shape[1]:
+                frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if first is None:
+                first = image
+            count += 1
+    finally:
+        cap.release()
+    return count, first
+
+
+def _decode_ffmpeg(path: str, target_width: int, every: int, max_frames: Optional[int], threads: Optional[int]):
+    source = FfmpegFrameSource(path, target_width, every=every, threads=threads)
+    count, first = 0, None
+    for _, _, image in source:
+        if first is None:
+            first = image.copy()
+        count += 1
+        if max_frames is not None and count >= max_frames:
+            source.close()
+            break
+    return count, first
+
+
+def _timed(func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - t0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BoxTech frame decode benchmark (cv2 vs ffmpeg pipe)")
+    parser.add_argument("--directory", "-d", type=str, default="./Midea", help="Directory with sample videos")
+    parser.add_argument("--max-files", type=int, default=5, help="Number of files to benchmark on")
+    parser.add_argument("--max-frames", type=int, default=None, help="Stop each file after N frames")
+    parser.add_argument("--target-width", type=int, default=640)
+    parser.add_argument("--every", type=int, default=1, help="Only keep every Nth frame (both decoders)")
+    parser.add_argument("--threads", type=int, nargs="+", default=[0],
+                        help="ffmpeg -threads values to compare (0 = auto)")
+    args = parser.parse_args()
+
+    if not ffmpeg_available():
+        print("❌ ffmpeg / ffmpeg-python not available")
+        return
+    files = [str(p) for p in collect_video_files(Path(args.directory))[:args.max_files]]
+    if not files:
+        print(f"❌ No video files found in {args.directory}")
+        return
+    print(f"📹 Decoding {len(files)} files to width {args.target_width} (every={args.every})")
+
+    rates = {"cv2": []}
+    rates.update({f"ffmpeg/t{t}": [] for t in args.threads})
+    mismatches = 0
+    for path in files:
+        name = Path(path).name
+        seconds, (expected, cv2_first) = _timed(_decode_cv2, path, args.target_width, args.every, args.max_frames)
+        rates["cv2"].append(expected / seconds)
+        line = f"   {name}: cv2 {expected / seconds:7.1f} fps"
+        for threads in args.threads:
+            seconds, (got, first) = _timed(_decode_ffmpeg, path, args.target_width, args.every, args.max_frames,
+                                           threads)
+            rates[f"ffmpeg/t{threads}"].append(got / seconds)
+            line += f" | ffmpeg t{threads} {got / seconds:7.1f} fps"
+            if got != expected:
+                mismatches += 1
+                line += f" ⚠️ {got} vs {expected} frames"
+        if cv2_first is not None and first is not None and cv2_first.shape == first.shape:
+            line += f" | first-frame diff {np.abs(cv2_first.astype(np.int16) - first).mean():.2f}"
+        print(line)
+
+    print("\n" + "=" * 50)
+    print("📊 Decode throughput (frames/s, median over files)")
+    base = statistics.median(rates["cv2"])
+    for name, values in rates.items():
+        median = statistics.median(values)
+        print(f"   {name:<12} {median:>8.1f}   ({median / max(base, 1e-6):.2f}x cv2)")
+    print(f"   Frame-count mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Filename Search Benchmark for GET /api/v1/videos?q=
+量測 q 搜尋（match=substring / fuzzy）在大表上的延遲（p50 / p95），並以 EXPLAIN 顯示查詢計畫
+是否使用 ix_videos_file_path_trgm（Bitmap Index Scan）或整表掃描（Seq Scan）。
+
+--seed 先寫入 N 筆合成的 videos，檔名仿照實際命名（例如 Midea/2025-11/20251102-團課-打靶 01.MOV），
+file_path 以 benchmark/search/ 開頭；--cleanup 刪除它們。比較有無索引時，可在
+`alembic downgrade f3c7a1d9e2b4` / `alembic upgrade head` 前後各跑一次。
+
+Usage examples (PowerShell):
+  python scripts/benchmark_filename_search.py --seed 1000000
+  python scripts/benchmark_filename_search.py --repeat 20 --queries "打靶 01" "jump" "團課 打靶01"
+  python scripts/benchmark_filename_search.py --cleanup
+"""
+
+import os
+import sys
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+# 量的是資料庫查詢，不是回應快取
+os.environ.setdefault("RESPONSE_CACHE_TTL", "0")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert, text
+from sqlalchemy.dialects import postgresql
+
+from backend.database.connection import SessionLocal
+from backend.main import app
+from backend.models.schemas import Video
+from backend.services.filename_search import fuzzy_filter, substring_filter, trigram_available
+
+SEED_PREFIX = "benchmark/search/"
+SEED_BATCH = 10000
+CLASSES = ["團課", "私課", "體驗課", "對練", "sparring", "PT"]
+DRILLS = ["打靶", "跳繩", "空擊", "沙包", "步法", "組合拳", "mitts", "bag", "shadow", "footwork"]
+EXTENSIONS = [".MOV", ".mp4", ".MP4", ".mov"]
+DEFAULT_QUERIES = ["打靶 01", "團課-打靶", "shadow", "20250314", "團課 打靶01", "sparing footwork"]
+
+
+def seed(n: int):
+    rng = random.Random(42)
+    base = datetime(2024, 1, 1)
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        for start in range(0, n, SEED_BATCH):
+            rows = []
+            for i in range(start, min(n, start + SEED_BATCH)):
+                day = base + timedelta(days=rng.randrange(700))
+                name = (f"{day:%Y%m%d}-{rng.choice(CLASSES)}-{rng.choice(DRILLS)} "
+                        f"{rng.randrange(1, 40):02d}{rng.choice(EXTENSIONS)}")
+                rows.append({
+                    "id": uuid.uuid4(),
+                    "file_path": f"{SEED_PREFIX}{day:%Y-%m}/{i:07d}/{name}",
+                    "file_hash": uuid.uuid4().hex + uuid.uuid4().hex,
+                    "upload_date": day,
+                    "processing_status": "pending",
+                })
+            db.execute(insert(Video.__table__), rows)
+            db.commit()
+            print(f"   seeded {min(n, start + SEED_BATCH)}/{n}", end="\r")
+        db.connection().exec_driver_sql("ANALYZE videos")
+        db.commit()
+        print(f"\n✅ Seeded {n} videos in {time.perf_counter() - t0:.1f}s")
+    finally:
+        db.close()
+
+
+def cleanup():
+    db = SessionLocal()
+    try:
+        result = db.execute(delete(Video.__table__).where(Video.file_path.like(f"{SEED_PREFIX}%")))
+        db.commit()
+        print(f"🗑️  Deleted {result.rowcount} synthetic videos")
+    finally:
+        db.close()
+
+
+def plan_summary(db, q: str, match: str) -> str:
+    """EXPLAIN 中的掃描節點（例如 Bitmap Index Scan on ix_videos_file_path_trgm / Seq Scan on videos）"""
+    where = fuzzy_filter(Video.file_path, q) if match == "fuzzy" else substring_filter(Video.file_path, q)
+    stmt = db.query(Video.id).filter(where).statement
+    compiled = stmt.compile(dialect=postgresql.dialect(paramstyle="named"))
+    lines = [row[0] for row in db.execute(text(f"EXPLAIN {compiled}"), compiled.params)]
+    scans = [line.strip().lstrip("-> ").split("  (")[0] for line in lines if "Scan" in line]
+    return "; ".join(scans)
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def timed_ms(client: TestClient, params: dict, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        r = client.get("/api/v1/videos", params=params)
+        timings.append((time.perf_counter() - t0) * 1000)
+        r.raise_for_status()
+    return statistics.median(timings), percentile(timings, 95), r.json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BoxTech filename search benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="Insert N synthetic videos before benchmarking")
+    parser.add_argument("--cleanup", action="store_true", help="Delete synthetic videos and exit")
+    parser.add_argument("--queries", nargs="+", default=DEFAULT_QUERIES)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.cleanup:
+        cleanup()
+        return
+    if args.seed:
+        seed(args.seed)
+
+    db = SessionLocal()
+    client = TestClient(app)
+    try:
+        matches = ["substring", "fuzzy"] if trigram_available(db) else ["substring"]
+        if len(matches) == 1:
+            print("⚠️  pg_trgm not installed: no trigram index, match=fuzzy unavailable")
+        print(f"📊 GET /api/v1/videos?q= latency (ms, p50 / p95 over {args.repeat} requests, "
+              f"limit={args.limit}, total=none) — {db.query(Video).count()} videos")
+        for match in matches:
+            for q in args.queries:
+                params = {"q": q, "match": match, "limit": args.limit, "total": "none", "fields": "id,file_path"}
+                p50, p95, data = timed_ms(client, params, args.repeat)
+                top = data["items"][0]["file_path"].rsplit("/", 1)[-1] if data["items"] else "-"
+                print(f"   {match:<9} {q!r:<22} {p50:>8.1f} / {p95:>8.1f}   {data['count']:>4} rows   top: {top}")
+                print(f"   {'':<9} plan: {plan_summary(db, q, match)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
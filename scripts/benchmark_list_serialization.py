@@ -0,0 +1,92 @@
+"""
+Serialization Benchmark for GET /api/v1/videos
+比較一頁影片列表（預設 200 筆）在 API process 內花的 CPU 時間（time.process_time，不含等待資料庫）：
+  - orm：    db.query(Video) 建立 ORM 物件 → _video_to_dict → jsonable_encoder + json（舊的做法）
+  - columns：只查詢需要的欄位（Row）→ _rows_to_dicts → orjson（目前 _list_videos + CachedResponse）
+  - fields： 同上，但只取 --fields 指定的欄位
+
+資料庫中的影片少於 --limit 筆時，可先用 scripts/benchmark_pagination.py --seed 寫入合成資料。
+
+Usage examples (PowerShell):
+  python scripts/benchmark_list_serialization.py
+  python scripts/benchmark_list_serialization.py --limit 200 --repeat 200 --fields id,file_path,training_date
+"""
+
+import sys
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+
+from backend.api.videos import _list_videos, _video_to_dict, parse_fields
+from backend.database.connection import SessionLocal
+from backend.models.schemas import Video
+from backend.services import response_cache
+from backend.services.response_cache import CachedResponse
+
+
+def build_orm(db, limit: int) -> bytes:
+    rows = db.query(Video).order_by(Video.upload_date.desc(), Video.id.desc()).limit(limit).all()
+    content = {"total": None, "count": len(rows), "items": [_video_to_dict(v) for v in rows], "next_cursor": None}
+    body = json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    db.expunge_all()  # 與 request 結束時關閉 session 相同，不讓 identity map 跨輪累積
+    return body
+
+
+def build_columns(db, limit: int, fields) -> bytes:
+    content = _list_videos(db, limit=limit, offset=0, cursor=None, total="none", training_type=None, location=None,
+                           date_from=None, date_to=None, q=None, order_by="upload_date", order_dir="desc",
+                           fields=fields)
+    return CachedResponse.from_content(content).body
+
+
+def cpu_ms(fn, repeat: int):
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        t0 = time.process_time()
+        fn()
+        timings.append((time.process_time() - t0) * 1000)
+    return statistics.mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BoxTech videos list serialization benchmark")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--fields", default="id,file_path,training_date")
+    args = parser.parse_args()
+
+    if response_cache.orjson is None:
+        print("⚠️  orjson not installed, 'columns' / 'fields' use the standard json encoder")
+
+    db = SessionLocal()
+    try:
+        n = db.query(Video).count()
+        if n < args.limit:
+            print(f"⚠️  Only {n} videos in the database (limit={args.limit})")
+        fields = parse_fields(args.fields)
+        cases = [
+            ("orm", lambda: build_orm(db, args.limit)),
+            ("columns", lambda: build_columns(db, args.limit, None)),
+            (f"fields={args.fields}", lambda: build_columns(db, args.limit, fields)),
+        ]
+        print(f"📊 CPU per request (ms, mean over {args.repeat}, {min(n, args.limit)} rows)")
+        baseline = None
+        for name, fn in cases:
+            ms = cpu_ms(fn, args.repeat)
+            baseline = baseline or ms
+            size = len(fn())
+            print(f"   {name:<40} {ms:>7.2f} ms   {baseline / ms:>5.1f}x   {size / 1024:>7.1f} KiB")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
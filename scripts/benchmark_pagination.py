@@ -0,0 +1,148 @@
+"""
+Pagination Benchmark for GET /api/v1/videos
+比較 offset 分頁與 keyset（cursor）分頁在不同頁數的延遲（p50 / p95），以及 total=exact / estimate 的成本。
+
+--seed 先寫入 N 筆合成的 videos（file_path 以 benchmark/pagination/ 開頭），--cleanup 刪除它們。
+keyset 的第 N 頁 cursor 直接由該頁前一筆組出（不計時），不需要真的翻過前面每一頁。
+
+Usage examples (PowerShell):
+  python scripts/benchmark_pagination.py --seed 1000000
+  python scripts/benchmark_pagination.py --pages 1 10 100 1000 --repeat 20
+  python scripts/benchmark_pagination.py --cleanup
+"""
+
+import sys
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import asc, delete, desc, insert
+
+from backend.database.connection import SessionLocal
+from backend.main import app
+from backend.models.schemas import Video
+from backend.services.pagination import encode_cursor
+
+SEED_PREFIX = "benchmark/pagination/"
+SEED_BATCH = 10000
+
+
+def seed(n: int):
+    rng = random.Random(42)
+    base = datetime(2024, 1, 1)
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        for start in range(0, n, SEED_BATCH):
+            rows = []
+            for i in range(start, min(n, start + SEED_BATCH)):
+                rows.append({
+                    "id": uuid.uuid4(),
+                    "file_path": f"{SEED_PREFIX}{i:07d}.mp4",
+                    "file_hash": uuid.uuid4().hex + uuid.uuid4().hex,
+                    "upload_date": base + timedelta(seconds=rng.randrange(0, 3600 * 24 * 700)),
+                    "training_date": base + timedelta(days=rng.randrange(700)) if rng.random() < 0.8 else None,
+                    "fps": rng.choice([24, 30, 60]),
+                    "file_size_bytes": rng.randrange(1, 2 ** 31 - 1),
+                    "processing_status": "pending",
+                })
+            db.execute(insert(Video.__table__), rows)
+            db.commit()
+            print(f"   seeded {min(n, start + SEED_BATCH)}/{n}", end="\r")
+        db.connection().exec_driver_sql("ANALYZE videos")
+        db.commit()
+        print(f"\n✅ Seeded {n} videos in {time.perf_counter() - t0:.1f}s")
+    finally:
+        db.close()
+
+
+def cleanup():
+    db = SessionLocal()
+    try:
+        result = db.execute(delete(Video.__table__).where(Video.file_path.like(f"{SEED_PREFIX}%")))
+        db.commit()
+        print(f"🗑️  Deleted {result.rowcount} synthetic videos")
+    finally:
+        db.close()
+
+
+def cursor_for_page(page: int, limit: int, order_by: str, order_dir: str):
+    """第 page 頁（從 1 起算）的 cursor：前一頁最後一筆的 (排序欄位, id)"""
+    if page == 1:
+        return None
+    order = desc if order_dir == "desc" else asc
+    col = getattr(Video, order_by)
+    db = SessionLocal()
+    try:
+        row = (db.query(col, Video.id).order_by(order(col), order(Video.id))
+               .offset((page - 1) * limit - 1).limit(1).first())
+    finally:
+        db.close()
+    return encode_cursor(order_by, order_dir, row[0], row[1]) if row else None
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def timed_ms(client: TestClient, params: dict, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        r = client.get("/api/v1/videos", params=params)
+        timings.append((time.perf_counter() - t0) * 1000)
+        r.raise_for_status()
+    return statistics.median(timings), percentile(timings, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BoxTech videos pagination benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="Insert N synthetic videos before benchmarking")
+    parser.add_argument("--cleanup", action="store_true", help="Delete synthetic videos and exit")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--order-by", default="upload_date",
+                        choices=["upload_date", "training_date", "file_size_bytes", "fps"])
+    parser.add_argument("--order-dir", default="desc", choices=["asc", "desc"])
+    args = parser.parse_args()
+
+    if args.cleanup:
+        cleanup()
+        return
+    if args.seed:
+        seed(args.seed)
+
+    client = TestClient(app)
+    base = {"limit": args.limit, "order_by": args.order_by, "order_dir": args.order_dir}
+
+    print(f"📊 GET /api/v1/videos latency (ms, p50 / p95 over {args.repeat} requests, limit={args.limit})")
+    print(f"   {'page':>6}   {'offset':>17}   {'cursor':>17}")
+    for page in args.pages:
+        offset_ms = timed_ms(client, {**base, "offset": (page - 1) * args.limit, "total": "none"}, args.repeat)
+        cursor = cursor_for_page(page, args.limit, args.order_by, args.order_dir)
+        if page > 1 and cursor is None:
+            print(f"   {page:>6}   (past the last page)")
+            continue
+        cursor_ms = timed_ms(client, {**base, "cursor": cursor, "total": "none"} if cursor else {**base, "total": "none"},
+                             args.repeat)
+        print(f"   {page:>6}   {offset_ms[0]:>7.1f} / {offset_ms[1]:>7.1f}   {cursor_ms[0]:>7.1f} / {cursor_ms[1]:>7.1f}")
+
+    print("\n📊 total= cost on page 1 (ms, p50 / p95)")
+    for mode in ("none", "estimate", "exact"):
+        p50, p95 = timed_ms(client, {**base, "total": mode}, args.repeat)
+        total = client.get("/api/v1/videos", params={**base, "total": mode}).json()["total"]
+        print(f"   {mode:<9} {p50:>7.1f} / {p95:>7.1f}   total={total}")
+
+
+if __name__ == "__main__":
+    main()
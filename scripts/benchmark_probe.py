@@ -0,0 +1,91 @@
+"""
+Video Probe Benchmark
+比較 cv2.VideoCapture 與容器標頭解析（backend.utils.media_probe）取得影片資訊的延遲，
+並檢查兩者結果是否一致。
+
+Usage examples (PowerShell):
+  python scripts/benchmark_probe.py
+  python scripts/benchmark_probe.py --directory Midea --max-files 50 --repeat 3
+"""
+
+import sys
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+import cv2
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.utils.media_probe import probe_video
+from scripts.scan_videos import collect_video_files
+
+COMPARED_KEYS = ('fps', 'total_frames', 'width', 'height')
+
+
+def _probe_cv2(file_path: str) -> dict:
+    """原始實作：開啟 cv2.VideoCapture（會初始化解碼器）"""
+    cap = cv2.VideoCapture(file_path)
+    info = {
+        'fps': int(cap.get(cv2.CAP_PROP_FPS)),
+        'total_frames': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+    }
+    cap.release()
+    return info
+
+
+def _time_ms(func, path: str, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(path)
+        timings.append((time.perf_counter() - t0) * 1000)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BoxTech video probe benchmark")
+    parser.add_argument("--directory", "-d", type=str, default="./Midea", help="Directory with sample videos")
+    parser.add_argument("--max-files", type=int, default=20, help="Number of files to benchmark on")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per file (best time is reported)")
+    args = parser.parse_args()
+
+    files = [str(p) for p in collect_video_files(Path(args.directory))[:args.max_files]]
+    if not files:
+        print(f"❌ No video files found in {args.directory}")
+        return
+    print(f"📹 Probing {len(files)} files (repeat={args.repeat})")
+
+    cv2_times, probe_times = [], []
+    fallbacks, mismatches = 0, 0
+    for path in files:
+        cv2_ms, expected = _time_ms(_probe_cv2, path, args.repeat)
+        probe_ms, got = _time_ms(probe_video, path, args.repeat)
+        cv2_times.append(cv2_ms)
+        if got is None:
+            fallbacks += 1
+            print(f"   ↩️  {Path(path).name}: unsupported container, cv2 fallback")
+            continue
+        probe_times.append(probe_ms)
+        if any(got[k] != expected[k] for k in COMPARED_KEYS):
+            mismatches += 1
+            print(f"   ⚠️  {Path(path).name}: cv2={expected} probe={ {k: got[k] for k in COMPARED_KEYS} }")
+
+    print("\n" + "=" * 50)
+    print("📊 Probe latency per file (ms, best of repeat)")
+    print(f"   {'cv2':<8} median {statistics.median(cv2_times):>8.2f}   max {max(cv2_times):>8.2f}")
+    if probe_times:
+        median_probe = statistics.median(probe_times)
+        print(f"   {'probe':<8} median {median_probe:>8.2f}   max {max(probe_times):>8.2f}"
+              f"   ({statistics.median(cv2_times) / max(median_probe, 1e-6):.0f}x faster)")
+    print(f"   Fallbacks:  {fallbacks}")
+    print(f"   Mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
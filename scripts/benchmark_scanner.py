@@ -0,0 +1,285 @@
+"""
+Scanner Benchmark
+產生合成影片樹（cv2.VideoWriter 產生的小型有效影片，含重複檔、巢狀資料夾、大小寫混合副檔名與非影片檔），
+對本機 Postgres 或 sqlite 替身執行 scan_videos，回報三種掃描的 files/s、MB/s、DB round trips 與各階段耗時：
+  - full：空 DB、無指紋快取，每個檔案都 hash / probe / 寫入
+  - incremental：DB 已有資料、快取為空，每個檔案都重新 hash 但不寫入
+  - warm-cache：DB 與快取都已就緒，只做 stat()
+
+Postgres 模式在獨立 schema（scan_bench）建表，不會動到既有資料；結束時刪除。
+
+Usage examples (PowerShell):
+  python scripts/benchmark_scanner.py --db sqlite
+  python scripts/benchmark_scanner.py --db postgres --count 500 --duplicate-ratio 0.2 --workers 4
+  python scripts/benchmark_scanner.py --generate-only --root bench_tree --count 1000
+"""
+
+import sys
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+LOCATION_DIRS = ["拳擊基地", "LeYuan", "樂嫄", "Other"]
+TRAINING_TYPES = ["團課-打靶", "體驗課", "私人課-對練", "團課-體能"]
+# 與 ALLOWED_VIDEO_SUFFIXES 比對時不分大小寫；同時混入大小寫變化與會被排除的檔案
+VIDEO_SUFFIXES = [".mp4", ".MP4", ".mov", ".MOV", ".Mp4", ".avi", ".AVI"]
+DECOY_SUFFIXES = [".heic", ".HEIC", ".jpg", ".txt"]
+BENCH_SCHEMA = "scan_bench"
+OUT_DIR = Path("output/benchmarks")
+
+
+def _write_clip(path: Path, rng: np.random.Generator, frames: int, size: Tuple[int, int], fps: int = 30):
+    """寫入隨機雜訊畫面的短片（雜訊壓縮率差，檔案大小約與幀數成正比；每支內容都不同）"""
+    suffix = path.suffix.lower()
+    fourcc = "MJPG" if suffix == ".avi" else "mp4v"
+    # VideoWriter 依副檔名決定容器，大寫副檔名先寫到暫存檔再改名
+    tmp_path = path.with_name(f".{path.stem}.tmp{suffix}")
+    writer = cv2.VideoWriter(str(tmp_path), cv2.VideoWriter_fourcc(*fourcc), fps, size)
+    if not writer.isOpened():
+        raise RuntimeError(f"cv2.VideoWriter cannot write {suffix} ({fourcc})")
+    for _ in range(frames):
+        writer.write(rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8))
+    writer.release()
+    tmp_path.replace(path)
+
+
+def generate_tree(root: Path, count: int = 100, duplicate_ratio: float = 0.1, depth: int = 2, fanout: int = 4,
+                  frames: Tuple[int, int] = (10, 30), size: Tuple[int, int] = (64, 48),
+                  decoy_ratio: float = 0.05, seed: int = 0) -> dict:
+    """在 root 下產生 count 支影片（其中 duplicate_ratio 為逐位元組相同的複本），回傳統計"""
+    root = Path(root)
+    rnd = random.Random(seed)
+    rng = np.random.default_rng(seed)
+    n_duplicates = int(count * duplicate_ratio)
+    n_unique = count - n_duplicates
+    base_date = datetime(2025, 1, 1)
+
+    def random_path(i: int, suffix: str) -> Path:
+        parts = [rnd.choice(LOCATION_DIRS)] + [f"d{rnd.randrange(fanout)}" for _ in range(max(0, depth - 1))]
+        folder = root.joinpath(*parts)
+        folder.mkdir(parents=True, exist_ok=True)
+        date = base_date + timedelta(days=rnd.randrange(365))
+        return folder / f"{date:%Y%m%d}-{rnd.choice(TRAINING_TYPES)} {i:05d}{suffix}"
+
+    originals = []
+    for i in range(n_unique):
+        path = random_path(i, rnd.choice(VIDEO_SUFFIXES))
+        _write_clip(path, rng, rnd.randint(*frames), size)
+        originals.append(path)
+    for i in range(n_duplicates):
+        source = rnd.choice(originals)
+        shutil.copyfile(source, random_path(n_unique + i, source.suffix))
+    n_decoys = int(count * decoy_ratio)
+    for i in range(n_decoys):
+        random_path(count + i, rnd.choice(DECOY_SUFFIXES)).write_bytes(rng.bytes(1024))
+
+    total_bytes = sum(
+        p.stat().st_size for p in root.rglob("*") if p.is_file() and p.suffix in VIDEO_SUFFIXES
+    )
+    return {"videos": count, "unique": n_unique, "duplicates": n_duplicates, "decoys": n_decoys,
+            "bytes": total_bytes}
+
+
+def _configure_database(kind: str, database_url: Optional[str], workdir: Path) -> str:
+    """設定 DATABASE_URL（必須在 import backend.database.connection 之前呼叫）"""
+    if kind == "sqlite":
+        from sqlalchemy.dialects.postgresql import UUID
+        from sqlalchemy.ext.compiler import compiles
+
+        @compiles(UUID, "sqlite")
+        def _uuid_as_char(type_, compiler, **kw):  # noqa: ARG001
+            return "CHAR(32)"
+
+        url = f"sqlite:///{workdir / 'scan_bench.sqlite'}"
+    else:
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.engine import make_url
+
+        base_url = database_url or os.getenv("DATABASE_URL")
+        if not base_url:
+            raise SystemExit("❌ --db postgres needs --database-url or DATABASE_URL")
+        admin = create_engine(base_url)
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {BENCH_SCHEMA}"))
+        admin.dispose()
+        url = make_url(base_url).update_query_dict({"options": f"-csearch_path={BENCH_SCHEMA}"})
+        url = url.render_as_string(hide_password=False)
+    os.environ["DATABASE_URL"] = url
+    return url
+
+
+def _drop_bench_schema(database_url: Optional[str]):
+    from sqlalchemy import create_engine, text
+
+    admin = create_engine(database_url or os.getenv("DATABASE_URL"))
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+    admin.dispose()
+
+
+class RoundTripCounter:
+    """以 SQLAlchemy engine 事件計算 DB round trips（送出的 statement 數 + commit 數）"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_execute(self, *args, **kwargs):
+        self.statements += 1
+
+    def _on_commit(self, *args, **kwargs):
+        self.commits += 1
+
+    def reset(self):
+        self.statements = 0
+        self.commits = 0
+
+    @property
+    def total(self) -> int:
+        return self.statements + self.commits
+
+
+def run_benchmark(tree: Path, tree_bytes: int, workers: int, batch_size: int, hash_mode: str,
+                  hash_strategy: str, cache_path: Path, verbose: bool = False) -> list:
+    from backend.database.connection import SessionLocal, engine
+    from backend.models.schemas import Base, Video
+    import scripts.scan_videos as sv
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.query(Video).delete()
+        db.commit()
+    finally:
+        db.close()
+    if cache_path.exists():
+        cache_path.unlink()
+
+    counter = RoundTripCounter(engine)
+    runs = [
+        ("full", dict(mode="full", use_cache=False)),
+        ("incremental", dict(mode="incremental", use_cache=True)),
+        ("warm-cache", dict(mode="incremental", use_cache=True)),
+    ]
+    results = []
+    for name, options in runs:
+        stats = sv.ScanStats()
+        counter.reset()
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        t0 = time.perf_counter()
+        with output:
+            sv.scan_videos(directory=str(tree), workers=workers, batch_size=batch_size, hash_mode=hash_mode,
+                           hash_strategy=hash_strategy, cache_path=str(cache_path), stats=stats, **options)
+        wall = time.perf_counter() - t0
+        results.append({
+            "run": name,
+            "wall_seconds": round(wall, 4),
+            "files": stats.total_files,
+            "files_per_second": round(stats.total_files / wall, 2),
+            "mb_per_second": round(tree_bytes / (1024 * 1024) / wall, 2),
+            "files_hashed": stats.files_hashed,
+            "db_statements": counter.statements,
+            "db_commits": counter.commits,
+            "db_round_trips": counter.total,
+            "stats": stats.as_dict(),
+        })
+    engine.dispose()
+    return results
+
+
+def print_results(results: list):
+    print("\n" + "=" * 78)
+    print(f"{'Run':<13}{'Files':>7}{'Wall s':>9}{'files/s':>10}{'MB/s':>9}{'Hashed':>8}{'DB trips':>10}  Written")
+    for r in results:
+        written = r["stats"]["inserted"] + r["stats"]["updated"]
+        print(f"{r['run']:<13}{r['files']:>7}{r['wall_seconds']:>9.3f}{r['files_per_second']:>10.1f}"
+              f"{r['mb_per_second']:>9.2f}{r['files_hashed']:>8}{r['db_round_trips']:>10}  {written}")
+    print("\n⏱️  Per-phase time (s)")
+    for r in results:
+        phases = r["stats"]["phase_seconds"]
+        detail = ", ".join(f"{k}={v:.3f}" for k, v in sorted(phases.items(), key=lambda kv: -kv[1]))
+        print(f"   {r['run']:<13}{detail}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BoxTech scanner benchmark")
+    parser.add_argument("--db", choices=["sqlite", "postgres"], default="sqlite",
+                        help="sqlite stand-in (temp file) or Postgres (isolated scan_bench schema)")
+    parser.add_argument("--database-url", type=str, default=None, help="Postgres URL (default: DATABASE_URL)")
+    parser.add_argument("--root", type=str, default=None, help="Where to generate the tree (default: temp dir)")
+    parser.add_argument("--count", type=int, default=200, help="Number of video files")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1, help="Fraction of byte-identical copies")
+    parser.add_argument("--depth", type=int, default=2, help="Directory nesting depth")
+    parser.add_argument("--fanout", type=int, default=4, help="Sub-directories per level")
+    parser.add_argument("--frames", type=int, nargs=2, default=(10, 30), metavar=("MIN", "MAX"),
+                        help="Frames per clip (controls file size)")
+    parser.add_argument("--resolution", type=str, default="64x48", help="Clip resolution WxH")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", "-w", type=int, default=1, help="Scanner process pool size")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--hash-mode", choices=["full", "tiered"], default="full")
+    parser.add_argument("--hash-strategy", type=str, default="readinto",
+                        help="Fixed strategy keeps runs comparable (auto would benchmark first)")
+    parser.add_argument("--generate-only", action="store_true", help="Only generate the tree, then exit")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated tree / bench schema")
+    parser.add_argument("--verbose", action="store_true", help="Show the scanner's per-file output")
+    args = parser.parse_args()
+
+    width, height = (int(x) for x in args.resolution.lower().split("x"))
+    workdir = Path(tempfile.mkdtemp(prefix="scan_bench_"))
+    tree = Path(args.root) if args.root else workdir / "tree"
+
+    print("⏱️  BoxTech Scanner Benchmark")
+    print("=" * 50)
+    t0 = time.perf_counter()
+    manifest = generate_tree(tree, count=args.count, duplicate_ratio=args.duplicate_ratio, depth=args.depth,
+                             fanout=args.fanout, frames=tuple(args.frames), size=(width, height), seed=args.seed)
+    print(f"📁 Generated {manifest['videos']} videos ({manifest['duplicates']} duplicates, "
+          f"{manifest['decoys']} non-video files, {manifest['bytes'] / (1024 * 1024):.1f} MB) "
+          f"in {time.perf_counter() - t0:.1f}s → {tree}")
+    if args.generate_only:
+        return
+
+    try:
+        _configure_database(args.db, args.database_url, workdir)
+        print(f"🗄️  Database: {args.db}  workers={args.workers}  batch={args.batch_size}  hash={args.hash_mode}")
+        results = run_benchmark(tree, manifest["bytes"], workers=args.workers, batch_size=args.batch_size,
+                                hash_mode=args.hash_mode, hash_strategy=args.hash_strategy,
+                                cache_path=workdir / "fingerprints.sqlite", verbose=args.verbose)
+        print_results(results)
+
+        OUT_DIR.mkdir(parents=True, exist_ok=True)
+        out_path = OUT_DIR / f"scan_benchmark_{datetime.now():%Y%m%d-%H%M%S}.json"
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump({"config": {k: v for k, v in vars(args).items() if k != "database_url"},
+                       "tree": manifest, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Results: {out_path}")
+    finally:
+        if args.db == "postgres" and not args.keep:
+            _drop_bench_schema(args.database_url)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
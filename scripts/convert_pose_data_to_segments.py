@@ -0,0 +1,132 @@
+"""
+Convert pose_data rows into packed pose_segments
+
+逐支影片讀出 pose_data（依 frame_number 串流，不一次載入），每 SEGMENT_FRAMES 幀打包成一筆 pose_segments。
+每支影片一個 transaction：先刪除該影片既有的 pose_segments 再寫入，重跑結果相同。
+--delete-rows 在轉換成功後刪除原本的 pose_data。
+
+Usage examples (PowerShell):
+  python scripts/convert_pose_data_to_segments.py --dry-run
+  python scripts/convert_pose_data_to_segments.py
+  python scripts/convert_pose_data_to_segments.py --video-id 0b6c... --compression zlib --delete-rows
+"""
+
+import sys
+import argparse
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import delete, func, select
+
+from backend.database.connection import SessionLocal
+from backend.models.schemas import PoseData
+from backend.services.pose_segments import COMPRESSIONS, SEGMENT_FRAMES, PoseSegmentRepository, segment_start
+from backend.utils.landmark_file import FLAG_INTERPOLATED, RECORD_DTYPE, landmarks_to_array
+
+FETCH_SIZE = 2000
+
+
+def convert_video(db, video_id, segment_frames: int = SEGMENT_FRAMES, compression: str = "none",
+                  delete_rows: bool = False) -> dict:
+    """轉換一支影片，回傳 {"frames", "segments", "bytes"}（呼叫端負責 commit）"""
+    repo = PoseSegmentRepository(db, segment_frames=segment_frames, compression=compression)
+    repo.delete_video(video_id)
+
+    table = PoseData.__table__
+    rows = db.execute(
+        select(table.c.frame_number, table.c.timestamp, table.c.landmarks, table.c.interpolated)
+        .where(table.c.video_id == video_id)
+        .order_by(table.c.frame_number)
+        .execution_options(yield_per=FETCH_SIZE)
+    )
+    buffer = np.zeros(segment_frames, dtype=RECORD_DTYPE)
+    pending = 0
+    current: Optional[int] = None
+    stats = {"frames": 0, "segments": 0, "bytes": 0}
+
+    def flush():
+        nonlocal pending
+        if pending:
+            stats["bytes"] += repo.write_segment(video_id, current, buffer[:pending])
+            stats["segments"] += 1
+            stats["frames"] += pending
+            pending = 0
+
+    for frame_number, timestamp, landmarks, interpolated in rows:
+        start = segment_start(frame_number, segment_frames)
+        if current is not None and start != current:
+            flush()
+        current = start
+        if pending and buffer["frame"][pending - 1] == frame_number:
+            continue  # 舊版重跑可能留下重複的幀，只保留第一筆
+        rec = buffer[pending]
+        rec["landmarks"] = landmarks_to_array(landmarks)
+        rec["timestamp"] = timestamp
+        rec["frame"] = frame_number
+        rec["flags"] = FLAG_INTERPOLATED if interpolated else 0
+        pending += 1
+    flush()
+
+    if delete_rows:
+        db.execute(delete(table).where(table.c.video_id == video_id))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert pose_data rows into packed pose_segments")
+    parser.add_argument("--video-id", type=str, default=None, help="Only convert this video")
+    parser.add_argument("--segment-frames", type=int, default=SEGMENT_FRAMES)
+    parser.add_argument("--compression", choices=COMPRESSIONS, default="none",
+                        help="zlib trades read speed for ~10%% smaller segments on landmark data")
+    parser.add_argument("--delete-rows", action="store_true", help="Delete pose_data rows after converting")
+    parser.add_argument("--dry-run", action="store_true", help="Only list videos and row counts")
+    args = parser.parse_args()
+
+    print("🥊 BoxTech pose_data → pose_segments")
+    print("=" * 50)
+    db = SessionLocal()
+    try:
+        query = db.query(PoseData.video_id, func.count(PoseData.id)).group_by(PoseData.video_id)
+        if args.video_id:
+            query = query.filter(PoseData.video_id == args.video_id)
+        videos = query.all()
+        print(f"📹 {len(videos)} videos with pose_data ({sum(n for _, n in videos)} rows)")
+        if args.dry_run:
+            for video_id, n in videos:
+                print(f"   {video_id}: {n} rows")
+            return
+
+        totals = {"frames": 0, "segments": 0, "bytes": 0}
+        t0 = time.perf_counter()
+        for i, (video_id, n) in enumerate(videos, start=1):
+            try:
+                stats = convert_video(db, video_id, args.segment_frames, args.compression, args.delete_rows)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"❌ [{i}/{len(videos)}] {video_id}: {e}")
+                continue
+            for key in totals:
+                totals[key] += stats[key]
+            print(f"✅ [{i}/{len(videos)}] {video_id}: {stats['frames']} frames → {stats['segments']} segments "
+                  f"({stats['bytes'] / 1024:.0f} KiB)")
+
+        elapsed = max(1e-6, time.perf_counter() - t0)
+        print("\n" + "=" * 50)
+        print(f"📊 Converted {totals['frames']} frames into {totals['segments']} segments "
+              f"({totals['bytes'] / 1024 / 1024:.1f} MiB, {args.compression}) in {elapsed:.1f}s "
+              f"({totals['frames'] / elapsed:.0f} frames/s)")
+        if args.delete_rows:
+            print("🗑️  Deleted converted pose_data rows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
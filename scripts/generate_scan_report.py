@@ -14,6 +14,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from sqlalchemy import func
 from backend.database.connection import SessionLocal
 from backend.models.schemas import Video
+from backend.utils.perceptual_hash import NEAR_DUPLICATE_MAX_DISTANCE, group_near_duplicates, phash_to_int
 
 OUT_DIR = Path("output/scan_reports")
 OUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -26,7 +27,9 @@ def main():
         anomalies = []
 
         for v in rows:
-            by_hash[v.file_hash].append(v)
+            # tiered 掃描尚未回填完整 hash 的紀錄無法確認重複，先略過
+            if v.file_hash:
+                by_hash[v.file_hash].append(v)
             if (not v.fps or v.fps <= 0) or (not v.duration_seconds or v.duration_seconds <= 0):
                 anomalies.append({
                     "id": str(v.id),
@@ -49,6 +52,22 @@ def main():
             for h, lst in by_hash.items() if len(lst) > 1
         ]
 
+        # 近似重複：感知雜湊 Hamming distance ≤ 門檻（重新編碼 / 改解析度 / 略剪）；
+        # 整群 file_hash 都相同的已列在 duplicates，不重複列出
+        near_duplicates = []
+        groups = group_near_duplicates(
+            (phash_to_int(v.perceptual_hash), v) for v in rows if v.perceptual_hash
+        )
+        for group in groups:
+            if len({v.file_hash for v in group}) == 1 and group[0].file_hash:
+                continue
+            near_duplicates.append({
+                "count": len(group),
+                "files": [x.file_path for x in group],
+                "perceptual_hashes": [x.perceptual_hash for x in group],
+                "total_size_bytes": sum(x.file_size_bytes or 0 for x in group),
+            })
+
         meta_counts = {
             "by_location": Counter([v.location or "(unknown)" for v in rows]),
             "by_training_type": Counter([v.training_type or "(unknown)" for v in rows]),
@@ -58,11 +77,14 @@ def main():
         json_path = OUT_DIR / f"scan_report_{ts}.json"
         csv_dup_path = OUT_DIR / f"duplicates_{ts}.csv"
         csv_anom_path = OUT_DIR / f"anomalies_{ts}.csv"
+        csv_near_path = OUT_DIR / f"near_duplicates_{ts}.csv"
 
         with open(json_path, "w", encoding="utf-8") as f:
             json.dump({
                 "total": len(rows),
                 "duplicates": duplicates,
+                "near_duplicates": near_duplicates,
+                "near_duplicate_max_distance": NEAR_DUPLICATE_MAX_DISTANCE,
                 "anomalies": anomalies,
                 "meta_counts": {
                     "by_location": dict(meta_counts["by_location"]),
@@ -76,6 +98,13 @@ def main():
             for d in duplicates:
                 w.writerow([d["file_hash"], d["count"], " | ".join(d["files"])])
 
+        with open(csv_near_path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["count", "total_size_bytes", "files", "perceptual_hashes"])
+            for d in near_duplicates:
+                w.writerow([d["count"], d["total_size_bytes"], " | ".join(d["files"]),
+                            " | ".join(d["perceptual_hashes"])])
+
         with open(csv_anom_path, "w", newline="", encoding="utf-8") as f:
             w = csv.writer(f)
             w.writerow(["id", "file_path", "fps", "duration", "resolution", "reason"])
@@ -88,6 +117,7 @@ def main():
 
         print(f"✅ Report JSON: {json_path}")
         print(f"✅ Duplicates CSV: {csv_dup_path}")
+        print(f"✅ Near duplicates CSV: {csv_near_path} ({len(near_duplicates)} groups)")
         print(f"✅ Anomalies CSV: {csv_anom_path}")
     finally:
         db.close()
@@ -0,0 +1,136 @@
+"""
+Load test for GET /api/v1/videos (sync vs async DB path)
+分別以 DB_ASYNC=0 / DB_ASYNC=1 啟動 uvicorn，用 N 個並行 client（httpx.AsyncClient）在固定時間內
+輪流打列表與詳情端點，回報 requests/s、p50 / p99 延遲與錯誤數。
+
+回應快取預設關閉（RESPONSE_CACHE_TTL=0），量的是資料庫路徑；--cache 時保留快取。
+
+Usage examples (PowerShell):
+  python scripts/load_test_videos_api.py
+  python scripts/load_test_videos_api.py --concurrency 200 --duration 20 --modes sync async
+  python scripts/load_test_videos_api.py --url http://localhost:8000 --modes external
+"""
+
+import os
+import sys
+import argparse
+import asyncio
+import subprocess
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+ROOT = Path(__file__).parent.parent
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def start_server(mode: str, port: int, cache: bool) -> subprocess.Popen:
+    env = dict(os.environ, DB_ASYNC="1" if mode == "async" else "0")
+    if not cache:
+        env["RESPONSE_CACHE_TTL"] = "0"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT, env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"uvicorn ({mode}) did not start on port {port}")
+
+
+async def run_load(base_url: str, concurrency: int, duration: float, list_params: dict,
+                   video_ids: List[str]) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker(n: int):
+            nonlocal errors
+            i = n
+            while time.perf_counter() < deadline:
+                # 每 4 個請求中 1 個是詳情，其餘是列表
+                if video_ids and i % 4 == 0:
+                    request = client.get(f"/api/v1/videos/{video_ids[i % len(video_ids)]}")
+                else:
+                    request = client.get("/api/v1/videos", params=list_params)
+                t0 = time.perf_counter()
+                try:
+                    r = await request
+                    ok = r.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append((time.perf_counter() - t0) * 1000)
+                errors += not ok
+                i += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BoxTech videos API load test (sync vs async DB path)")
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async", "external"],
+                        help="external: test an already running server at --url")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server for --modes external")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", "-c", type=int, default=200)
+    parser.add_argument("--duration", "-t", type=float, default=15.0, help="Seconds per mode")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--total", default="exact", choices=["exact", "estimate", "none"])
+    parser.add_argument("--cache", action="store_true", help="Keep the response cache enabled")
+    args = parser.parse_args()
+
+    list_params = {"limit": args.limit, "total": args.total}
+    results = {}
+    for mode in args.modes:
+        proc: Optional[subprocess.Popen] = None
+        base_url = args.url
+        if mode != "external":
+            proc = start_server(mode, args.port, args.cache)
+            base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            items = httpx.get(f"{base_url}/api/v1/videos", params={"limit": 200, "total": "none"}).json()["items"]
+            video_ids = [item["id"] for item in items]
+            asyncio.run(run_load(base_url, args.concurrency, 2.0, list_params, video_ids))  # warm-up
+            print(f"🚀 {mode}: {args.concurrency} clients for {args.duration:.0f}s ...")
+            results[mode] = asyncio.run(run_load(base_url, args.concurrency, args.duration, list_params, video_ids))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+
+    print("\n" + "=" * 50)
+    print(f"📊 GET /api/v1/videos (limit={args.limit}, total={args.total}, concurrency={args.concurrency})")
+    print(f"   {'mode':<9} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for mode, r in results.items():
+        print(f"   {mode:<9} {r['rps']:>8.1f} {r['p50']:>9.1f} {r['p99']:>9.1f} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,30 +6,49 @@ Features:
 - Generate an overlay video visualizing pose skeleton
 - Print validation summary (detection rate, avg visibility, processing FPS)
 - Optionally save landmarks to JSON and/or database (if VIDEO record exists)
+- Optional frame stride / adaptive stride: skipped frames are linearly interpolated and flagged
+- Optional ROI tracking: infer on a full-resolution crop around the boxer, re-detect on the full frame when lost
+- Periodic checkpoints; --resume continues a killed run from the last checkpoint
+- Optional ffmpeg decoder: scaling and RGB conversion happen inside ffmpeg (--decoder ffmpeg)
 
 Usage examples (PowerShell):
   python scripts/pose_extract_and_visualize.py
   python scripts/pose_extract_and_visualize.py --video "Midea\拳擊基地\20250323-體驗課01.mp4"
   python scripts/pose_extract_and_visualize.py --save-json --out-video
   python scripts/pose_extract_and_visualize.py --db --model-complexity 1 --target-width 960
+  python scripts/pose_extract_and_visualize.py --adaptive-stride --max-stride 4 --save-json
+  python scripts/pose_extract_and_visualize.py --save-json --format binary
+  python scripts/pose_extract_and_visualize.py --db --checkpoint-every 900 --resume
+  python scripts/pose_extract_and_visualize.py --decoder ffmpeg --decode-threads 2 --target-width 640
 """
 
 from __future__ import annotations
 
 import os
+import sys
 import json
+import queue
+import threading
 import time
 import warnings
 import argparse
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Iterable, Iterator, List, Dict, Optional
 
 os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
 import cv2  # noqa: E402
 import mediapipe as mp  # noqa: E402
+from mediapipe.framework.formats import landmark_pb2  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.services.landmark_sinks import FILE_SUFFIXES, DbSink, SegmentSink, open_file_sink  # noqa: E402
+from backend.utils.frame_source import DECODERS, FfmpegFrameSource, ffmpeg_available  # noqa: E402
+from backend.utils.pose_roi import RoiTracker, to_frame_coords  # noqa: E402
+from backend.utils.pose_sampling import StrideSampler, interpolate_landmarks  # noqa: E402
 
 
 @dataclass
@@ -42,6 +61,10 @@ class Summary:
     passed_detection: bool
     passed_fps: bool
     passed_visibility: bool
+    inference_fps: float = 0.0  # 只計 pose.process 的時間：pipeline 可達到的上限
+    inferred_frames: int = 0  # 實際執行 pose 模型的幀數（stride > 1 時少於 total_frames）
+    interpolated_frames: int = 0  # 以內插補上 landmarks 的幀數（已計入 detected_frames）
+    roi_frames: int = 0  # ROI 模式下在裁切影像上推論成功的幀數
 
 
 CRITICAL_IDXS = [
@@ -71,30 +94,246 @@ def ensure_dirs(path: Path):
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
-def make_output_paths(video_path: str, write_video: bool, write_json: bool):
-    vp = Path(video_path)
-    stem = vp.stem
+def make_checkpoint_path(video_path: str, name: Optional[str] = None) -> Path:
+    """name 預設為影片檔名（不含副檔名）；不同資料夾可能有同名影片時請傳入唯一的 name"""
+    path = Path("output/checkpoints") / f"{name or Path(video_path).stem}.checkpoint.json"
+    ensure_dirs(path)
+    return path
+
+
+def write_checkpoint(path: Path, payload: Dict):
+    """先寫暫存檔再 rename，中途被 kill 也不會留下寫一半的 checkpoint"""
+    payload = dict(payload, saved_at=time.time())
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path: Path, video_path: str, outputs: List[str]) -> Optional[Dict]:
+    """讀取 checkpoint；不存在、或影片 / 輸出設定與本次不同時回傳 None（從頭開始）"""
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("video_path") != str(Path(video_path)) or checkpoint.get("outputs") != outputs:
+        print(f"⚠️  Checkpoint {path} was written for different outputs, starting over")
+        return None
+    return checkpoint
+
+
+def make_output_paths(video_path: str, write_video: bool, write_json: bool, landmark_format: str = "json",
+                      name: Optional[str] = None):
+    stem = name or Path(video_path).stem
     vis_out = None
     json_out = None
     if write_video:
         vis_out = Path("output/visualizations") / f"{stem}_pose.mp4"
         ensure_dirs(vis_out)
     if write_json:
-        json_out = Path("output/landmarks") / f"{stem}_landmarks.json"
+        json_out = Path("output/landmarks") / f"{stem}_landmarks{FILE_SUFFIXES[landmark_format]}"
         ensure_dirs(json_out)
     return vis_out, json_out
 
 
-def extract_and_visualize(
-    video_path: str,
-    target_width: int = 640,
-    model_complexity: int = 0,
-    out_video_path: Optional[Path] = None,
-    out_json_path: Optional[Path] = None,
-    save_db: bool = False,
-) -> Summary:
-    mp_pose = mp.solutions.pose
-    pose = mp_pose.Pose(
+_END = object()
+
+
+class _StageError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _put(q: "queue.Queue", item, stop: threading.Event) -> bool:
+    """放入 bounded queue；下游已停止時放棄並回傳 False"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _decode_frames(cap, target_width: int, keep_full: bool = False, start_frame: int = 0,
+                   every: int = 1) -> Iterator[tuple]:
+    """decode + preprocess：依序產生 (frame_number, timestamp, BGR frame, RGB image, 原始解析度 BGR frame)
+    keep_full=False 時最後一項為 None（只有 ROI 模式需要原始解析度）。
+    start_frame：cap 已 seek 到的位置（0-based），frame_number 由 start_frame + 1 起算。
+    every：每 every 幀只處理一幀，其餘只 grab() 不轉換"""
+    frame_number = start_frame
+    while cap.isOpened():
+        if (frame_number - start_frame) % every:
+            if not cap.grab():
+                break
+            frame_number += 1
+            continue
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame_number += 1
+        timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        full = frame if keep_full else None
+
+        if target_width and frame.shape[1] > target_width:
+            scale = target_width / frame.shape[1]
+            frame = cv2.resize(frame, (int(frame.shape[1] * scale), int(frame.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+
+        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        image.flags.writeable = False
+        yield frame_number, timestamp, frame, image, full
+
+
+def _decode_frames_ffmpeg(source: FfmpegFrameSource, need_bgr: bool) -> Iterator[tuple]:
+    """FfmpegFrameSource 已縮放並轉成 RGB：與 _decode_frames 相同的 tuple，
+    BGR frame 只在需要畫 overlay 時才轉換（否則為 None）"""
+    for frame_number, timestamp, image in source:
+        frame = cv2.cvtColor(image, cv2.COLOR_RGB2BGR) if need_bgr else None
+        yield frame_number, timestamp, frame, image, None
+
+
+def _threaded(items: Iterable, maxsize: int, name: str) -> Iterator:
+    """在背景執行緒迭代 items，經 bounded queue 依原順序交給呼叫端；背景例外會在呼叫端重新拋出"""
+    q: "queue.Queue" = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+
+    def run():
+        try:
+            for item in items:
+                if not _put(q, item, stop):
+                    return
+            _put(q, _END, stop)
+        except BaseException as e:  # noqa: BLE001 - re-raised on the consumer thread
+            _put(q, _StageError(e), stop)
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _END:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+class _OverlayEncoder:
+    """畫骨架並寫入視覺化影片；threaded 時在獨立執行緒執行，寫檔順序與送入順序相同"""
+
+    def __init__(self, out_path: Path, fps: float, threaded: bool = True, queue_size: int = 8):
+        self.out_path = out_path
+        self.fps = fps
+        self._writer = None
+        self._error: Optional[BaseException] = None
+        self._queue: Optional["queue.Queue"] = None
+        self._stop = threading.Event()
+        if threaded:
+            self._queue = queue.Queue(maxsize=max(1, queue_size))
+            self._thread = threading.Thread(target=self._run, name="pose-encode", daemon=True)
+            self._thread.start()
+
+    def submit(self, frame, pose_landmarks):
+        if self._queue is None:
+            self._encode(frame, pose_landmarks)
+            return
+        if self._error is not None:
+            raise self._error
+        _put(self._queue, (frame, pose_landmarks), self._stop)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            try:
+                self._encode(*item)
+            except BaseException as e:  # noqa: BLE001 - surfaced on submit()/close()
+                self._error = e
+                self._stop.set()
+                return
+
+    def _encode(self, frame, pose_landmarks):
+        # frame 由 decode 階段產生、之後不再使用，可直接畫在上面
+        if pose_landmarks is not None:
+            mp.solutions.drawing_utils.draw_landmarks(
+                frame,
+                pose_landmarks,
+                mp.solutions.pose.POSE_CONNECTIONS,
+                landmark_drawing_spec=mp.solutions.drawing_styles.get_default_pose_landmarks_style(),
+            )
+        if self._writer is None:
+            fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+            self._writer = cv2.VideoWriter(str(self.out_path), fourcc, self.fps, (frame.shape[1], frame.shape[0]))
+        self._writer.write(frame)
+
+    def close(self):
+        if self._queue is not None and self._thread.is_alive():
+            _put(self._queue, _END, self._stop)
+            self._thread.join()
+        if self._writer is not None:
+            self._writer.release()
+        if self._error is not None:
+            raise self._error
+
+
+def _landmark_proto(lm_list: List[Dict]):
+    """內插出的 landmarks 轉回 MediaPipe proto，供 overlay 繪圖"""
+    return landmark_pb2.NormalizedLandmarkList(
+        landmark=[
+            landmark_pb2.NormalizedLandmark(x=lm["x"], y=lm["y"], z=lm["z"], visibility=lm["visibility"] or 0.0)
+            for lm in lm_list
+        ]
+    )
+
+
+def _landmark_dicts(pose_landmarks) -> List[Dict]:
+    return [
+        {
+            "x": lm.x,
+            "y": lm.y,
+            "z": lm.z,
+            "visibility": getattr(lm, "visibility", None),
+        }
+        for lm in pose_landmarks.landmark
+    ]
+
+
+def _infer_with_roi(pose, tracker: RoiTracker, image, full, roi_width: int) -> tuple:
+    """ROI 模式推論，回傳 (整張畫面座標的 landmarks 或 None, 是否在裁切影像上推論成功)"""
+    h, w = full.shape[:2]
+    if tracker.roi is not None:
+        x0, y0, x1, y1 = tracker.roi
+        crop = full[y0:y1, x0:x1]
+        longest = max(crop.shape[:2])
+        if longest > roi_width:
+            scale = roi_width / longest
+            crop = cv2.resize(crop, (max(1, round(crop.shape[1] * scale)), max(1, round(crop.shape[0] * scale))),
+                              interpolation=cv2.INTER_AREA)
+        results = pose.process(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
+        if results.pose_landmarks is not None:
+            lm_list = to_frame_coords(_landmark_dicts(results.pose_landmarks), tracker.roi, w, h)
+            tracker.update(lm_list, w, h)
+            return lm_list, True
+        # 裁切內追丟：同一幀改用整張畫面重新偵測
+        tracker.lost()
+        pose.reset()
+
+    results = pose.process(image)
+    if results.pose_landmarks is None:
+        return None, False
+    lm_list = _landmark_dicts(results.pose_landmarks)
+    tracker.update(lm_list, w, h)
+    # 下一幀改推論裁切影像，座標系不同，清掉 MediaPipe 內部的追蹤狀態
+    pose.reset()
+    return lm_list, False
+
+
+def create_pose(model_complexity: int = 0):
+    return mp.solutions.pose.Pose(
         static_image_mode=False,
         model_complexity=model_complexity,
         smooth_landmarks=True,
@@ -103,145 +342,294 @@ def extract_and_visualize(
         min_tracking_confidence=0.5,
     )
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise RuntimeError(f"Cannot open video: {video_path}")
 
-    orig_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-    writer = None
+def extract_and_visualize(
+    video_path: str,
+    target_width: int = 640,
+    model_complexity: int = 0,
+    out_video_path: Optional[Path] = None,
+    out_json_path: Optional[Path] = None,
+    save_db: bool = False,
+    pose=None,
+    log_every: int = 30,
+    pipelined: Optional[bool] = None,
+    queue_size: int = 8,
+    stride: int = 1,
+    adaptive_stride: bool = False,
+    max_stride: int = 4,
+    landmark_format: str = "json",
+    chunk_size: int = 256,
+    db_storage: str = "rows",
+    roi: bool = False,
+    roi_width: int = 384,
+    checkpoint_path: Optional[Path] = None,
+    checkpoint_every: int = 0,
+    resume: bool = False,
+    warmup_frames: int = 15,
+    decoder: str = "cv2",
+    decode_threads: Optional[int] = None,
+    decode_every: int = 1,
+) -> Summary:
+    """pose: 外部建立的 Pose（批次模式由 worker 重用）；未提供時自行建立並於結束時關閉。
+    log_every: 每隔幾幀印出進度，0 表示不印。
+    pipelined: decode+preprocess、inference、overlay encode 分別在不同執行緒執行，
+        以 queue_size 大小的 bounded queue 相接（cv2 / MediaPipe 執行時會釋放 GIL，各階段可重疊）。
+        None 表示自動：多核心時啟用；單核心時各階段只會互搶 CPU，維持 serial。
+    stride: 每隔幾幀執行一次 pose 模型，中間的幀以線性內插補上（標記 interpolated）。
+    adaptive_stride: 依手肘 / 手腕速度自動調整 stride（1 ~ max_stride），出拳時回到每幀推論。
+    landmark_format: out_json_path 的格式，"json"、"ndjson" 或 "binary"（.lmk，見 backend/utils/landmark_file.py）。
+        landmarks 逐幀交給 sink（backend/services/landmark_sinks.py），每 chunk_size 幀寫出一次，不在記憶體累積。
+    db_storage: save_db 的儲存方式，"rows"（pose_data 一幀一筆）或 "segments"（pose_segments 每段打包）。
+    roi: 依上一幀 landmarks 從原始解析度畫面裁出拳手附近的區域推論（長邊縮到 roi_width），
+        追丟時回到整張畫面（target_width）重新偵測。見 backend/utils/pose_roi.py。
+    checkpoint_every: 每隔約幾幀把所有 sink 寫出 / commit，並在 checkpoint_path 記錄最後完成的幀；正常結束時刪除。
+    resume: checkpoint_path 存在時從記錄的幀之後繼續（sink 截掉 checkpoint 之後的輸出），
+        seek 到 warmup_frames 幀之前先推論暖機，讓追蹤狀態接上。
+    decoder: "cv2"（VideoCapture + resize + cvtColor）或 "ffmpeg"（ffmpeg 子程序在解碼端縮放並輸出 RGB，
+        見 backend/utils/frame_source.py）；decode_threads 為 ffmpeg 的解碼執行緒數（None = ffmpeg 預設）。
+        ROI 模式需要原始解析度的畫面，固定使用 cv2。
+    decode_every: 每 decode_every 幀只處理一幀（其餘幀不輸出、不內插），frame number 仍對應原始影片。
+    """
+    if pipelined is None:
+        pipelined = (os.cpu_count() or 1) > 1
+    owns_pose = pose is None
+    if owns_pose:
+        pose = create_pose(model_complexity)
+
+    if decoder not in DECODERS:
+        raise ValueError(f"Unknown decoder: {decoder}")
+    if decoder == "ffmpeg" and roi:
+        print("⚠️  ROI mode needs full-resolution frames, decoding with cv2")
+        decoder = "cv2"
+    elif decoder == "ffmpeg" and not ffmpeg_available():
+        print("⚠️  ffmpeg / ffmpeg-python not available, decoding with cv2")
+        decoder = "cv2"
+    decode_every = max(1, decode_every)
+
+    cap = None
+    source = None
+    if decoder == "ffmpeg":
+        # 同時被引用的幀：decode queue + 生產端 / 消費端手上各一 + 等待內插的最後一幀
+        source = FfmpegFrameSource(video_path, target_width, every=decode_every, threads=decode_threads,
+                                   buffers=queue_size + 4)
+        orig_fps = source.fps
+    else:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise RuntimeError(f"Cannot open video: {video_path}")
+        orig_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    encoder = None
     if out_video_path is not None:
-        # we'll write at original fps
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        # delay feature: determine size from first processed frame
-        writer = (fourcc, orig_fps, None)  # temp placeholder
+        # we'll write at original fps (divided by decode_every); writer size is taken from the first processed frame
+        encoder = _OverlayEncoder(out_video_path, orig_fps / decode_every, threaded=pipelined, queue_size=queue_size)
 
-    frame_count = 0
-    detected_count = 0
-    vis_sum = 0.0
-    per_frame_data: List[Dict] = []
+    inference_seconds = 0.0
+    inference_calls = 0  # 本次執行的推論次數（含 resume 的 warm-up）
 
     t0 = time.time()
 
-    drawing = mp.solutions.drawing_utils
-    styles = mp.solutions.drawing_styles
-
     # To resolve DB models lazily only when needed
     db_session = None
-    video_model = pose_data_model = None
-    video_record = None
+    video_id = None
     if save_db:
         try:
-            import sys
-            sys.path.insert(0, str(Path(__file__).parent.parent))
             from backend.database.connection import SessionLocal
-            from backend.models.schemas import Video as _Video, PoseData as _PoseData  # type: ignore
+            from backend.models.schemas import Video as _Video  # type: ignore
 
-            video_model, pose_data_model = _Video, _PoseData
             db_session = SessionLocal()
-            video_record = db_session.query(video_model).filter(video_model.file_path == str(Path(video_path))).first()
+            video_record = db_session.query(_Video).filter(_Video.file_path == str(Path(video_path))).first()
+            if video_record is None:
+                print(f"⚠️  Video not indexed, skipping DB save: {video_path}")
+            else:
+                video_id = video_record.id
         except Exception as e:
             print(f"⚠️  DB unavailable or video not indexed: {e}")
-            save_db = False
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        frame_count += 1
-
-        if target_width and frame.shape[1] > target_width:
-            scale = target_width / frame.shape[1]
-            frame = cv2.resize(frame, (int(frame.shape[1] * scale), int(frame.shape[0] * scale)), interpolation=cv2.INTER_AREA)
 
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        image.flags.writeable = False
+    outputs = []
+    if out_json_path is not None:
+        outputs.append(f"file:{landmark_format}:{out_json_path}")
+    if video_id is not None:
+        outputs.append(f"db:{db_storage}:{video_id}")
 
-        results = pose.process(image)
+    checkpoint = None
+    if resume and checkpoint_path is not None:
+        checkpoint = load_checkpoint(checkpoint_path, video_path, outputs)
+    resume_frame = checkpoint["last_frame"] if checkpoint else 0
+    sink_states = checkpoint["sinks"] if checkpoint else [None] * len(outputs)
 
-        det = results.pose_landmarks is not None
-        if det:
+    sinks = []
+    if out_json_path is not None:
+        meta = {"video_path": str(Path(video_path)), "fps": orig_fps}
+        sinks.append(open_file_sink(landmark_format, out_json_path, meta, chunk_size=chunk_size,
+                                    resume=sink_states[len(sinks)]))
+    if video_id is not None:
+        if db_storage == "segments":
+            sinks.append(SegmentSink(db_session, video_id, resume=sink_states[len(sinks)]))
+        else:
+            sinks.append(DbSink(db_session, video_id, chunk_size=chunk_size, resume=sink_states[len(sinks)]))
+
+    counts = {"decoded": 0, "detected": 0, "inferred": 0, "interpolated": 0, "roi": 0, "vis_sum": 0.0}
+    start_frame = 0
+    if checkpoint:
+        counts.update(checkpoint["counts"])
+        # 往回多解碼 warmup_frames 幀只做推論、不輸出，讓 MediaPipe 的追蹤與平滑狀態接得上
+        # （以 decode_every 為單位往回，之後處理的幀與中斷前相同）
+        start_frame = resume_frame - 1 - min(max(0, warmup_frames - 1), resume_frame - 1) // decode_every * decode_every
+        if cap is not None:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        print(f"⏩ Resuming after frame {resume_frame} (warm-up from frame {start_frame + 1})")
+        if encoder is not None:
+            print("⚠️  The overlay video only covers frames after the resume point")
+    frame_count = start_frame
+    decoded_count = counts["decoded"]
+    detected_count = counts["detected"]
+    vis_sum = counts["vis_sum"]
+
+    if source is not None:
+        source.start_frame = start_frame
+        frames = _decode_frames_ffmpeg(source, need_bgr=encoder is not None)
+    else:
+        frames = _decode_frames(cap, target_width, keep_full=roi, start_frame=start_frame, every=decode_every)
+    if pipelined:
+        frames = _threaded(frames, queue_size, name="pose-decode")
+
+    sampler = StrideSampler(stride=stride, adaptive=adaptive_stride, max_stride=max_stride)
+    skipped: List[tuple] = []  # 等待下一個 keyframe 才能內插的 (frame_number, timestamp, frame)
+    prev_keyframe: Optional[tuple] = None  # (frame_number, landmarks)
+    inferred_count = counts["inferred"]
+    interpolated_count = counts["interpolated"]
+    roi_count = counts["roi"]
+    roi_tracker = RoiTracker() if roi else None
+    last_checkpoint = resume_frame
+
+    def save_checkpoint(frame_number):
+        nonlocal last_checkpoint
+        write_checkpoint(checkpoint_path, {
+            "video_path": str(Path(video_path)),
+            "last_frame": frame_number,
+            "outputs": outputs,
+            "sinks": [sink.checkpoint(frame_number) for sink in sinks],
+            "counts": {
+                "decoded": decoded_count,
+                "detected": detected_count,
+                "inferred": inferred_count,
+                "interpolated": interpolated_count,
+                "roi": roi_count,
+                "vis_sum": vis_sum,
+            },
+        })
+        last_checkpoint = frame_number
+
+    def emit(frame_number, timestamp, frame, lm_list, interpolated, pose_landmarks):
+        nonlocal detected_count, interpolated_count
+        if lm_list is not None:
             detected_count += 1
-            lms = results.pose_landmarks.landmark
+            interpolated_count += interpolated
+            for sink in sinks:
+                sink.write(frame_number, timestamp, lm_list, interpolated)
+        if encoder is not None:
+            encoder.submit(frame, pose_landmarks)
+
+    def infer(frame_number, timestamp, frame, image, full, warmup=False):
+        nonlocal inferred_count, vis_sum, inference_seconds, inference_calls, prev_keyframe, roi_count
+        t_inf = time.perf_counter()
+        if roi_tracker is not None:
+            lm_list, used_roi = _infer_with_roi(pose, roi_tracker, image, full, roi_width)
+            roi_count += used_roi and not warmup
+            pose_landmarks = _landmark_proto(lm_list) if lm_list is not None and encoder is not None else None
+        else:
+            pose_landmarks = pose.process(image).pose_landmarks
+            lm_list = _landmark_dicts(pose_landmarks) if pose_landmarks is not None else None
+        inference_seconds += time.perf_counter() - t_inf
+        inference_calls += 1
+        if warmup:
+            # resume 前的幀已輸出過：只更新追蹤 / 取樣狀態
+            sampler.record(frame_number, lm_list)
+            prev_keyframe = (frame_number, lm_list)
+            return
+        inferred_count += 1
+
+        if lm_list is not None:
             # average visibility across critical joints
-            if lms:
-                vis_vals = [max(0.0, min(1.0, getattr(lms[i], "visibility", 0.0))) for i in CRITICAL_IDXS]
-                vis_sum += sum(vis_vals) / len(CRITICAL_IDXS)
-
-            if out_json_path is not None or save_db:
-                # Collect landmarks for JSON/DB
-                lm_list = [
-                    {
-                        "x": lm.x,
-                        "y": lm.y,
-                        "z": lm.z,
-                        "visibility": getattr(lm, "visibility", None),
-                    }
-                    for lm in lms
-                ]
-                per_frame_data.append(
-                    {
-                        "frame": frame_count,
-                        "timestamp": cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0,
-                        "landmarks": lm_list,
-                    }
-                )
+            vis_vals = [max(0.0, min(1.0, lm_list[i]["visibility"] or 0.0)) for i in CRITICAL_IDXS]
+            vis_sum += sum(vis_vals) / len(CRITICAL_IDXS)
+
+        # 跳過的幀：前後兩個 keyframe 都有偵測到人才內插，否則視為未偵測
+        for s_number, s_timestamp, s_frame in skipped:
+            interp = None
+            if prev_keyframe is not None and prev_keyframe[1] is not None and lm_list is not None:
+                t = (s_number - prev_keyframe[0]) / (frame_number - prev_keyframe[0])
+                interp = interpolate_landmarks(prev_keyframe[1], lm_list, t)
+            proto = _landmark_proto(interp) if interp is not None and encoder is not None else None
+            emit(s_number, s_timestamp, s_frame, interp, True, proto)
+        skipped.clear()
+
+        emit(frame_number, timestamp, frame, lm_list, False, pose_landmarks)
+        sampler.record(frame_number, lm_list)
+        prev_keyframe = (frame_number, lm_list)
+        # 此時 frame_number 以前的幀都已交給 sink，可以安全地記錄 checkpoint
+        if checkpoint_every and checkpoint_path is not None and sinks \
+                and frame_number - last_checkpoint >= checkpoint_every:
+            save_checkpoint(frame_number)
 
-        if out_video_path is not None:
-            # Draw overlay
-            annotated = frame.copy()
-            if det:
-                drawing.draw_landmarks(
-                    annotated,
-                    results.pose_landmarks,
-                    mp_pose.POSE_CONNECTIONS,
-                    landmark_drawing_spec=styles.get_default_pose_landmarks_style(),
+    try:
+        # Inference stays on this thread, in decode order: landmark order is deterministic
+        for frame_count, timestamp, frame, image, full in frames:
+            if frame_count <= resume_frame:
+                infer(frame_count, timestamp, frame, image, full, warmup=True)
+                continue
+            decoded_count += 1
+            if sampler.is_keyframe(frame_count):
+                infer(frame_count, timestamp, frame, image, full)
+            else:
+                skipped.append((frame_count, timestamp, frame))
+                last_inputs = (image, full)
+
+            if log_every and decoded_count % log_every == 0:
+                elapsed = max(1e-6, time.time() - t0)
+                print(f"  Frame {frame_count} - DetRate: {detected_count / decoded_count * 100:.1f}% | ProcFPS: {(frame_count - start_frame) / elapsed:.1f}")
+        if skipped:
+            # 最後一幀一定推論，讓結尾跳過的幀有內插的右端點
+            infer(*skipped.pop(), *last_inputs)
+    finally:
+        if hasattr(frames, "close"):
+            frames.close()
+        if cap is not None:
+            cap.release()
+        if source is not None:
+            source.close()
+        if owns_pose:
+            pose.close()
+        try:
+            if encoder is not None:
+                encoder.close()
+        finally:
+            # 已寫出的 chunk 保留；summary 欄位只在正常結束時有意義，但中斷時也要關檔
+            for sink in sinks:
+                sink.close(
+                    total_frames=frame_count,
+                    inferred_frames=inferred_count,
+                    interpolated_frames=interpolated_count,
                 )
-            # Init writer with frame size once
-            if isinstance(writer, tuple):
-                fourcc, fps, _ = writer
-                writer = cv2.VideoWriter(str(out_video_path), fourcc, fps, (annotated.shape[1], annotated.shape[0]))
-            writer.write(annotated)
-
-        if frame_count % 30 == 0:
-            elapsed = max(1e-6, time.time() - t0)
-            print(f"  Frame {frame_count} - DetRate: {detected_count / frame_count * 100:.1f}% | ProcFPS: {frame_count / elapsed:.1f}")
+            if db_session is not None:
+                db_session.close()
 
-    cap.release()
-    pose.close()
-    if isinstance(writer, cv2.VideoWriter):
-        writer.release()
+    if checkpoint_path is not None and checkpoint_path.exists():
+        checkpoint_path.unlink()
 
     elapsed = max(1e-6, time.time() - t0)
-    processing_fps = frame_count / elapsed
-    detection_rate = (detected_count / frame_count) * 100 if frame_count else 0.0
-    avg_visibility = (vis_sum / detected_count) if detected_count else 0.0
-
-    # Save JSON
-    if out_json_path is not None and per_frame_data:
-        out_payload = {
-            "video_path": str(Path(video_path)),
-            "total_frames": frame_count,
-            "fps": cap.get(cv2.CAP_PROP_FPS),
-            "data": per_frame_data,
-        }
-        with open(out_json_path, "w", encoding="utf-8") as f:
-            json.dump(out_payload, f, ensure_ascii=False)
-        print(f"💾 Saved landmarks JSON: {out_json_path}")
-
-    # Save DB (bulk)
-    if save_db and db_session and video_record and per_frame_data and pose_data_model is not None:
-        rows = [
-            pose_data_model(
-                video_id=video_record.id,
-                frame_number=fd["frame"],
-                timestamp=fd["timestamp"],
-                landmarks=fd["landmarks"],
-            )
-            for fd in per_frame_data
-        ]
-        db_session.bulk_save_objects(rows)
-        db_session.commit()
-        print(f"🗄️  Saved {len(rows)} frames to database (pose_data)")
+    processing_fps = (frame_count - start_frame) / elapsed
+    detection_rate = (detected_count / decoded_count) * 100 if decoded_count else 0.0
+    inferred_detected = detected_count - interpolated_count
+    avg_visibility = (vis_sum / inferred_detected) if inferred_detected else 0.0
+
+    for sink in sinks:
+        if isinstance(sink, (DbSink, SegmentSink)):
+            table = "pose_segments" if isinstance(sink, SegmentSink) else "pose_data"
+            print(f"🗄️  Saved {sink.count} frames to database ({table}, {sink.method}, "
+                  f"{sink.rows_per_second:.0f} frames/s)")
+        else:
+            print(f"💾 Saved {sink.count} frames of landmarks ({landmark_format}): {sink.path}")
 
     passed_detection = detection_rate > 95.0
     passed_fps = processing_fps > 30.0
@@ -256,6 +644,10 @@ def extract_and_visualize(
         passed_detection=passed_detection,
         passed_fps=passed_fps,
         passed_visibility=passed_visibility,
+        inference_fps=inference_calls / inference_seconds if inference_seconds else 0.0,
+        inferred_frames=inferred_count,
+        interpolated_frames=interpolated_count,
+        roi_frames=roi_count,
     )
 
 
@@ -266,7 +658,30 @@ def main():
     p.add_argument("--model-complexity", type=int, default=0, choices=[0, 1, 2], help="MediaPipe Pose model complexity (0=lite, 2=heavy)")
     p.add_argument("--out-video", action="store_true", help="Write visualization video to output/visualizations/")
     p.add_argument("--save-json", action="store_true", help="Save landmarks to output/landmarks/<name>_landmarks.json")
+    p.add_argument("--format", dest="landmark_format", choices=sorted(FILE_SUFFIXES), default="json",
+                   help="Landmark file format for --save-json: json, ndjson (line per frame), "
+                        "or binary (.lmk, memory-mappable float32 records)")
     p.add_argument("--db", action="store_true", help="Save per-frame landmarks into database pose_data table (if video indexed)")
+    p.add_argument("--roi", action="store_true",
+                   help="Track the boxer and run pose on a full-resolution crop around them instead of the whole frame")
+    p.add_argument("--roi-width", type=int, default=384, help="Longest side of the ROI crop fed to the model")
+    p.add_argument("--checkpoint-every", type=int, default=1800,
+                   help="Flush outputs and write a checkpoint every N frames (0 = off)")
+    p.add_argument("--resume", action="store_true", help="Continue from output/checkpoints/<name>.checkpoint.json if present")
+    p.add_argument("--db-storage", choices=["rows", "segments"], default="rows",
+                   help="--db target: pose_data (one row per frame) or pose_segments (packed frame ranges)")
+    p.add_argument("--pipeline", dest="pipelined", action="store_true", default=None,
+                   help="Overlap decode / inference / encode in separate threads (default: on when >1 CPU)")
+    p.add_argument("--no-pipeline", dest="pipelined", action="store_false", help="Run all stages serially on one thread")
+    p.add_argument("--decoder", choices=DECODERS, default="cv2",
+                   help="cv2: VideoCapture + resize; ffmpeg: scale and convert to RGB inside an ffmpeg subprocess")
+    p.add_argument("--decode-threads", type=int, default=None, help="ffmpeg decoder threads (default: ffmpeg's choice)")
+    p.add_argument("--decode-every", type=int, default=1,
+                   help="Only process every Nth frame (skipped frames get no landmarks)")
+    p.add_argument("--stride", type=int, default=1, help="Run pose every N frames; frames in between are interpolated")
+    p.add_argument("--adaptive-stride", action="store_true",
+                   help="Widen the stride while hands move slowly, back to every frame on fast wrist/elbow motion")
+    p.add_argument("--max-stride", type=int, default=4, help="Upper bound for --adaptive-stride")
     args = p.parse_args()
 
     video = args.video or auto_find_video()
@@ -275,7 +690,7 @@ def main():
         return
 
     print(f"📹 Processing: {video}")
-    out_video_path, out_json_path = make_output_paths(video, args.out_video, args.save_json)
+    out_video_path, out_json_path = make_output_paths(video, args.out_video, args.save_json, args.landmark_format)
 
     summary = extract_and_visualize(
         video,
@@ -284,14 +699,33 @@ def main():
         out_video_path=out_video_path,
         out_json_path=out_json_path,
         save_db=args.db,
+        pipelined=args.pipelined,
+        stride=args.stride,
+        adaptive_stride=args.adaptive_stride,
+        max_stride=args.max_stride,
+        landmark_format=args.landmark_format,
+        db_storage=args.db_storage,
+        roi=args.roi,
+        roi_width=args.roi_width,
+        checkpoint_path=make_checkpoint_path(video) if args.checkpoint_every or args.resume else None,
+        checkpoint_every=args.checkpoint_every,
+        resume=args.resume,
+        decoder=args.decoder,
+        decode_threads=args.decode_threads,
+        decode_every=args.decode_every,
     )
 
     print("\n" + "=" * 50)
     print("📊 Pose Extraction Summary")
     print(f"   Total frames: {summary.total_frames}")
     print(f"   Detected frames: {summary.detected_frames}")
+    if summary.inferred_frames != summary.total_frames:
+        print(f"   Inferred frames: {summary.inferred_frames} (interpolated {summary.interpolated_frames})")
+    if args.roi:
+        print(f"   ROI crop frames: {summary.roi_frames}/{summary.inferred_frames}")
     print(f"   Detection rate: {summary.detection_rate:.1f}%")
     print(f"   Processing FPS (avg): {summary.processing_fps:.1f}")
+    print(f"   Inference-only FPS (ceiling): {summary.inference_fps:.1f}")
     print(f"   Avg visibility (critical joints): {summary.avg_visibility:.2f}")
 
     ok = summary.passed_detection and summary.passed_fps
@@ -3,30 +3,48 @@ Video Scanning Script
 掃描 Midea 資料夾中的所有影片並記錄到資料庫
 """
 
+import os
 import sys
 import argparse
 from pathlib import Path
-import hashlib
 import cv2
 from datetime import datetime
 import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from sqlalchemy import bindparam, update
+from sqlalchemy.exc import IntegrityError
+
 from backend.database.connection import SessionLocal
 from backend.models.schemas import Video
+from backend.services.response_cache import bump_generation
+from backend.utils.fingerprint_cache import FingerprintCache, DEFAULT_CACHE_PATH, stat_fingerprint
+from backend.utils import hashing
+from backend.utils.media_probe import probe_video
+from backend.utils.perceptual_hash import (
+    HammingIndex, compute_video_phash, phash_available, phash_to_int,
+)
+from backend.utils.hashing import calculate_quick_hash
 
 def calculate_file_hash(file_path: str) -> str:
-    """計算檔案 SHA-256 hash"""
-    sha256_hash = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+    """計算檔案 SHA-256 hash（讀檔策略見 backend.utils.hashing）"""
+    return hashing.calculate_file_hash(file_path)
 
 def extract_video_info(file_path: str) -> dict:
-    """提取影片資訊"""
+    """提取影片資訊：先解析容器標頭（不開解碼器），不支援的格式才用 cv2"""
+    info = probe_video(file_path)
+    if info is not None:
+        return info
+
     cap = cv2.VideoCapture(file_path)
     
     info = {
@@ -65,23 +83,109 @@ def parse_filename(filename: str) -> dict:
 ALLOWED_VIDEO_SUFFIXES = {'.mp4', '.mov', '.avi'}  # Exclude images like .heic by default
 
 
-def scan_videos(directory: str = "./Midea", mode: str = "incremental"):
-    """掃描影片資料夾
-    mode: 'incremental'（預設）或 'full'。full 會重新處理已存在於 DB 的檔案並更新欄位。
+@dataclass
+class ScanStats:
+    """掃描統計（serial / parallel 共用）。
+
+    cancel_event / on_progress 供背景工作（backend.services.scan_jobs）取消掃描與回報進度。
+    phase_seconds 為各階段累計耗時（benchmark_scanner.py 使用）；平行模式下 hash / probe
+    在 worker 執行，主程序只記錄等待時間（pool_wait）。
     """
-    mode = (mode or "incremental").lower()
-    if mode not in {"incremental", "full"}:
-        print(f"⚠️  Unknown mode '{mode}', fallback to 'incremental'")
-        mode = "incremental"
+    new_count: int = 0
+    updated_count: int = 0
+    duplicate_in_run_count: int = 0
+    already_in_db_count: int = 0
+    error_count: int = 0
+    cache_hits: int = 0
+    files_hashed: int = 0
+    bytes_hashed: int = 0
+    total_files: int = 0
+    phash_count: int = 0
+    near_duplicate_count: int = 0
+    cancelled: bool = False
+    cancel_event: Optional[threading.Event] = field(default=None, repr=False)
+    on_progress: Optional[Callable[["ScanStats"], None]] = field(default=None, repr=False)
+    phase_seconds: Dict[str, float] = field(default_factory=dict, repr=False)
 
-    db = SessionLocal()
-    
-    # Use case-insensitive suffix filtering to avoid duplicates on Windows
-    allowed_suffixes = ALLOWED_VIDEO_SUFFIXES
-    base_path = Path(directory)
+    @property
+    def files_seen(self) -> int:
+        """已處理完成（任何結果）的檔案數"""
+        return (self.new_count + self.updated_count + self.already_in_db_count
+                + self.duplicate_in_run_count + self.error_count)
+
+    def should_stop(self) -> bool:
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            if not self.cancelled:
+                print("🛑 Scan cancelled")
+            self.cancelled = True
+        return self.cancelled
+
+    def hashed(self, path_str: str):
+        self.files_hashed += 1
+        try:
+            self.bytes_hashed += os.path.getsize(path_str)
+        except OSError:
+            pass
+
+    @contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + time.perf_counter() - t0
+
+    def tick(self):
+        if self.on_progress is not None:
+            self.on_progress(self)
+
+    def as_dict(self) -> dict:
+        return {
+            "files_total": self.total_files,
+            "files_seen": self.files_seen,
+            "files_hashed": self.files_hashed,
+            "bytes_hashed": self.bytes_hashed,
+            "inserted": self.new_count,
+            "updated": self.updated_count,
+            "already_in_db": self.already_in_db_count,
+            "duplicates": self.duplicate_in_run_count,
+            "errors": self.error_count,
+            "cache_hits": self.cache_hits,
+            "perceptual_hashes": self.phash_count,
+            "near_duplicates": self.near_duplicate_count,
+            "cancelled": self.cancelled,
+            "phase_seconds": {k: round(v, 3) for k, v in self.phase_seconds.items()},
+        }
+
+    def print_summary(self):
+        print("\n" + "=" * 50)
+        print("📊 Scan Summary:")
+        print(f"   New videos: {self.new_count}")
+        print(f"   Updated (full mode): {self.updated_count}")
+        print(f"   Already in DB: {self.already_in_db_count}")
+        print(f"   Duplicates in this run: {self.duplicate_in_run_count}")
+        print(f"   Errors: {self.error_count}")
+        print(f"   Fingerprint cache hits: {self.cache_hits}")
+        if self.phash_count:
+            print(f"   Perceptual hashes: {self.phash_count} (near duplicates: {self.near_duplicate_count})")
+        print(f"   Total processed: {self.total_files}")
+        if self.cancelled:
+            print("   ⚠️  Cancelled before completion")
 
+
+def detect_location(video_path: Path) -> str:
+    """依路徑判斷拍攝地點"""
+    if "LeYuan" in str(video_path) or "樂嫄" in str(video_path):
+        return "樂嫄運動空間"
+    if "拳擊基地" in str(video_path):
+        return "拳擊基地"
+    return "未知"
+
+
+def collect_video_files(base_path: Path) -> List[Path]:
+    """遞迴收集影片檔（副檔名不分大小寫），並去除重複路徑"""
     # Gather files once and filter by lower-cased suffix, then deduplicate paths
-    video_files = [p for p in base_path.rglob("*") if p.is_file() and p.suffix.lower() in allowed_suffixes]
+    video_files = [p for p in base_path.rglob("*") if p.is_file() and p.suffix.lower() in ALLOWED_VIDEO_SUFFIXES]
     # Ensure no duplicate paths (can happen on case-insensitive filesystems when globbing with mixed-case patterns)
     seen = set()
     deduped_files = []
@@ -91,124 +195,816 @@ def scan_videos(directory: str = "./Midea", mode: str = "incremental"):
             continue
         seen.add(key)
         deduped_files.append(p)
-    video_files = deduped_files
-    
-    print(f"📹 Found {len(video_files)} video files")
-    
-    new_count = 0
-    updated_count = 0
-    duplicate_in_run_count = 0
-    already_in_db_count = 0
-    error_count = 0
-    seen_hashes = set()
-    
-    for video_path in video_files:
-        try:
-            # 計算 hash
-            file_hash = calculate_file_hash(str(video_path))
-            
-            # 先檢查是否在本次執行內重複
-            if file_hash in seen_hashes:
-                print(f"⏭️  Skip (duplicate in this run): {video_path.name}")
-                duplicate_in_run_count += 1
-                continue
+    return deduped_files
 
-            # 檢查資料庫是否已有紀錄
-            existing = db.query(Video).filter(Video.file_hash == file_hash).first()
-            if existing:
-                if mode == "incremental":
-                    print(f"⏭️  Already indexed (in DB): {video_path.name}")
-                    already_in_db_count += 1
-                    continue
+
+HASH_BENCHMARK_BUDGET_BYTES = 256 * 1024 * 1024
+HASH_BENCHMARK_MAX_FILES = 3
+
+
+def choose_hash_strategy(requested: str, video_files: List[Path]) -> str:
+    """設定 hash 讀檔策略；'auto' 且本機尚未量測過時，取部分待掃描檔案做一次 benchmark。
+
+    取樣挑選預算內最大的幾個檔案，避免小檔的固定成本主導結果。
+    """
+    if requested == "auto" and hashing.load_saved_strategy() is None and video_files:
+        sample, budget = [], HASH_BENCHMARK_BUDGET_BYTES
+        for size, p in sorted(((p.stat().st_size, p) for p in video_files), reverse=True):
+            if size <= budget:
+                sample.append(str(p))
+                budget -= size
+            if len(sample) >= HASH_BENCHMARK_MAX_FILES:
+                break
+        if sample:
+            fastest, results = hashing.select_fastest_strategy(sample)
+            rates = ", ".join(f"{k}={v:.0f} MB/s" for k, v in results.items())
+            print(f"⏱️  Hash strategy benchmark: {rates} -> {fastest}")
+            return fastest
+    hashing.set_default_strategy(requested)
+    return hashing.get_default_strategy()
+
+
+def _hash_worker(path_str: str, hash_mode: str = "full") -> Tuple[Optional[str], str]:
+    """Process pool 工作：計算 (完整 hash 或 None, quick hash)"""
+    file_hash = calculate_file_hash(path_str) if hash_mode == "full" else None
+    return file_hash, calculate_quick_hash(path_str)
+
+
+def _probe_worker(path_str: str) -> Tuple[dict, int]:
+    """Process pool 工作：擷取影片資訊與檔案大小"""
+    return extract_video_info(path_str), os.stat(path_str).st_size
+
+
+def _phash_worker(path_str: str) -> str:
+    """Process pool 工作：計算感知雜湊（videohash 會呼叫 ffmpeg 擷取畫面）"""
+    return compute_video_phash(path_str)
+
+
+class DedupIndex:
+    """本次掃描的去重狀態。
+
+    known_hashes 為 DB 既有的完整 hash，seen_hashes 為本次已排入寫入的 hash；
+    quick 索引為 quick_hash -> [[file_path, file_hash 或 None, in_db], ...]，供 tiered 模式使用。
+    """
+
+    def __init__(self, known_hashes=(), quick_rows=()):
+        self.known_hashes = set(known_hashes)
+        self.seen_hashes = set()
+        self._by_quick = defaultdict(list)
+        self._reserved: List[list] = []
+        for quick_hash, file_path, file_hash in quick_rows:
+            self._by_quick[quick_hash].append([file_path, file_hash, True])
+
+    @classmethod
+    def load(cls, db) -> Tuple["DedupIndex", List[tuple]]:
+        """一次載入 DB 內所有 hash（單一 round trip），取代逐檔查詢。
+
+        另外回傳尚無 quick_hash 的舊紀錄 (id, file_path, file_hash)，供 tiered 模式補算。
+        """
+        known, quick_rows, legacy = [], [], []
+        for vid, file_path, file_hash, quick_hash in db.query(
+            Video.id, Video.file_path, Video.file_hash, Video.quick_hash
+        ).yield_per(10000):
+            if file_hash:
+                known.append(file_hash)
+            if quick_hash:
+                quick_rows.append((quick_hash, file_path, file_hash))
+            else:
+                legacy.append((vid, file_path, file_hash))
+        return cls(known, quick_rows), legacy
+
+    def add_quick(self, quick_hash: str, file_path: str, file_hash: Optional[str], in_db: bool = True):
+        self._by_quick[quick_hash].append([file_path, file_hash, in_db])
+
+    def resolve(self, file_hash: str, mode: str) -> str:
+        """以完整 hash 決定處理方式：'duplicate' / 'skip' / 'update' / 'insert'"""
+        # 先檢查是否在本次執行內重複
+        if file_hash in self.seen_hashes:
+            return "duplicate"
+
+        # 檢查資料庫是否已有紀錄（預先載入的 hash 集合）
+        if file_hash in self.known_hashes:
+            return "skip" if mode == "incremental" else "update"
+        return "insert"
+
+    def resolve_quick(self, video_path: Path, quick_hash: str) -> str:
+        """tier-1 判斷：'skip'（DB 內同路徑且 quick hash 相同）、'insert'（quick hash 未出現過，
+        內容必定不同），其餘為 'collision'，需以完整 hash 確認"""
+        entries = self._by_quick.get(quick_hash)
+        if not entries:
+            return "insert"
+        if any(in_db and path == str(video_path) for path, _, in_db in entries):
+            return "skip"
+        return "collision"
+
+    def unhashed_peers(self, quick_hash: str) -> List[list]:
+        return [e for e in self._by_quick.get(quick_hash, ()) if e[1] is None]
+
+    def set_peer_hash(self, peer: list, file_hash: str):
+        peer[1] = file_hash
+        (self.known_hashes if peer[2] else self.seen_hashes).add(file_hash)
+
+    def reserve(self, video_path: Path, file_hash: Optional[str], quick_hash: Optional[str]):
+        """排入寫入前先佔位，避免同內容的檔案被重複排入"""
+        if file_hash:
+            self.seen_hashes.add(file_hash)
+        if quick_hash:
+            self.add_quick(quick_hash, str(video_path), file_hash, in_db=False)
+            self._reserved.append(self._by_quick[quick_hash][-1])
+
+    def release(self, video_path: Path, file_hash: Optional[str], quick_hash: Optional[str]):
+        """寫入失敗時撤銷佔位"""
+        self.seen_hashes.discard(file_hash)
+        entries = self._by_quick.get(quick_hash)
+        if entries:
+            entries[:] = [e for e in entries if e[2] or e[0] != str(video_path)]
+
+    def mark_written(self, file_hash: Optional[str]):
+        if file_hash:
+            self.known_hashes.add(file_hash)
+
+    def settle(self):
+        """一批寫入完成後呼叫（watch 模式跨批沿用同一個 index）：本批排入的列視為 DB 既有紀錄，
+        之後再次出現的同內容 / 同路徑檔案回報為 already 而不是本次執行內的 duplicate"""
+        self.known_hashes |= self.seen_hashes
+        self.seen_hashes.clear()
+        for entry in self._reserved:
+            entry[2] = True
+        self._reserved.clear()
+
+
+def build_video_row(video_path: Path, file_hash: Optional[str], video_info: dict, file_size: int,
+                    quick_hash: Optional[str] = None) -> dict:
+    """組出 videos 表的一列（不含 id / upload_date，由預設值或既有紀錄決定）"""
+    file_metadata = parse_filename(video_path.name)
+    return dict(
+        file_path=str(video_path),
+        file_hash=file_hash,
+        quick_hash=quick_hash,
+        duration_seconds=video_info['duration_seconds'],
+        fps=video_info['fps'],
+        resolution=video_info['resolution'],
+        file_size_bytes=file_size,
+        processing_status="pending",
+        training_date=file_metadata.get('training_date'),
+        training_type=file_metadata.get('training_type'),
+        location=detect_location(video_path),
+    )
+
+
+class VideoBatchWriter:
+    """批次寫入 videos：新增以 INSERT ... ON CONFLICT (file_hash) DO NOTHING、full 模式的更新以
+    ON CONFLICT (file_hash) DO UPDATE 一次送出 batch_size 筆。
+
+    整批失敗時 rollback 並改為逐筆寫入，單一壞檔不會連累同批其他檔案。
+    full 模式的更新會保留原有 id / upload_date / user_id / s3_url。
+    """
+
+    UPDATE_COLUMNS = (
+        "file_path", "quick_hash", "duration_seconds", "fps", "resolution", "file_size_bytes",
+        "processing_status", "training_date", "training_type", "location",
+    )
+
+    def __init__(self, db, stats: ScanStats, index: DedupIndex, batch_size: int = 100):
+        self.db = db
+        self.stats = stats
+        self.index = index
+        self.batch_size = max(1, batch_size)
+        self._pending: List[Tuple[str, Path, dict]] = []
+
+    def add(self, action: str, video_path: Path, row: dict):
+        self._pending.append((action, video_path, row))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def _insert_construct(self):
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            return None
+        return insert
+
+    def _write_rows(self, batch: List[Tuple[str, Path, dict]]) -> Set[str]:
+        """寫入一批並 commit；回傳因 file_hash 已在 DB 而略過的新增列。
+
+        新增一律 ON CONFLICT DO NOTHING：記憶體中的 index 可能已過時（watch 模式、同時執行的其他掃描），
+        不能讓重複內容的新檔把既有紀錄的 file_path / processing_status 改掉。只有 full 模式的 update 才覆寫。
+        """
+        table = Video.__table__
+        inserts = [row for action, _, row in batch if action != "update"]
+        updates = [row for action, _, row in batch if action == "update"]
+        skipped: Set[str] = set()
+        insert = self._insert_construct()
+        if insert is not None:
+            if inserts:
+                stmt = insert(table).on_conflict_do_nothing(index_elements=[table.c.file_hash])
+                written = set(self.db.execute(stmt.returning(table.c.file_hash), inserts).scalars())
+                skipped = {row["file_hash"] for row in inserts if row["file_hash"]} - written
+            if updates:
+                stmt = insert(table)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[table.c.file_hash],
+                    set_={col: stmt.excluded[col] for col in self.UPDATE_COLUMNS},
+                )
+                self.db.execute(stmt, updates)
+        else:
+            for action, _, row in batch:
+                existing = None
+                if row["file_hash"]:
+                    existing = self.db.query(Video).filter(Video.file_hash == row["file_hash"]).first()
+                if existing is None:
+                    self.db.add(Video(**row))
+                elif action != "update":
+                    skipped.add(row["file_hash"])
                 else:
-                    # full 模式：重新擷取資訊並更新現有紀錄
-                    print(f"🔁 Reprocessing (full mode): {video_path.name}")
-                    video_info = extract_video_info(str(video_path))
-                    file_metadata = parse_filename(video_path.name)
-
-                    # 判斷位置
-                    location = "未知"
-                    if "LeYuan" in str(video_path) or "樂嫄" in str(video_path):
-                        location = "樂嫄運動空間"
-                    elif "拳擊基地" in str(video_path):
-                        location = "拳擊基地"
-
-                    # 更新欄位（保留原有 id / upload_date）
-                    existing.file_path = str(video_path)
-                    existing.duration_seconds = video_info['duration_seconds']
-                    existing.fps = video_info['fps']
-                    existing.resolution = video_info['resolution']
-                    existing.file_size_bytes = video_path.stat().st_size
-                    existing.processing_status = "pending"
-                    existing.training_date = file_metadata.get('training_date')
-                    existing.training_type = file_metadata.get('training_type')
-                    existing.location = location
-
-                    db.add(existing)
-                    db.commit()
-
-                    seen_hashes.add(file_hash)
-                    print(f"✅ Updated: {video_path.name}")
-                    updated_count += 1
-                    continue
-            
-            # 提取影片資訊
-            print(f"📊 Processing: {video_path.name}")
-            video_info = extract_video_info(str(video_path))
-            file_metadata = parse_filename(video_path.name)
-            
-            # 判斷位置
-            location = "未知"
-            if "LeYuan" in str(video_path) or "樂嫄" in str(video_path):
-                location = "樂嫄運動空間"
-            elif "拳擊基地" in str(video_path):
-                location = "拳擊基地"
-            
-            # 建立記錄
-            video = Video(
-                file_path=str(video_path),
-                file_hash=file_hash,
-                duration_seconds=video_info['duration_seconds'],
-                fps=video_info['fps'],
-                resolution=video_info['resolution'],
-                file_size_bytes=video_path.stat().st_size,
-                processing_status="pending",
-                training_date=file_metadata.get('training_date'),
-                training_type=file_metadata.get('training_type'),
-                location=location
+                    for col in self.UPDATE_COLUMNS:
+                        setattr(existing, col, row[col])
+        self.db.commit()
+        bump_generation()  # GET /api/v1/videos 的快取失效
+        return skipped
+
+    def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        with self.stats.phase("db_write"):
+            self._flush_batch(batch)
+
+    def _flush_batch(self, batch: List[Tuple[str, Path, dict]]):
+        try:
+            skipped = self._write_rows(batch)
+            for action, video_path, row in batch:
+                self._written(action, video_path, row, skipped)
+            return
+        except Exception as e:
+            self.db.rollback()
+            if len(batch) > 1:
+                print(f"⚠️  Batch of {len(batch)} failed ({type(e).__name__}); retrying row by row")
+
+        for item in batch:
+            action, video_path, row = item
+            try:
+                skipped = self._write_rows([item])
+                self._written(action, video_path, row, skipped)
+            except Exception as e:
+                self.db.rollback()
+                self.index.release(video_path, row["file_hash"], row["quick_hash"])
+                print(f"❌ Error processing {video_path.name}: {e}")
+                self.stats.error_count += 1
+
+    def _written(self, action: str, video_path: Path, row: dict, skipped: Set[str]):
+        self.index.mark_written(row["file_hash"])
+        if row["file_hash"] in skipped:
+            print(f"⏭️  Already indexed (written by another scan): {video_path.name}")
+            self.stats.already_in_db_count += 1
+            return
+        _report_written(action, video_path, self.stats)
+
+    def backfill_file_hash(self, file_path: str, quick_hash: str, file_hash: str) -> bool:
+        """為尚無完整 hash 的紀錄補上 file_hash（先 flush，確保本次排入的列已寫入）"""
+        self.flush()
+        try:
+            self.db.execute(
+                update(Video)
+                .where(Video.file_path == file_path, Video.quick_hash == quick_hash, Video.file_hash.is_(None))
+                .values(file_hash=file_hash)
             )
-            
-            db.add(video)
+            self.db.commit()
+            bump_generation()
+            return True
+        except Exception as e:
+            self.db.rollback()
+            print(f"⚠️  Could not backfill file_hash for {Path(file_path).name}: {type(e).__name__}")
+            return False
+
+
+def backfill_quick_hashes(db, index: DedupIndex, legacy_rows: List[tuple], batch_size: int = 100):
+    """為沒有 quick_hash 的舊紀錄補算 tier-1 指紋（只讀取取樣區塊），讓 tiered 模式的判斷完整"""
+    updates = []
+    for vid, file_path, file_hash in legacy_rows:
+        try:
+            quick_hash = calculate_quick_hash(file_path)
+        except OSError:
+            continue
+        updates.append({"_id": vid, "_quick_hash": quick_hash})
+        index.add_quick(quick_hash, file_path, file_hash)
+    if not updates:
+        return
+    stmt = (
+        update(Video.__table__)
+        .where(Video.__table__.c.id == bindparam("_id"))
+        .values(quick_hash=bindparam("_quick_hash"))
+    )
+    for i in range(0, len(updates), batch_size):
+        db.execute(stmt, updates[i:i + batch_size])
+        db.commit()
+    print(f"🧮 Backfilled quick_hash for {len(updates)} existing videos")
+
+
+def backfill_file_hashes(batch_size: int = 100) -> int:
+    """背景補算 tiered 掃描延後的完整 SHA-256（file_hash 為 NULL 的紀錄）"""
+    db = SessionLocal()
+    filled = 0
+    try:
+        rows = db.query(Video.id, Video.file_path).filter(Video.file_hash.is_(None)).all()
+        print(f"🧮 Videos without file_hash: {len(rows)}")
+        for i in range(0, len(rows), batch_size):
+            for vid, file_path in rows[i:i + batch_size]:
+                try:
+                    file_hash = calculate_file_hash(file_path)
+                except OSError as e:
+                    print(f"❌ Cannot read {Path(file_path).name}: {e}")
+                    continue
+                try:
+                    with db.begin_nested():
+                        db.execute(update(Video).where(Video.id == vid).values(file_hash=file_hash))
+                    filled += 1
+                except IntegrityError:
+                    print(f"⚠️  {Path(file_path).name} duplicates an existing video (same SHA-256)")
             db.commit()
-            
-            seen_hashes.add(file_hash)
-            print(f"✅ Added: {video_path.name}")
-            new_count += 1
-            
+            bump_generation()
+    finally:
+        db.close()
+    print(f"✅ Backfilled file_hash for {filled} videos")
+    return filled
+
+
+def load_phash_index(db) -> "HammingIndex[str]":
+    """DB 內既有的感知雜湊（file_path 為 payload）"""
+    rows = db.query(Video.file_path, Video.perceptual_hash).filter(Video.perceptual_hash.isnot(None))
+    return HammingIndex((phash_to_int(phash), file_path) for file_path, phash in rows)
+
+
+def compute_perceptual_hashes(video_files: Optional[List[Path]] = None, workers: int = 1,
+                              batch_size: int = 100, stats: Optional[ScanStats] = None,
+                              index: Optional["HammingIndex[str]"] = None) -> int:
+    """感知雜湊階段：替尚無 perceptual_hash 的影片計算雜湊，並回報與既有影片的近似重複。
+
+    video_files 為 None 時處理 DB 中所有缺少雜湊的影片（backfill）。
+    index：沿用呼叫端的 HammingIndex（watch 模式跨批共用，本次算出的雜湊會加入其中），未提供時從 DB 載入。
+    近似重複（重新編碼、改解析度、略剪）只回報不跳過，由人工或報表決定是否刪除。
+    """
+    if not phash_available():
+        print("⚠️  videohash / ffmpeg not available; skipping perceptual hashes")
+        return 0
+    stats = stats if stats is not None else ScanStats()
+    db = SessionLocal()
+    try:
+        if index is None:
+            index = load_phash_index(db)
+        todo = db.query(Video.id, Video.file_path).filter(Video.perceptual_hash.is_(None)).all()
+        if video_files is not None:
+            wanted = {str(p) for p in video_files}
+            todo = [(vid, file_path) for vid, file_path in todo if file_path in wanted]
+        if not todo:
+            return 0
+        print(f"🪞 Computing perceptual hashes for {len(todo)} videos")
+
+        stmt = (
+            update(Video.__table__)
+            .where(Video.__table__.c.id == bindparam("_id"))
+            .values(perceptual_hash=bindparam("_phash"))
+        )
+        pending_rows = []
+
+        def record(vid, file_path, phash):
+            name = Path(file_path).name
+            for distance, other in index.search(phash_to_int(phash)):
+                print(f"🪞 Near duplicate: {name} ≈ {Path(other).name} (distance {distance})")
+                stats.near_duplicate_count += 1
+            index.add(phash_to_int(phash), file_path)
+            pending_rows.append({"_id": vid, "_phash": phash})
+            stats.phash_count += 1
+            if len(pending_rows) >= batch_size:
+                db.execute(stmt, pending_rows)
+                db.commit()
+                bump_generation()
+                pending_rows.clear()
+
+        if workers and workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(_phash_worker, file_path): (vid, file_path) for vid, file_path in todo}
+                for fut in futures:
+                    vid, file_path = futures[fut]
+                    if stats.should_stop():
+                        for other in futures:
+                            other.cancel()
+                        break
+                    try:
+                        record(vid, file_path, fut.result())
+                    except Exception as e:
+                        print(f"❌ Perceptual hash failed for {Path(file_path).name}: {e}")
+        else:
+            for vid, file_path in todo:
+                if stats.should_stop():
+                    break
+                try:
+                    record(vid, file_path, compute_video_phash(file_path))
+                except Exception as e:
+                    print(f"❌ Perceptual hash failed for {Path(file_path).name}: {e}")
+        if pending_rows:
+            db.execute(stmt, pending_rows)
+            db.commit()
+            bump_generation()
+    finally:
+        db.close()
+    return stats.phash_count
+
+
+def _report_action(action: str, video_path: Path, stats: ScanStats):
+    if action == "duplicate":
+        print(f"⏭️  Skip (duplicate in this run): {video_path.name}")
+        stats.duplicate_in_run_count += 1
+    elif action == "skip":
+        print(f"⏭️  Already indexed (in DB): {video_path.name}")
+        stats.already_in_db_count += 1
+    elif action == "update":
+        print(f"🔁 Reprocessing (full mode): {video_path.name}")
+    else:
+        print(f"📊 Processing: {video_path.name}")
+
+
+def _report_written(action: str, video_path: Path, stats: ScanStats):
+    if action == "update":
+        print(f"✅ Updated: {video_path.name}")
+        stats.updated_count += 1
+    else:
+        print(f"✅ Added: {video_path.name}")
+        stats.new_count += 1
+
+
+def _cached_hashes(cache: Optional[FingerprintCache], video_path: Path, mode: str, stats: ScanStats):
+    """以 stat 指紋查詢快取；回傳 (CachedHashes 或 None, fingerprint)。
+
+    只有 incremental 模式會採用快取的 hash；full 模式一律重新計算並刷新快取。
+    """
+    if cache is None:
+        return None, None
+    fingerprint, _ = stat_fingerprint(video_path)
+    cached = cache.get(fingerprint) if mode == "incremental" else None
+    if cached is not None:
+        stats.cache_hits += 1
+    return cached, fingerprint
+
+
+def _hash_unhashed_peers(writer: VideoBatchWriter, video_path: Path, quick_hash: str, file_hash: str):
+    """同 quick hash 但尚無完整 hash 的紀錄（tiered 掃描留下的）先補算，才能以完整 hash 比對"""
+    for peer in writer.index.unhashed_peers(quick_hash):
+        if peer[0] == str(video_path):
+            peer_hash = file_hash
+        elif os.path.exists(peer[0]):
+            peer_hash = calculate_file_hash(peer[0])
+        else:
+            continue
+        writer.index.set_peer_hash(peer, peer_hash)
+        writer.backfill_file_hash(peer[0], quick_hash, peer_hash)
+
+
+def _classify(writer: VideoBatchWriter, video_path: Path, mode: str, hash_mode: str,
+              file_hash: Optional[str], quick_hash: Optional[str]) -> str:
+    """決定處理方式；tiered 模式下 tier-1 碰撞且尚無完整 hash 時回傳 'need_full'"""
+    index = writer.index
+    if hash_mode == "tiered":
+        verdict = index.resolve_quick(video_path, quick_hash)
+        if verdict != "collision":
+            return verdict
+        if file_hash is None:
+            return "need_full"
+    if quick_hash:
+        _hash_unhashed_peers(writer, video_path, quick_hash, file_hash)
+    return index.resolve(file_hash, mode)
+
+
+def _scan_serial(writer: VideoBatchWriter, video_files: List[Path], mode: str, stats: ScanStats,
+                 cache: Optional[FingerprintCache] = None, hash_mode: str = "full"):
+    for video_path in video_files:
+        if stats.should_stop():
+            break
+        try:
+            # 計算 hash（指紋未變時直接沿用快取）
+            with stats.phase("stat_cache"):
+                cached, fingerprint = _cached_hashes(cache, video_path, mode, stats)
+            file_hash, quick_hash = cached if cached else (None, None)
+            if quick_hash is None or (file_hash is None and hash_mode == "full"):
+                with stats.phase("hash"):
+                    file_hash, quick_hash = _hash_worker(str(video_path), hash_mode)
+                stats.hashed(str(video_path))
+            action = _classify(writer, video_path, mode, hash_mode, file_hash, quick_hash)
+            if action == "need_full":
+                with stats.phase("hash"):
+                    file_hash = calculate_file_hash(str(video_path))
+                action = _classify(writer, video_path, mode, hash_mode, file_hash, quick_hash)
+            if cache is not None and cached != (file_hash, quick_hash):
+                cache.put(fingerprint, file_hash, quick_hash)
+
+            _report_action(action, video_path, stats)
+            if action in ("duplicate", "skip"):
+                continue
+
+            # 提取影片資訊並排入批次寫入
+            with stats.phase("probe"):
+                video_info = extract_video_info(str(video_path))
+            row = build_video_row(video_path, file_hash, video_info, video_path.stat().st_size, quick_hash)
+            writer.index.reserve(video_path, file_hash, quick_hash)
+            writer.add(action, video_path, row)
+
         except Exception as e:
             print(f"❌ Error processing {video_path.name}: {e}")
-            error_count += 1
+            stats.error_count += 1
             continue
-    
-    db.close()
-    
-    print("\n" + "=" * 50)
-    print("📊 Scan Summary:")
-    print(f"   New videos: {new_count}")
-    print(f"   Updated (full mode): {updated_count}")
-    print(f"   Already in DB: {already_in_db_count}")
-    print(f"   Duplicates in this run: {duplicate_in_run_count}")
-    print(f"   Errors: {error_count}")
-    print(f"   Total processed: {len(video_files)}")
+        finally:
+            stats.tick()
+
+
+def _scan_parallel(writer: VideoBatchWriter, video_files: List[Path], mode: str, stats: ScanStats,
+                   workers: int, cache: Optional[FingerprintCache] = None, hash_mode: str = "full",
+                   hash_strategy: str = "readinto"):
+    """hash / 影片資訊擷取交給 process pool，由主程序單一 writer 寫入 DB。
+
+    hash 完成後立即在主程序判斷去重（seen_hashes / DB），只有需要寫入的檔案才會
+    再送去擷取影片資訊，因此 incremental 模式下已索引的檔案不會被 cv2 開啟。
+    指紋快取命中的檔案不進 pool，直接在主程序判斷。
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=hashing.set_default_strategy,
+                             initargs=(hash_strategy,)) as pool:
+        pending = {}
+
+        def on_hashes(video_path: Path, fingerprint, file_hash: Optional[str], quick_hash: str):
+            action = _classify(writer, video_path, mode, hash_mode, file_hash, quick_hash)
+            if action == "need_full":
+                fut = pool.submit(_hash_worker, str(video_path), "full")
+                pending[fut] = ("hash", video_path, fingerprint, None)
+                return
+            if cache is not None:
+                cache.put(fingerprint, file_hash, quick_hash)
+            _report_action(action, video_path, stats)
+            if action in ("duplicate", "skip"):
+                return
+            writer.index.reserve(video_path, file_hash, quick_hash)
+            probe_fut = pool.submit(_probe_worker, str(video_path))
+            pending[probe_fut] = ("probe", video_path, (file_hash, quick_hash), action)
+
+        for video_path in video_files:
+            if stats.should_stop():
+                break
+            try:
+                with stats.phase("stat_cache"):
+                    cached, fingerprint = _cached_hashes(cache, video_path, mode, stats)
+                if cached and cached.quick_hash and (cached.file_hash or hash_mode == "tiered"):
+                    on_hashes(video_path, fingerprint, *cached)
+                    continue
+            except Exception as e:
+                print(f"❌ Error processing {video_path.name}: {e}")
+                stats.error_count += 1
+                continue
+            fut = pool.submit(_hash_worker, str(video_path), hash_mode)
+            pending[fut] = ("hash", video_path, fingerprint, None)
+
+        while pending:
+            if stats.should_stop():
+                for fut in pending:
+                    fut.cancel()
+                break
+            with stats.phase("pool_wait"):
+                done, _ = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            for fut in done:
+                stage, video_path, extra, action = pending.pop(fut)
+                try:
+                    if stage == "hash":
+                        result = fut.result()
+                        stats.hashed(str(video_path))
+                        on_hashes(video_path, extra, *result)
+                    else:
+                        file_hash, quick_hash = extra
+                        video_info, file_size = fut.result()
+                        row = build_video_row(video_path, file_hash, video_info, file_size, quick_hash)
+                        writer.add(action, video_path, row)
+                except Exception as e:
+                    if stage == "probe":
+                        writer.index.release(video_path, *extra)
+                    print(f"❌ Error processing {video_path.name}: {e}")
+                    stats.error_count += 1
+            stats.tick()
+
+
+def _normalize_modes(mode: str, hash_mode: str) -> Tuple[str, str]:
+    mode = (mode or "incremental").lower()
+    if mode not in {"incremental", "full"}:
+        print(f"⚠️  Unknown mode '{mode}', fallback to 'incremental'")
+        mode = "incremental"
+    if hash_mode not in {"full", "tiered"}:
+        print(f"⚠️  Unknown hash mode '{hash_mode}', fallback to 'full'")
+        hash_mode = "full"
+    if hash_mode == "tiered" and mode == "full":
+        print("⚠️  Tiered hashing only applies to incremental scans; using full hashes")
+        hash_mode = "full"
+    return mode, hash_mode
+
+
+def _scan_batch(writer: VideoBatchWriter, video_files: List[Path], mode: str, workers: int,
+                cache: Optional[FingerprintCache], hash_mode: str, hash_strategy: str):
+    """以既有的 writer / index / 快取掃描一批檔案並寫入（統計記在 writer.stats）"""
+    if workers and workers > 1:
+        _scan_parallel(writer, video_files, mode, writer.stats, workers, cache=cache, hash_mode=hash_mode,
+                       hash_strategy=hash_strategy)
+    else:
+        _scan_serial(writer, video_files, mode, writer.stats, cache=cache, hash_mode=hash_mode)
+    writer.flush()
+
+
+def scan_files(video_files: List[Path], mode: str = "incremental", workers: int = 1,
+               use_cache: bool = True, cache_path: str = DEFAULT_CACHE_PATH, batch_size: int = 100,
+               hash_mode: str = "full", hash_strategy: str = "auto", phash: bool = False,
+               quiet_summary: bool = False, stats: Optional[ScanStats] = None) -> ScanStats:
+    """索引指定的影片檔清單（參數同 scan_videos），供整棵樹掃描與 watch 模式共用"""
+    mode, hash_mode = _normalize_modes(mode, hash_mode)
+    stats = stats if stats is not None else ScanStats()
+
+    with stats.phase("hash_strategy"):
+        hash_strategy = choose_hash_strategy(hash_strategy, video_files)
+    if not quiet_summary:
+        print(f"#️⃣  Hash strategy: {hash_strategy}")
+
+    db = SessionLocal()
+    stats.total_files = len(video_files)
+    cache = FingerprintCache(cache_path) if use_cache else None
+    try:
+        with stats.phase("load_index"):
+            index, legacy_rows = DedupIndex.load(db)
+            if hash_mode == "tiered" and legacy_rows:
+                backfill_quick_hashes(db, index, legacy_rows, batch_size=batch_size)
+        writer = VideoBatchWriter(db, stats, index, batch_size=batch_size)
+        _scan_batch(writer, video_files, mode, workers, cache, hash_mode, hash_strategy)
+    finally:
+        if cache is not None:
+            cache.close()
+        db.close()
+
+    if phash and not stats.should_stop():
+        with stats.phase("phash"):
+            compute_perceptual_hashes(video_files, workers=workers, batch_size=batch_size, stats=stats)
+
+    if not quiet_summary:
+        stats.print_summary()
+    return stats
+
+
+def scan_videos(directory: str = "./Midea", mode: str = "incremental", workers: int = 1,
+                use_cache: bool = True, cache_path: str = DEFAULT_CACHE_PATH, batch_size: int = 100,
+                hash_mode: str = "full", hash_strategy: str = "auto", phash: bool = False,
+                stats: Optional[ScanStats] = None):
+    """掃描影片資料夾
+    mode: 'incremental'（預設）或 'full'。full 會重新處理已存在於 DB 的檔案並更新欄位。
+    workers: >1 時以 process pool 平行計算 hash 與擷取影片資訊，DB 寫入仍由單一 writer 負責。
+    use_cache: 使用 stat 指紋快取（cache_path），incremental 模式下未變更的檔案不重新計算 hash。
+    batch_size: 每批 upsert 的筆數；DB 既有 hash 於開始時一次載入。
+    hash_mode: 'full'（預設，每個檔案計算完整 SHA-256）或 'tiered'（先比對取樣指紋 quick_hash，
+        只有 tier-1 碰撞時才計算完整 hash；其餘新檔的 file_hash 留待 backfill_file_hashes 補算）。
+        tiered 僅適用 incremental 模式。
+    hash_strategy: 完整 hash 的讀檔策略（readinto / mmap / file_digest），'auto' 使用本機 benchmark 結果。
+    phash: 掃描後替本次檔案計算感知雜湊並回報近似重複（重新編碼 / 略剪的同一段影片）；需要 videohash 與 ffmpeg。
+    stats: 外部提供的 ScanStats（可帶 cancel_event / on_progress），未提供時自行建立。
+    """
+    stats = stats if stats is not None else ScanStats()
+    # Use case-insensitive suffix filtering to avoid duplicates on Windows
+    with stats.phase("collect"):
+        video_files = collect_video_files(Path(directory))
+
+    print(f"📹 Found {len(video_files)} video files")
+
+    return scan_files(
+        video_files,
+        mode=mode,
+        workers=workers,
+        use_cache=use_cache,
+        cache_path=cache_path,
+        batch_size=batch_size,
+        hash_mode=hash_mode,
+        hash_strategy=hash_strategy,
+        phash=phash,
+        stats=stats,
+    )
+
+
+def watch_videos(directory: str = "./Midea", settle_seconds: float = 5.0, poll_interval: float = 2.0,
+                 force_polling: bool = False, initial_scan: bool = True, stop_event=None, workers: int = 1,
+                 use_cache: bool = True, cache_path: str = DEFAULT_CACHE_PATH, batch_size: int = 100,
+                 hash_mode: str = "full", hash_strategy: str = "auto", phash: bool = False):
+    """常駐監看資料夾，新增或修改的影片在寫入完成（大小 / mtime 穩定）後立即以 incremental 模式索引。
+
+    initial_scan: 開始監看前先做一次 incremental 掃描，補上停機期間新增的檔案（有指紋快取時很快）。
+    DB 的 hash 索引、writer 與指紋快取（以及 phash 的 HammingIndex）只在開始時載入一次，之後每批只處理
+    該批檔案，不再重新讀取整個 videos 表。其他程序（API 觸發的掃描、命令列）在監看期間寫入的列不在索引內；
+    內容相同時由 ON CONFLICT (file_hash) 併入同一列。其餘參數同 scan_videos。
+    """
+    from backend.services.video_watcher import watch_directory
+
+    mode, hash_mode = _normalize_modes("incremental", hash_mode)
+    video_files = collect_video_files(Path(directory)) if initial_scan else []
+    hash_strategy = choose_hash_strategy(hash_strategy, video_files)
+    print(f"#️⃣  Hash strategy: {hash_strategy}")
+
+    db = SessionLocal()
+    cache = FingerprintCache(cache_path) if use_cache else None
+    try:
+        index, legacy_rows = DedupIndex.load(db)
+        if hash_mode == "tiered" and legacy_rows:
+            backfill_quick_hashes(db, index, legacy_rows, batch_size=batch_size)
+        phash_index = load_phash_index(db) if phash and phash_available() else None
+        db.commit()  # 結束載入索引的交易，監看期間不佔住連線
+        writer = VideoBatchWriter(db, ScanStats(), index, batch_size=batch_size)
+
+        def scan_batch(paths: List[Path]) -> ScanStats:
+            stats = writer.stats = ScanStats()
+            stats.total_files = len(paths)
+            _scan_batch(writer, paths, mode, workers, cache, hash_mode, hash_strategy)
+            index.settle()
+            if cache is not None:
+                cache.flush()
+            if phash_index is not None:
+                compute_perceptual_hashes(paths, workers=workers, batch_size=batch_size, stats=stats,
+                                          index=phash_index)
+            return stats
+
+        if initial_scan:
+            print(f"📹 Found {len(video_files)} video files")
+            scan_batch(video_files).print_summary()
+
+        def on_ready(paths: List[Path]):
+            print(f"📥 {len(paths)} file(s) ready: {', '.join(p.name for p in paths[:5])}"
+                  f"{' ...' if len(paths) > 5 else ''}")
+            stats = scan_batch(paths)
+            print(f"   ✅ new={stats.new_count} already={stats.already_in_db_count} "
+                  f"dup={stats.duplicate_in_run_count} errors={stats.error_count}")
+
+        watch_directory(
+            Path(directory),
+            on_ready,
+            suffixes=ALLOWED_VIDEO_SUFFIXES,
+            settle_seconds=settle_seconds,
+            poll_interval=poll_interval,
+            force_polling=force_polling,
+            stop_event=stop_event,
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+        db.close()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="BoxTech Video Scanner")
     parser.add_argument("--directory", "-d", type=str, default="./Midea", help="Root directory to scan")
     parser.add_argument("--mode", "-m", type=str, default="incremental", choices=["incremental", "full"], help="Scan mode")
+    parser.add_argument("--workers", "-w", type=int, default=1, help="Process pool size for hashing/probing (1 = serial)")
+    parser.add_argument("--batch-size", type=int, default=100, help="Rows per INSERT ... ON CONFLICT batch")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the stat fingerprint cache (always re-hash)")
+    parser.add_argument("--cache-path", type=str, default=DEFAULT_CACHE_PATH, help="sqlite file for the fingerprint cache")
+    parser.add_argument("--hash-mode", type=str, default="full", choices=["full", "tiered"],
+                        help="tiered: sampled quick hash first, full SHA-256 only on collisions")
+    parser.add_argument("--hash-strategy", type=str, default="auto",
+                        choices=["auto"] + sorted(hashing.HASH_STRATEGIES),
+                        help="File read strategy for SHA-256 (auto = fastest measured on this machine)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and index new/modified files as they arrive (incremental)")
+    parser.add_argument("--settle-seconds", type=float, default=5.0,
+                        help="Watch mode: wait until size/mtime are unchanged this long before indexing")
+    parser.add_argument("--poll", action="store_true", help="Watch mode: force the polling backend")
+    parser.add_argument("--backfill-hashes", action="store_true",
+                        help="Compute missing full SHA-256 hashes left by tiered scans, then exit")
+    parser.add_argument("--phash", action="store_true",
+                        help="Compute perceptual hashes for scanned files and report near duplicates (needs videohash + ffmpeg)")
+    parser.add_argument("--backfill-phash", action="store_true",
+                        help="Compute perceptual hashes for every video that lacks one, then exit")
     args = parser.parse_args()
 
     print("🔍 BoxTech Video Scanner")
     print("=" * 50)
+    if args.backfill_hashes:
+        backfill_file_hashes(batch_size=args.batch_size)
+        sys.exit(0)
+    if args.backfill_phash:
+        stats = ScanStats()
+        compute_perceptual_hashes(workers=args.workers, batch_size=args.batch_size, stats=stats)
+        print(f"✅ Perceptual hashes: {stats.phash_count} (near duplicates: {stats.near_duplicate_count})")
+        sys.exit(0)
     print(f"Directory: {args.directory}")
     print(f"Mode: {args.mode}")
-    scan_videos(directory=args.directory, mode=args.mode)
+    print(f"Hash mode: {args.hash_mode}")
+    print(f"Workers: {args.workers}")
+    scan_kwargs = dict(
+        workers=args.workers,
+        use_cache=not args.no_cache,
+        cache_path=args.cache_path,
+        batch_size=args.batch_size,
+        hash_mode=args.hash_mode,
+        hash_strategy=args.hash_strategy,
+        phash=args.phash,
+    )
+    if args.watch:
+        watch_videos(directory=args.directory, settle_seconds=args.settle_seconds,
+                     force_polling=args.poll, **scan_kwargs)
+    else:
+        scan_videos(directory=args.directory, mode=args.mode, **scan_kwargs)
@@ -1,3 +1,5 @@
+import uuid
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -53,3 +55,267 @@ def test_list_videos_filters_and_sort():
     data = r.json()
     assert "items" in data
     assert data["count"] <= 3
+
+
+@pytest.mark.skipif(not _db_available(), reason="Database not available; skipping DB-dependent tests")
+def test_scan_job_lifecycle(tmp_path):
+    r = client.post("/api/v1/videos/scan", json={"directory": str(tmp_path), "mode": "incremental"})
+    assert r.status_code == 202
+    job_id = r.json()["job_id"]
+
+    import time
+    for _ in range(50):
+        job = client.get(f"/api/v1/videos/scan/{job_id}").json()
+        if job["status"] not in ("queued", "running"):
+            break
+        time.sleep(0.1)
+    assert job["status"] == "completed"
+    assert job["progress"]["files_total"] == 0
+
+    assert client.get("/api/v1/videos/scan/00000000-0000-0000-0000-000000000000").status_code == 404
+
+
+@pytest.fixture
+def paged_videos():
+    """同一個 location 的 23 支影片：排序欄位有重複值與 NULL，用來檢查 keyset 分頁的順序"""
+    import uuid
+    from datetime import datetime, timedelta
+
+    from backend.database.connection import SessionLocal
+    from backend.models.schemas import Video
+
+    location = f"pytest-{uuid.uuid4().hex[:8]}"
+    db = SessionLocal()
+    rows = [
+        Video(
+            file_path=f"{location}/{i}.mp4",
+            file_hash=uuid.uuid4().hex,
+            upload_date=datetime(2025, 1, 1) + timedelta(days=i % 5),
+            training_date=None if i % 4 == 0 else datetime(2025, 2, 1) + timedelta(days=i % 3),
+            fps=30 if i % 2 else 60,
+            file_size_bytes=None if i % 6 == 0 else i * 1000,
+            location=location,
+        )
+        for i in range(23)
+    ]
+    db.add_all(rows)
+    db.commit()
+    yield location, [(str(v.id), v) for v in rows]
+    db.query(Video).filter(Video.location == location).delete()
+    db.commit()
+    db.close()
+
+
+def _expected_order(rows, order_by, order_dir):
+    # PostgreSQL 預設：ASC 時 NULL 在最後、DESC 時 NULL 在最前；id 為 tiebreaker
+    present = sorted(((getattr(v, order_by), vid) for vid, v in rows if getattr(v, order_by) is not None))
+    missing = sorted(vid for vid, v in rows if getattr(v, order_by) is None)
+    if order_dir == "desc":
+        return missing[::-1] + [vid for _, vid in present[::-1]]
+    return [vid for _, vid in present] + missing
+
+
+@pytest.mark.skipif(not _db_available(), reason="Database not available; skipping DB-dependent tests")
+@pytest.mark.parametrize("order_by", ["upload_date", "training_date", "file_size_bytes", "fps"])
+@pytest.mark.parametrize("order_dir", ["asc", "desc"])
+def test_cursor_pagination_walks_every_row_once(paged_videos, order_by, order_dir):
+    location, rows = paged_videos
+    params = {"location": location, "order_by": order_by, "order_dir": order_dir, "limit": 5, "total": "none"}
+    seen, cursor = [], None
+    for _ in range(10):
+        r = client.get("/api/v1/videos", params={**params, "cursor": cursor} if cursor else params)
+        assert r.status_code == 200
+        data = r.json()
+        assert data["total"] is None
+        seen.extend(item["id"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == _expected_order(rows, order_by, order_dir)
+
+    # offset 分頁的順序與 cursor 相同
+    r = client.get("/api/v1/videos", params={**params, "offset": 5, "total": "exact"})
+    assert [item["id"] for item in r.json()["items"]] == seen[5:10]
+    assert r.json()["total"] == len(rows)
+
+
+@pytest.mark.skipif(not _db_available(), reason="Database not available; skipping DB-dependent tests")
+def test_cursor_validation_and_estimate(paged_videos):
+    location, _ = paged_videos
+    first = client.get("/api/v1/videos", params={"location": location, "limit": 2, "total": "estimate"}).json()
+    assert isinstance(first["total"], int)
+    cursor = first["next_cursor"]
+
+    bad = [
+        {"cursor": "not-a-cursor"},
+        {"cursor": cursor, "order_by": "fps"},  # cursor 來自不同的排序方式
+        {"cursor": cursor, "offset": 2},
+    ]
+    for params in bad:
+        r = client.get("/api/v1/videos", params={"location": location, "limit": 2, **params})
+        assert r.status_code == 400
+
+
+@pytest.mark.skipif(not _db_available(), reason="Database not available; skipping DB-dependent tests")
+def test_list_videos_etag_and_scan_invalidation(paged_videos):
+    from backend.services.response_cache import bump_generation
+
+    location, _ = paged_videos
+    params = {"location": location, "limit": 3}
+    first = client.get("/api/v1/videos", params=params)
+    etag = first.headers["etag"]
+    again = client.get("/api/v1/videos", params=params)
+    assert again.headers["x-cache"] == "hit"
+    assert again.json() == first.json()
+
+    r = client.get("/api/v1/videos", params=params, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+    bump_generation()  # 掃描器寫入後
+    r = client.get("/api/v1/videos", params=params, headers={"If-None-Match": etag})
+    assert r.headers["x-cache"] == "miss"
+    assert r.status_code == 304  # 內容沒變，ETag 相同
+
+
+@pytest.mark.skipif(not _db_available(), reason="Database not available; skipping DB-dependent tests")
+def test_list_videos_fields_projection(paged_videos):
+    location, _ = paged_videos
+    params = {"location": location, "limit": 4, "order_by": "training_date", "total": "none"}
+    full = client.get("/api/v1/videos", params=params).json()
+    slim = client.get("/api/v1/videos", params={**params, "fields": "training_date, file_path,id,id"}).json()
+    assert [list(item) for item in slim["items"]] == [["id", "file_path", "training_date"]] * 4
+    assert slim["items"] == [{k: item[k] for k in ("id", "file_path", "training_date")} for item in full["items"]]
+    assert slim["next_cursor"] == full["next_cursor"]
+
+    # 排序欄位與 id 不在 fields 內時，cursor 仍可使用
+    page = client.get("/api/v1/videos", params={**params, "fields": "file_path"}).json()
+    assert [list(item) for item in page["items"]] == [["file_path"]] * 4
+    nxt = client.get("/api/v1/videos", params={**params, "cursor": page["next_cursor"]}).json()
+    assert nxt["items"][0]["id"] != full["items"][0]["id"]
+
+    r = client.get("/api/v1/videos", params={**params, "fields": "id,s3_url"})
+    assert r.status_code == 400
+    assert "s3_url" in r.json()["detail"]
+
+
+@pytest.fixture
+def search_videos():
+    """在獨立的 location 下建立 file_path 為 Midea/{location}/{name} 的影片，回傳 (location, add)"""
+    from backend.database.connection import SessionLocal
+    from backend.models.schemas import Video
+
+    location = f"pytest-{uuid.uuid4().hex[:8]}"
+    db = SessionLocal()
+
+    def add(names):
+        db.add_all([Video(file_path=f"Midea/{location}/{name}", file_hash=uuid.uuid4().hex, location=location)
+                    for name in names])
+        db.commit()
+
+    yield location, add
+    db.query(Video).filter(Video.location == location).delete()
+    db.commit()
+    db.close()
+
+
+@pytest.fixture
+def trigram_db():
+    """測試 DB 啟用 pg_trgm（同 migration b6e2d9f4a8c1）；PostgreSQL 沒有 contrib 模組時 skip"""
+    from sqlalchemy import text
+
+    from backend.database.connection import SessionLocal
+    from backend.services import filename_search
+
+    db = SessionLocal()
+    try:
+        if db.execute(text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).first() is None:
+            pytest.skip("pg_trgm extension is not available on this PostgreSQL server")
+        db.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        db.commit()
+    finally:
+        db.close()
+    filename_search._trigram_available.clear()
+
+
+@pytest.mark.skipif(not _db_available(), reason="Database not available; skipping DB-dependent tests")
+def test_filename_search_substring(search_videos):
+    location, add = search_videos
+    names = ["20251102-團課-打靶 01.MOV", "20251102-團課-打靶 02.MOV", "20251103-私課-跳繩.mp4", "100%_done.mp4"]
+    add(names)
+
+    def search(**params):
+        return client.get("/api/v1/videos", params={"location": location, "total": "exact", **params})
+
+    assert search(q="團課-打靶").json()["total"] == 2
+    assert search(q="打靶 01.mov").json()["items"][0]["file_path"].endswith(names[0])
+    # % 與 _ 以字面比對
+    assert [item["file_path"] for item in search(q="0%_").json()["items"]] == [f"Midea/{location}/{names[3]}"]
+    assert search(q="1_0").json()["total"] == 0
+    assert search(match="fuzzy").status_code == 400
+
+
+@pytest.mark.skipif(not _db_available(), reason="Database not available; skipping DB-dependent tests")
+def test_fuzzy_search_cursor_returns_every_row_once(search_videos, trigram_db):
+    location, add = search_videos
+    # 三種相似度（1、5/6、2/3，後兩者無法以 real 精確表示），每種三支同分的影片
+    names = ["20251102-團課-打靶 01.MOV", "團課 打靶0.mp4", "團課-打 01.mov"]
+    add([f"d{i}/{name}" for name in names for i in range(3)] + ["20251103-私課-跳繩.mp4"])
+    params = {"location": location, "q": "團課 打靶", "match": "fuzzy", "total": "none"}
+
+    everything = client.get("/api/v1/videos", params={**params, "limit": 50}).json()
+    items = everything["items"]
+    assert everything["next_cursor"] is None
+    assert sorted({item["score"] for item in items}, reverse=True) == [1.0, 0.8333, 0.6667]
+    # 依相似度由高到低，同分時 id 為 tiebreaker
+    assert [item["id"] for item in items] == [
+        item["id"] for item in sorted(items, key=lambda item: (item["score"], item["id"]), reverse=True)
+    ]
+    assert len(items) == 9
+
+    for limit in (1, 2, 4):
+        seen, cursor = [], None
+        for _ in range(20):
+            page = client.get("/api/v1/videos", params={**params, "limit": limit, "cursor": cursor}).json()
+            seen.extend(item["id"] for item in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == [item["id"] for item in items]
+
+
+@pytest.mark.skipif(not _db_available(), reason="Database not available; skipping DB-dependent tests")
+def test_async_routes_match_sync_routes(paged_videos):
+    pytest.importorskip("asyncpg")
+    from fastapi import APIRouter, FastAPI
+
+    from backend.api import videos
+    from backend.database.connection import dispose_async_engine
+    from backend.services.response_cache import bump_generation
+
+    router = APIRouter(prefix="/api/v1/videos")
+    router.add_api_route("", videos.list_videos_async, methods=["GET"])
+    router.add_api_route("/{video_id}", videos.get_video_async, methods=["GET"])
+    async_app = FastAPI()
+    async_app.include_router(router)
+
+    location, rows = paged_videos
+    params = {"location": location, "limit": 4, "order_by": "training_date", "total": "estimate"}
+    with TestClient(async_app) as async_client:
+        try:
+            # 兩條路徑共用回應快取：每次請求前讓快取失效，確保 sync / async 都真的查詢資料庫
+            bump_generation()
+            got = async_client.get("/api/v1/videos", params={**params, "q": "pytest"})
+            bump_generation()
+            expected = client.get("/api/v1/videos", params={**params, "q": "pytest"})
+            assert got.status_code == 200
+            assert got.headers["X-Cache"] == expected.headers["X-Cache"] == "miss"
+            assert got.json() == expected.json()
+            nxt = async_client.get("/api/v1/videos", params={**params, "cursor": got.json()["next_cursor"]})
+            assert nxt.json()["items"][0]["id"] != got.json()["items"][0]["id"]
+
+            vid = rows[0][0]
+            assert async_client.get(f"/api/v1/videos/{vid}").json() == client.get(f"/api/v1/videos/{vid}").json()
+            assert async_client.get(f"/api/v1/videos/{uuid.UUID(int=0)}").status_code == 404
+        finally:
+            # asyncpg 連線綁定目前的 event loop，離開前關閉連線池
+            async_client.portal.call(dispose_async_engine)
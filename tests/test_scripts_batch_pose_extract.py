@@ -0,0 +1,159 @@
+import uuid
+
+import numpy as np
+import pytest
+
+pytest.importorskip("mediapipe")
+cv2 = pytest.importorskip("cv2")
+
+from backend.database.connection import SessionLocal, engine  # noqa: E402
+from backend.models.schemas import Video  # noqa: E402
+from scripts import batch_pose_extract, pose_extract_and_visualize  # noqa: E402
+from scripts.batch_pose_extract import claim_videos, run_batch, select_videos  # noqa: E402
+from test_scripts_pose_pipeline import _FixedPose  # noqa: E402
+
+
+def _db_available() -> bool:
+    try:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+        return True
+    except Exception:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _db_available(), reason="Database not available; skipping DB-dependent tests")
+
+
+def _write_clip(path, frames=4):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for i in range(frames):
+        writer.write(np.full((48, 64, 3), i * 20, dtype=np.uint8))
+    writer.release()
+
+
+@pytest.fixture
+def videos(tmp_path):
+    """同一個 location 下四支影片：pending / failed / completed / pending（最後一支檔案不存在）"""
+    location = f"pytest-{uuid.uuid4().hex[:8]}"
+    statuses = ["pending", "failed", "completed", "pending"]
+    db = SessionLocal()
+    rows = []
+    for i, status in enumerate(statuses):
+        path = tmp_path / f"clip{i}.avi"
+        if i < 3:
+            _write_clip(path)
+        rows.append(Video(file_path=str(path), file_hash=uuid.uuid4().hex, processing_status=status,
+                          location=location))
+    db.add_all(rows)
+    db.commit()
+    yield location
+    db.query(Video).filter(Video.location == location).delete()
+    db.commit()
+    db.close()
+
+
+def _statuses(location):
+    db = SessionLocal()
+    try:
+        rows = db.query(Video.file_path, Video.processing_status).filter(Video.location == location).all()
+        return [status for _, status in sorted(rows)]
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def bumps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(batch_pose_extract, "bump_generation", lambda: calls.append(1))
+    return calls
+
+
+def test_claim_videos_only_claims_rows_still_in_statuses(videos, bumps):
+    db = SessionLocal()
+    try:
+        rows = select_videos(db, ["pending", "failed", "completed"], location=videos)
+        # 選取之後才被其他批次處理完的影片（select 結果中的狀態已過時）
+        stale = [(vid, path, "pending" if status == "completed" else status) for vid, path, status in rows]
+        claimed = claim_videos(db, stale, ["pending", "failed"])
+        assert sorted(claimed.values()) == ["failed", "pending", "pending"]
+        assert _statuses(videos) == ["processing", "processing", "completed", "processing"]
+        assert bumps
+
+        # 已是 processing 的影片不會再被領取
+        assert claim_videos(db, stale, ["pending", "failed"]) == {}
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def fake_pose(monkeypatch):
+    # worker process 以 fork 建立，沿用這裡替換的 create_pose
+    monkeypatch.setattr(pose_extract_and_visualize, "create_pose", lambda model_complexity: _FixedPose())
+
+
+def test_run_batch_marks_completed_and_failed(videos, fake_pose, bumps):
+    db = SessionLocal()
+    try:
+        rows = select_videos(db, ["pending", "failed"], location=videos)
+    finally:
+        db.close()
+    totals = run_batch(rows, ["pending", "failed"], workers=1, model_complexity=0, save_json=False)
+    assert (totals["completed"], totals["failed"], totals["frames"]) == (2, 1, 8)
+    assert _statuses(videos) == ["completed", "completed", "completed", "failed"]
+    assert len(bumps) >= 1 + len(rows)  # 領取一次 + 每支影片完成時各一次
+
+
+def test_run_batch_keys_outputs_on_video_id(tmp_path, fake_pose, bumps, monkeypatch):
+    # 兩個資料夾各有一支 clip.avi（相機自動命名常見）
+    location = f"pytest-{uuid.uuid4().hex[:8]}"
+    db = SessionLocal()
+    try:
+        for folder in ("cam1", "cam2"):
+            path = tmp_path / folder / "clip.avi"
+            path.parent.mkdir()
+            _write_clip(path)
+            db.add(Video(file_path=str(path), file_hash=uuid.uuid4().hex, processing_status="pending",
+                         location=location))
+        db.commit()
+        rows = select_videos(db, ["pending"], location=location)
+
+        monkeypatch.chdir(tmp_path)  # 輸出寫到 tmp_path/output/
+        options = {"checkpoint_every": 2, "landmark_format": "ndjson"}
+        totals = run_batch(rows, ["pending"], workers=2, model_complexity=0, save_json=True, extract_options=options)
+        assert totals["completed"] == 2
+        landmarks = sorted(p.name for p in (tmp_path / "output" / "landmarks").iterdir())
+        assert landmarks == sorted(f"clip_{vid}_landmarks.ndjson" for vid, _, _ in rows)
+        assert not list((tmp_path / "output" / "checkpoints").iterdir())
+    finally:
+        db.query(Video).filter(Video.location == location).delete()
+        db.commit()
+        db.close()
+
+
+@pytest.mark.parametrize("error", [KeyboardInterrupt, RuntimeError])
+def test_run_batch_restores_unfinished_videos(videos, fake_pose, bumps, monkeypatch, error):
+    set_status = batch_pose_extract.set_status
+    raised = []
+
+    def failing_set_status(db, video_id, status):
+        # 第一支影片處理完、要寫回狀態時中斷；finally 還原時照常寫入
+        if not raised:
+            raised.append(video_id)
+            raise error("stop")
+        set_status(db, video_id, status)
+
+    monkeypatch.setattr(batch_pose_extract, "set_status", failing_set_status)
+    db = SessionLocal()
+    try:
+        rows = select_videos(db, ["pending", "failed"], location=videos)
+    finally:
+        db.close()
+
+    if error is KeyboardInterrupt:
+        totals = run_batch(rows, ["pending", "failed"], workers=1, model_complexity=0, save_json=False)
+        assert totals["completed"] == totals["failed"] == 0
+    else:
+        with pytest.raises(RuntimeError):
+            run_batch(rows, ["pending", "failed"], workers=1, model_complexity=0, save_json=False)
+    assert _statuses(videos) == ["pending", "failed", "completed", "pending"]
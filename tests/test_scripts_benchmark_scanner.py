@@ -0,0 +1,22 @@
+import hashlib
+from collections import Counter
+
+from scripts.benchmark_scanner import generate_tree
+from scripts.scan_videos import ALLOWED_VIDEO_SUFFIXES, collect_video_files, extract_video_info
+
+
+def test_generate_tree_layout(tmp_path):
+    manifest = generate_tree(tmp_path, count=20, duplicate_ratio=0.25, depth=3, decoy_ratio=0.1, seed=3)
+    assert manifest["unique"] == 15 and manifest["duplicates"] == 5 and manifest["decoys"] == 2
+
+    videos = collect_video_files(tmp_path)
+    assert len(videos) == 20
+    assert all(p.suffix.lower() in ALLOWED_VIDEO_SUFFIXES for p in videos)
+    assert any(p.suffix != p.suffix.lower() for p in videos)  # 大小寫混合的副檔名
+    assert all(len(p.relative_to(tmp_path).parts) == 4 for p in videos)
+
+    digests = Counter(hashlib.sha256(p.read_bytes()).hexdigest() for p in videos)
+    assert len(digests) == 15
+
+    info = extract_video_info(str(videos[0]))
+    assert info["fps"] == 30 and info["resolution"] == "64x48" and info["total_frames"] >= 10
@@ -0,0 +1,230 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip("mediapipe")
+cv2 = pytest.importorskip("cv2")
+
+from mediapipe.framework.formats import landmark_pb2  # noqa: E402
+
+from scripts.pose_extract_and_visualize import _OverlayEncoder, _threaded, extract_and_visualize  # noqa: E402
+
+
+def test_threaded_preserves_order_with_small_queue():
+    assert list(_threaded(iter(range(500)), maxsize=2, name="t")) == list(range(500))
+
+
+def test_threaded_reraises_producer_error():
+    def produce():
+        yield 1
+        raise ValueError("decode failed")
+
+    it = _threaded(produce(), maxsize=1, name="t")
+    assert next(it) == 1
+    with pytest.raises(ValueError, match="decode failed"):
+        next(it)
+
+
+def test_threaded_stops_producer_when_consumer_quits():
+    produced = []
+
+    def produce():
+        for i in range(10_000):
+            produced.append(i)
+            yield i
+
+    it = _threaded(produce(), maxsize=2, name="t")
+    next(it)
+    it.close()
+    assert len(produced) < 10
+    assert not any(t.name == "t" for t in threading.enumerate())
+
+
+def test_overlay_encoder_writes_every_frame(tmp_path):
+    out = tmp_path / "overlay.mp4"
+    encoder = _OverlayEncoder(out, fps=30, threaded=True, queue_size=2)
+    for i in range(25):
+        encoder.submit(np.full((48, 64, 3), i * 10, dtype=np.uint8), None)
+    encoder.close()
+
+    cap = cv2.VideoCapture(str(out))
+    assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 25
+    cap.release()
+
+
+class _MovingPose:
+    """假的 Pose：每次 process() 回傳 x 隨呼叫次數線性移動的 landmarks"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def process(self, image):
+        x = 0.1 + 0.01 * self.calls
+        self.calls += 1
+        lms = landmark_pb2.NormalizedLandmarkList(
+            landmark=[landmark_pb2.NormalizedLandmark(x=x, y=0.5, z=0.0, visibility=0.9) for _ in range(33)]
+        )
+        return type("Results", (), {"pose_landmarks": lms})()
+
+
+def test_stride_interpolates_skipped_frames(tmp_path):
+    video = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(video), cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for i in range(10):
+        writer.write(np.full((48, 64, 3), i * 20, dtype=np.uint8))
+    writer.release()
+
+    pose = _MovingPose()
+    out_json = tmp_path / "landmarks.json"
+    summary = extract_and_visualize(str(video), out_json_path=out_json, out_video_path=tmp_path / "o.mp4",
+                                    pose=pose, log_every=0, pipelined=False, stride=4)
+
+    # keyframes 1, 5, 9，最後一幀 10 一定推論
+    assert pose.calls == summary.inferred_frames == 4
+    assert summary.total_frames == summary.detected_frames == 10
+    assert summary.interpolated_frames == 6
+
+    data = json.loads(out_json.read_text())["data"]
+    assert [fd["frame"] for fd in data] == list(range(1, 11))
+    assert [fd["interpolated"] for fd in data] == [False, True, True, True, False, True, True, True, False, False]
+    # 幀 3 位於 keyframe 1 (x=0.10) 與 5 (x=0.11) 正中間
+    assert data[2]["landmarks"][15]["x"] == pytest.approx(0.105)
+
+
+def test_binary_landmark_output(tmp_path):
+    from backend.utils.landmark_file import LandmarkFile
+
+    video = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(video), cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for i in range(6):
+        writer.write(np.full((48, 64, 3), i * 20, dtype=np.uint8))
+    writer.release()
+
+    out = tmp_path / "landmarks.lmk"
+    extract_and_visualize(str(video), out_json_path=out, pose=_MovingPose(), log_every=0, pipelined=False,
+                          stride=2, landmark_format="binary")
+
+    lf = LandmarkFile(out)
+    assert lf.meta["total_frames"] == 6
+    assert lf.frames.tolist() == [1, 2, 3, 4, 5, 6]
+    assert lf.interpolated.tolist() == [False, True, False, True, False, False]
+    assert lf.landmarks[1, 0, 0] == pytest.approx(0.105)
+
+
+class _FixedPose:
+    """假的 Pose：不論輸入為何都回傳外接框 (0.4, 0.3)–(0.6, 0.7) 的 landmarks，記錄每次輸入的尺寸"""
+
+    def __init__(self):
+        self.shapes = []
+        self.resets = 0
+
+    def process(self, image):
+        self.shapes.append(image.shape[:2])
+        pts = [(0.4, 0.3), (0.6, 0.7)] + [(0.5, 0.5)] * 31
+        lms = landmark_pb2.NormalizedLandmarkList(
+            landmark=[landmark_pb2.NormalizedLandmark(x=x, y=y, z=0.0, visibility=0.9) for x, y in pts]
+        )
+        return type("Results", (), {"pose_landmarks": lms})()
+
+    def reset(self):
+        self.resets += 1
+
+
+def test_roi_mode_infers_on_full_resolution_crop(tmp_path):
+    video = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(video), cv2.VideoWriter_fourcc(*"MJPG"), 30, (1280, 720))
+    for i in range(4):
+        writer.write(np.full((720, 1280, 3), i * 20, dtype=np.uint8))
+    writer.release()
+
+    pose = _FixedPose()
+    out_json = tmp_path / "landmarks.json"
+    summary = extract_and_visualize(str(video), target_width=640, out_json_path=out_json, pose=pose, log_every=0,
+                                    pipelined=False, roi=True, roi_width=256)
+
+    # 第一幀整張畫面偵測，之後在 1280x720 原圖裁出的區域推論
+    assert pose.shapes[0] == (360, 640)
+    assert all(max(shape) <= 256 for shape in pose.shapes[1:])
+    assert summary.roi_frames == 3
+    assert pose.resets == 1
+
+    data = json.loads(out_json.read_text())["data"]
+    lm = data[1]["landmarks"]
+    # 裁切座標換回整張畫面：裁切框以人為中心，landmarks 仍落在人的外接框附近
+    assert 0.3 < lm[0]["x"] < lm[1]["x"] < 0.7
+    assert 0.2 < lm[0]["y"] < lm[1]["y"] < 0.8
+
+
+class _CrashingPose(_MovingPose):
+    """第 crash_at 次 process() 時丟出例外，模擬長影片處理到一半被中斷"""
+
+    def __init__(self, crash_at):
+        super().__init__()
+        self.crash_at = crash_at
+
+    def process(self, image):
+        if self.calls + 1 == self.crash_at:
+            raise RuntimeError("killed")
+        return super().process(image)
+
+
+@pytest.mark.parametrize("landmark_format", ["json", "ndjson", "binary"])
+def test_resume_from_checkpoint(tmp_path, landmark_format):
+    from backend.services.landmark_sinks import iter_ndjson_landmarks
+    from backend.utils.landmark_file import LandmarkFile
+
+    video = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(video), cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for i in range(20):
+        writer.write(np.full((48, 64, 3), i * 10, dtype=np.uint8))
+    writer.release()
+
+    out = tmp_path / f"landmarks.{landmark_format}"
+    checkpoint = tmp_path / "clip.checkpoint.json"
+    options = dict(out_json_path=out, log_every=0, pipelined=False, landmark_format=landmark_format,
+                   chunk_size=3, checkpoint_path=checkpoint, checkpoint_every=5, warmup_frames=2)
+    with pytest.raises(RuntimeError):
+        extract_and_visualize(str(video), pose=_CrashingPose(crash_at=13), **options)
+    assert json.loads(checkpoint.read_text())["last_frame"] == 10
+
+    pose = _MovingPose()
+    summary = extract_and_visualize(str(video), pose=pose, resume=True, **options)
+    # 幀 9、10 只做 warm-up，從幀 11 開始輸出
+    assert pose.calls == 12
+    assert summary.total_frames == summary.detected_frames == 20
+    assert not checkpoint.exists()
+
+    if landmark_format == "binary":
+        frames = LandmarkFile(out).frames.tolist()
+    elif landmark_format == "ndjson":
+        frames = [fd["frame"] for fd in iter_ndjson_landmarks(out)]
+    else:
+        frames = [fd["frame"] for fd in json.loads(out.read_text())["data"]]
+    assert frames == list(range(1, 21))
+
+
+def test_ffmpeg_decoder_matches_cv2(tmp_path):
+    from backend.utils.frame_source import ffmpeg_available
+
+    if not ffmpeg_available():
+        pytest.skip("ffmpeg not installed")
+    video = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(video), cv2.VideoWriter_fourcc(*"MJPG"), 30, (640, 480))
+    for i in range(9):
+        writer.write(np.full((480, 640, 3), i * 20, dtype=np.uint8))
+    writer.release()
+
+    results = {}
+    for decoder in ("cv2", "ffmpeg"):
+        pose = _FixedPose()
+        out_json = tmp_path / f"{decoder}.json"
+        summary = extract_and_visualize(str(video), target_width=320, out_json_path=out_json, pose=pose,
+                                        log_every=0, pipelined=True, queue_size=2, decoder=decoder, decode_every=2)
+        data = json.loads(out_json.read_text())["data"]
+        results[decoder] = [(fd["frame"], round(fd["timestamp"], 3)) for fd in data]
+        assert set(pose.shapes) == {(240, 320)}
+        assert summary.detection_rate == 100.0
+    assert results["ffmpeg"] == results["cv2"]
+    assert [frame for frame, _ in results["cv2"]] == [1, 3, 5, 7, 9]
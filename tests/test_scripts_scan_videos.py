@@ -0,0 +1,220 @@
+import hashlib
+import random
+import uuid
+from pathlib import Path
+
+import pytest
+
+from backend.database.connection import SessionLocal, engine
+from backend.models.schemas import Video
+from backend.utils.hashing import QUICK_HASH_BLOCK_SIZE, calculate_quick_hash, quick_hash_offsets
+from scripts.benchmark_scanner import generate_tree
+from scripts import scan_videos
+from scripts.scan_videos import (
+    DedupIndex, ScanStats, VideoBatchWriter, build_video_row, collect_video_files, scan_files, watch_videos,
+)
+
+
+def _db_available() -> bool:
+    try:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+        return True
+    except Exception:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _db_available(), reason="Database not available; skipping DB-dependent tests")
+
+SCAN_OPTIONS = dict(use_cache=False, hash_strategy="readinto", quiet_summary=True)
+
+
+def _stored_rows(root):
+    db = SessionLocal()
+    try:
+        return sorted(db.query(Video.file_path, Video.file_hash, Video.quick_hash)
+                      .filter(Video.file_path.like(f"{root}%")).all())
+    finally:
+        db.close()
+
+
+def _delete_rows(root):
+    db = SessionLocal()
+    try:
+        db.query(Video).filter(Video.file_path.like(f"{root}%")).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def scan_root(tmp_path):
+    yield tmp_path
+    _delete_rows(tmp_path)
+
+
+def test_parallel_scan_matches_serial(scan_root):
+    manifest = generate_tree(scan_root, count=12, duplicate_ratio=0.25, depth=2, decoy_ratio=0, seed=7)
+    files = collect_video_files(scan_root)
+
+    results = {}
+    for workers in (2, 1):
+        _delete_rows(scan_root)
+        first = scan_files(files, workers=workers, **SCAN_OPTIONS)
+        again = scan_files(files, workers=workers, **SCAN_OPTIONS)
+        rows = _stored_rows(scan_root)
+        results[workers] = (
+            first.new_count, first.duplicate_in_run_count, first.error_count, again.already_in_db_count,
+            sorted(file_hash for _, file_hash, _ in rows),
+        )
+        # 每支影片的內容只存一筆，hash 與檔案內容一致
+        for file_path, file_hash, _ in rows:
+            with open(file_path, "rb") as f:
+                assert file_hash == hashlib.sha256(f.read()).hexdigest()
+
+    assert results[2] == results[1]
+    new, duplicates, errors, already, _ = results[2]
+    # 第二次掃描時複本的內容也已在 DB 內
+    assert (new, duplicates, errors, already) == (manifest["unique"], manifest["duplicates"], 0, len(files))
+
+
+def test_batch_writer_falls_back_to_row_by_row(scan_root):
+    info = {"duration_seconds": 1.0, "fps": 30, "resolution": "64x48"}
+    paths = [scan_root / f"20250101-團課-打靶 {i:02d}.mp4" for i in range(3)]
+    rows = [build_video_row(p, uuid.uuid4().hex, info, 1000, quick_hash=uuid.uuid4().hex) for p in paths]
+    rows[1]["resolution"] = "x" * 50  # 超過 String(20)：整批 INSERT 會拋出 DataError
+
+    db = SessionLocal()
+    try:
+        stats = ScanStats()
+        writer = VideoBatchWriter(db, stats, DedupIndex(), batch_size=10)
+        for p, row in zip(paths, rows):
+            writer.add("insert", p, row)
+        writer.flush()
+        assert (stats.new_count, stats.error_count) == (2, 1)
+        stored = {file_hash for _, file_hash, _ in _stored_rows(scan_root)}
+        assert stored == {rows[0]["file_hash"], rows[2]["file_hash"]}
+        assert rows[1]["file_hash"] not in writer.index.known_hashes
+
+        # 同 hash 再寫一次（full 模式）：ON CONFLICT 更新既有列，不新增
+        valid = [(paths[0], rows[0]), (paths[2], rows[2])]
+        for p, row in valid:
+            writer.add("update", p, {**row, "fps": 60})
+        writer.flush()
+        assert (stats.updated_count, stats.error_count) == (2, 1)
+        stored = db.query(Video.file_hash, Video.fps).filter(Video.file_path.like(f"{scan_root}%")).all()
+        assert sorted(stored) == sorted((row["file_hash"], 60) for _, row in valid)
+    finally:
+        db.close()
+
+
+def test_batch_writer_insert_keeps_existing_row(scan_root):
+    info = {"duration_seconds": 1.0, "fps": 30, "resolution": "64x48"}
+    original, copy, other = (scan_root / f"20250101-團課-打靶 {i:02d}.mp4" for i in range(3))
+    file_hash = uuid.uuid4().hex
+    db = SessionLocal()
+    try:
+        db.add(Video(**{**build_video_row(original, file_hash, info, 1000), "processing_status": "completed"}))
+        db.commit()
+
+        # index 未載入 DB 既有紀錄（例如另一個掃描剛寫入）：同內容的新檔仍以 insert 排入
+        stats = ScanStats()
+        writer = VideoBatchWriter(db, stats, DedupIndex(), batch_size=10)
+        writer.add("insert", copy, build_video_row(copy, file_hash, info, 1000))
+        writer.add("insert", other, build_video_row(other, uuid.uuid4().hex, info, 1000))
+        writer.flush()
+        assert (stats.new_count, stats.already_in_db_count, stats.error_count) == (1, 1, 0)
+        row = db.query(Video.file_path, Video.processing_status).filter(Video.file_hash == file_hash).one()
+        assert tuple(row) == (str(original), "completed")
+    finally:
+        db.close()
+
+
+def _write_random(path, size, seed):
+    data = bytearray(random.Random(seed).randbytes(size))
+    path.write_bytes(data)
+    return data
+
+
+def test_tiered_quick_hash_collision_is_not_a_duplicate(scan_root):
+    size = 2 * 1024 * 1024
+    a, b, c = (scan_root / f"20250101-團課-打靶 {i:02d}.mp4" for i in range(3))
+    data = _write_random(a, size, seed=1)
+    # 只改取樣區塊之外的一個 byte：大小與 quick_hash 相同，內容不同
+    gap = quick_hash_offsets(size)[0] + QUICK_HASH_BLOCK_SIZE + 100
+    assert gap < quick_hash_offsets(size)[1]
+    data[gap] ^= 0xFF
+    b.write_bytes(data)
+    c.write_bytes(a.read_bytes())  # 與 a 逐位元組相同
+    assert calculate_quick_hash(str(a)) == calculate_quick_hash(str(b))
+
+    stats = scan_files([a, b, c], hash_mode="tiered", **SCAN_OPTIONS)
+    assert (stats.new_count, stats.duplicate_in_run_count, stats.error_count) == (2, 1, 0)
+    # 碰撞時 a（已排入寫入）與 b 都補算了完整 hash
+    rows = {file_path: file_hash for file_path, file_hash, _ in _stored_rows(scan_root)}
+    assert set(rows) == {str(a), str(b)}
+    assert rows[str(a)] == hashlib.sha256(a.read_bytes()).hexdigest()
+    assert rows[str(b)] == hashlib.sha256(b.read_bytes()).hexdigest()
+
+
+def test_full_scan_backfills_tiered_rows(scan_root):
+    files = [scan_root / f"20250101-團課-打靶 {i:02d}.mp4" for i in range(3)]
+    for i, path in enumerate(files):
+        _write_random(path, 256 * 1024, seed=10 + i)
+
+    stats = scan_files(files, hash_mode="tiered", **SCAN_OPTIONS)
+    assert stats.new_count == 3
+    rows = _stored_rows(scan_root)
+    assert [file_hash for _, file_hash, _ in rows] == [None] * 3  # quick_hash 不同，延後完整 hash
+    assert all(quick_hash for _, _, quick_hash in rows)
+
+    stats = scan_files(files, hash_mode="full", **SCAN_OPTIONS)
+    assert (stats.new_count, stats.already_in_db_count, stats.error_count) == (0, 3, 0)
+    rows = _stored_rows(scan_root)
+    assert len(rows) == 3
+    for file_path, file_hash, _ in rows:
+        with open(file_path, "rb") as f:
+            assert file_hash == hashlib.sha256(f.read()).hexdigest()
+
+
+def test_watch_loads_index_and_cache_once(scan_root, tmp_path_factory, monkeypatch, capsys):
+    from backend.services import video_watcher
+
+    watched = scan_root / "watched"
+    watched.mkdir()
+    a, b, c = (watched / f"20250101-團課-打靶 {i:02d}.mp4" for i in range(3))
+    _write_random(a, 4096, seed=21)
+
+    loads, caches = [], []
+    original_load, original_cache = DedupIndex.load.__func__, scan_videos.FingerprintCache
+
+    def counting_load(cls, db):
+        loads.append(1)
+        return original_load(cls, db)
+
+    def counting_cache(*args, **kwargs):
+        caches.append(1)
+        return original_cache(*args, **kwargs)
+
+    def fake_watch(directory, on_ready, **kwargs):
+        # 模擬檔案陸續寫入完成：新檔、再次回報的已索引檔案、與既有檔內容相同的新檔（a 由 initial scan 索引）
+        _write_random(b, 4096, seed=22)
+        on_ready([b])
+        on_ready([b, a])
+        c.write_bytes(a.read_bytes())
+        on_ready([c])
+
+    monkeypatch.setattr(DedupIndex, "load", classmethod(counting_load))
+    monkeypatch.setattr(scan_videos, "FingerprintCache", counting_cache)
+    monkeypatch.setattr(video_watcher, "watch_directory", fake_watch)
+    cache_path = tmp_path_factory.mktemp("cache") / "fingerprints.sqlite"
+    watch_videos(str(watched), cache_path=str(cache_path), hash_strategy="readinto")
+
+    assert (len(loads), len(caches)) == (1, 1)
+    summaries = [line.strip() for line in capsys.readouterr().out.splitlines() if line.strip().startswith("✅ new=")]
+    assert summaries == [
+        "✅ new=1 already=0 dup=0 errors=0",
+        "✅ new=0 already=2 dup=0 errors=0",
+        "✅ new=0 already=1 dup=0 errors=0",
+    ]
+    assert sorted(Path(file_path).name for file_path, _, _ in _stored_rows(watched)) == [a.name, b.name]
@@ -0,0 +1,118 @@
+import json
+
+from backend.services.landmark_sinks import DbSink, JsonSink, NdjsonSink, _copy_text, iter_ndjson_landmarks, open_file_sink
+from backend.utils.landmark_file import LandmarkFile
+
+LANDMARKS = [{"x": 0.1, "y": 0.2, "z": 0.0, "visibility": 0.9} for _ in range(33)]
+
+
+def _fill(sink, n=10):
+    for i in range(1, n + 1):
+        sink.write(i, i / 30.0, LANDMARKS, interpolated=i % 3 == 0)
+
+
+def test_json_sink_writes_legacy_document(tmp_path):
+    path = tmp_path / "a.json"
+    with JsonSink(path, {"video_path": "拳擊基地/a.mp4", "fps": 30.0}, chunk_size=3) as sink:
+        _fill(sink)
+        sink.close(total_frames=12)
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    assert doc["video_path"] == "拳擊基地/a.mp4"
+    assert doc["total_frames"] == 12
+    assert [fd["frame"] for fd in doc["data"]] == list(range(1, 11))
+    assert doc["data"][2]["interpolated"] is True
+
+
+def test_json_sink_empty(tmp_path):
+    path = tmp_path / "a.json"
+    JsonSink(path).close()
+    assert json.loads(path.read_text()) == {"data": []}
+
+
+def test_text_sink_flushes_in_chunks(tmp_path):
+    path = tmp_path / "a.ndjson"
+    sink = NdjsonSink(path, {"fps": 30.0}, chunk_size=4)
+    _fill(sink, 6)
+    # 第一個 chunk 已寫出，後兩幀仍在 buffer
+    assert [fd["frame"] for fd in iter_ndjson_landmarks(path)] == [1, 2, 3, 4]
+    sink.close(total_frames=6)
+    lines = path.read_text().splitlines()
+    assert json.loads(lines[0]) == {"meta": {"fps": 30.0}}
+    assert json.loads(lines[-1]) == {"summary": {"total_frames": 6}}
+    assert len(list(iter_ndjson_landmarks(path))) == 6
+
+
+def test_ndjson_reader_stops_at_partial_line(tmp_path):
+    path = tmp_path / "a.ndjson"
+    sink = NdjsonSink(path, chunk_size=1)
+    _fill(sink, 3)
+    sink.flush()
+    with open(path, "a") as f:
+        f.write('{"frame": 4, "timest')
+    assert [fd["frame"] for fd in iter_ndjson_landmarks(path)] == [1, 2, 3]
+
+
+def test_binary_sink(tmp_path):
+    path = tmp_path / "a.lmk"
+    with open_file_sink("binary", path, {"fps": 25.0}, chunk_size=4) as sink:
+        _fill(sink)
+    lf = LandmarkFile(path)
+    assert lf.meta["fps"] == 25.0
+    assert lf.frames.tolist() == list(range(1, 11))
+
+
+class _RecordingSession:
+    """executemany 路徑的 session 替身：記錄每次 INSERT 的 rows"""
+
+    def __init__(self):
+        self.batches = []
+        self.deletes = 0
+        self.commits = 0
+
+    def get_bind(self):
+        return type("Bind", (), {"dialect": type("Dialect", (), {"name": "sqlite"})()})()
+
+    def execute(self, stmt, rows=None):
+        if rows is None:
+            self.deletes += 1
+        else:
+            self.batches.append(list(rows))
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_db_sink_commits_each_chunk():
+    db = _RecordingSession()
+    sink = DbSink(db, "vid", chunk_size=4)
+    _fill(sink)
+    assert [len(b) for b in db.batches] == [4, 4]
+    sink.close()
+    assert [len(b) for b in db.batches] == [4, 4, 2]
+    assert db.commits == 3
+    assert db.deletes == 1
+    assert sink.method == "executemany"
+    assert sink.count == 10
+    row = dict(db.batches[0][2])
+    row.pop("id")
+    assert row == {
+        "video_id": "vid", "frame_number": 3, "timestamp": 0.1, "landmarks": LANDMARKS, "interpolated": True,
+    }
+
+
+def test_copy_text_escapes_control_characters():
+    assert _copy_text('{"a": "x\\y\tz\n"}') == '{"a": "x\\\\y\\tz\\n"}'
+
+
+def test_db_sink_resume_only_deletes_later_frames():
+    db = _RecordingSession()
+    sink = DbSink(db, "vid", chunk_size=4, resume={"count": 10, "last_frame": 10})
+    for i in range(11, 14):
+        sink.write(i, i / 30.0, LANDMARKS)
+    sink.close()
+    assert db.deletes == 1
+    assert [row["frame_number"] for row in db.batches[0]] == [11, 12, 13]
+    assert sink.count == 13
+    # 吞吐量只算本次寫入的 3 列
+    sink.seconds = 0.5
+    assert sink.rows_per_second == 6.0
@@ -0,0 +1,113 @@
+import uuid
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from backend.models.schemas import PoseSegment
+from backend.services.landmark_sinks import SegmentSink
+from backend.services.pose_segments import (
+    PoseSegmentRepository,
+    pack_records,
+    segment_start,
+    split_segments,
+    unpack_records,
+)
+from backend.utils.landmark_file import RECORD_DTYPE
+
+
+@compiles(UUID, "sqlite")
+def _uuid_as_char(type_, compiler, **kw):  # noqa: ARG001
+    return "CHAR(32)"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    PoseSegment.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _records(frames):
+    records = np.zeros(len(frames), dtype=RECORD_DTYPE)
+    records["frame"] = frames
+    records["timestamp"] = np.asarray(frames) / 30.0
+    records["landmarks"] = np.asarray(frames, dtype=np.float32)[:, None, None]
+    return records
+
+
+def test_segment_start():
+    assert [segment_start(f, 300) for f in (1, 300, 301, 600, 601)] == [1, 1, 301, 301, 601]
+
+
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_pack_roundtrip(compression):
+    records = _records([1, 2, 5])
+    back = unpack_records(pack_records(records, compression), compression)
+    assert back.tobytes() == records.tobytes()
+
+
+def test_split_segments():
+    parts = list(split_segments(_records([1, 2, 10, 11, 25]), segment_frames=10))
+    assert [(start, chunk["frame"].tolist()) for start, chunk in parts] == [(1, [1, 2, 10]), (11, [11]), (21, [25])]
+
+
+def test_read_range_across_segments(db):
+    video_id = uuid.uuid4()
+    repo = PoseSegmentRepository(db, segment_frames=10)
+    frames = [f for f in range(1, 36) if f % 4]  # 略過未偵測到的幀
+    assert repo.write_records(video_id, _records(frames)) == 4
+    db.commit()
+
+    got, timestamps, landmarks = repo.read_landmarks(video_id, 7, 22)
+    assert got.tolist() == [f for f in frames if 7 <= f <= 22]
+    assert landmarks.shape == (len(got), 33, 4)
+    assert landmarks[:, 0, 0].tolist() == got.tolist()
+    assert repo.read_range(video_id, 30)["frame"].tolist() == [30, 31, 33, 34, 35]
+    assert len(repo.read_range(uuid.uuid4())) == 0
+    assert repo.frame_count(video_id) == len(frames)
+
+
+def test_segment_sink_replaces_previous_run(db):
+    video_id = uuid.uuid4()
+    landmarks = [{"x": 0.1, "y": 0.2, "z": 0.3, "visibility": None} for _ in range(33)]
+    for run in range(2):
+        sink = SegmentSink(db, video_id, segment_frames=8, compression="zlib")
+        for f in range(1, 21):
+            sink.write(f, f / 30.0, landmarks, interpolated=f % 2 == 0)
+        sink.close()
+        assert sink.segments == 3
+
+    repo = PoseSegmentRepository(db)
+    records = repo.read_range(video_id)
+    assert records["frame"].tolist() == list(range(1, 21))
+    assert db.query(PoseSegment).count() == 3
+    assert np.isnan(records["landmarks"][0, 0, 3])
+
+
+def test_segment_sink_resume_rewrites_partial_segment(db):
+    video_id = uuid.uuid4()
+    landmarks = [{"x": 0.1, "y": 0.2, "z": 0.3, "visibility": 0.5} for _ in range(33)]
+    sink = SegmentSink(db, video_id, segment_frames=8)
+    for f in range(1, 15):
+        sink.write(f, f / 30.0, landmarks)
+        if f == 11:
+            state = sink.checkpoint(11)
+    sink.close()  # 中斷後 12–14 已寫入，resume 時要被取代
+
+    sink = SegmentSink(db, video_id, segment_frames=8, resume=state)
+    for f in range(12, 21):
+        sink.write(f, f / 30.0, landmarks)
+    sink.close()
+
+    records = PoseSegmentRepository(db).read_range(video_id)
+    assert records["frame"].tolist() == list(range(1, 21))
+    assert sink.count == 20
+    sink.seconds = 0.5
+    assert sink.rows_per_second == 18.0  # 本次寫入 12–20，不含 checkpoint 之前的 11 幀
+    assert db.query(PoseSegment).count() == 3
@@ -0,0 +1,92 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from backend.services import response_cache
+from backend.services.response_cache import (
+    CachedResponse,
+    LRUTTLCache,
+    MemoryBackend,
+    RedisBackend,
+    ResponseCache,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUTTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a 變成最近使用
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_entries_expire_after_ttl():
+    clock = _Clock()
+    cache = LRUTTLCache(ttl=30, clock=clock)
+    cache.set("a", 1)
+    clock.now = 29.9
+    assert cache.get("a") == 1
+    clock.now = 30.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_respond_caches_by_normalized_params_until_bump():
+    cache = ResponseCache(MemoryBackend())
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"items": [len(calls)]}
+
+    first = cache.respond("videos:list", {"limit": 5, "q": None}, build)
+    second = cache.respond("videos:list", {"q": None, "limit": 5}, build)
+    assert len(calls) == 1
+    assert second.body == first.body
+    assert (first.headers["x-cache"], second.headers["x-cache"]) == ("miss", "hit")
+
+    cache.bump_generation()
+    third = cache.respond("videos:list", {"limit": 5, "q": None}, build)
+    assert len(calls) == 2
+    assert third.headers["etag"] != first.headers["etag"]
+
+
+def test_if_none_match_returns_304():
+    cache = ResponseCache(MemoryBackend())
+    etag = cache.respond("r", {}, lambda: {"a": 1}).headers["etag"]
+    assert etag == CachedResponse.from_content({"a": 1}).etag
+    not_modified = cache.respond("r", {}, lambda: {"a": 1}, if_none_match=f'"other", {etag}')
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+    assert cache.respond("r", {}, lambda: {"a": 1}, if_none_match='"other"').status_code == 200
+
+
+def test_orjson_and_json_bodies_match(monkeypatch):
+    pytest.importorskip("orjson")
+    content = {"items": [{"id": "a", "file_path": "訓練/片段.mp4", "fps": 30, "duration_seconds": 12.5,
+                          "upload_date": datetime(2025, 1, 2, 3, 4, 5, 678901).isoformat(), "location": None}],
+               "total": Decimal("3"), "next_cursor": None}
+    fast = CachedResponse.from_content(content)
+    monkeypatch.setattr(response_cache, "orjson", None)
+    slow = CachedResponse.from_content(content)
+    assert fast.body == slow.body
+    assert fast.etag == slow.etag
+
+
+def test_unreachable_redis_falls_back_to_building():
+    cache = ResponseCache(RedisBackend("redis://127.0.0.1:1/0"))
+    response = cache.respond("r", {}, lambda: {"a": 1})
+    assert response.status_code == 200
+    assert response.headers["x-cache"] == "miss"
+    assert cache.bump_generation() == -1
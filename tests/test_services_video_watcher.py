@@ -0,0 +1,41 @@
+import os
+
+from backend.services.video_watcher import PollingSnapshot, StableFileTracker
+
+
+def test_tracker_waits_until_file_is_stable(tmp_path):
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"0" * 10)
+    tracker = StableFileTracker(settle_seconds=5)
+
+    tracker.touch(video, now=0)
+    assert tracker.pop_ready(now=1) == []  # first observation records size/mtime
+    video.write_bytes(b"0" * 20)  # still being written
+    assert tracker.pop_ready(now=4) == []
+    assert tracker.pop_ready(now=8) == []
+    assert tracker.pop_ready(now=10) == [video]
+    assert len(tracker) == 0
+
+
+def test_tracker_ignores_unchanged_released_file(tmp_path):
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"0" * 10)
+    tracker = StableFileTracker(settle_seconds=0)
+    tracker.touch(video, now=0)
+    tracker.pop_ready(now=0)
+    assert tracker.pop_ready(now=1) == [video]
+
+    tracker.touch(video, now=2)  # e.g. atime event caused by hashing
+    assert tracker.pop_ready(now=3) == []
+    assert len(tracker) == 0
+
+
+def test_polling_snapshot_reports_new_and_modified(tmp_path):
+    (tmp_path / "old.MOV").write_bytes(b"1")
+    snapshot = PollingSnapshot(tmp_path, {".mov", ".mp4"})
+    assert snapshot.changed_paths() == []
+
+    (tmp_path / "new.mp4").write_bytes(b"1")
+    (tmp_path / "note.txt").write_bytes(b"1")
+    (tmp_path / "old.MOV").write_bytes(b"22")
+    assert sorted(os.path.basename(p) for p in snapshot.changed_paths()) == ["new.mp4", "old.MOV"]
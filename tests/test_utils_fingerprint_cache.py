@@ -0,0 +1,32 @@
+import os
+
+from backend.utils.fingerprint_cache import FingerprintCache, stat_fingerprint
+
+
+def test_cache_hit_survives_reopen(tmp_path):
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"0" * 128)
+    cache_path = tmp_path / "fp.sqlite"
+
+    fp, _ = stat_fingerprint(video)
+    with FingerprintCache(str(cache_path)) as cache:
+        assert cache.get(fp) is None
+        cache.put(fp, "deadbeef", "cafe")
+
+    with FingerprintCache(str(cache_path)) as cache:
+        assert cache.get(fp) == ("deadbeef", "cafe")
+        assert cache.hits == 1
+
+
+def test_cache_miss_when_file_changes(tmp_path):
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"0" * 128)
+    cache = FingerprintCache(str(tmp_path / "fp.sqlite"))
+    fp, st = stat_fingerprint(video)
+    cache.put(fp, "deadbeef")
+
+    video.write_bytes(b"1" * 256)
+    os.utime(video, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    fp2, _ = stat_fingerprint(video)
+    assert cache.get(fp2) is None
+    cache.close()
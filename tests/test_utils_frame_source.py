@@ -0,0 +1,92 @@
+import subprocess
+from fractions import Fraction
+
+import cv2
+import numpy as np
+import pytest
+
+from backend.utils.frame_source import FfmpegFrameSource, ffmpeg_available, scaled_size, seek_time
+
+pytestmark = pytest.mark.skipif(not ffmpeg_available(), reason="ffmpeg not installed")
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 30, (320, 240))
+    for i in range(12):
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+        frame[:, :, 2] = 40 + i * 15  # 紅色遞增，可用來辨認幀
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+def test_scaled_size():
+    assert scaled_size(3840, 2160, 640) == (640, 360)
+    assert scaled_size(320, 240, 640) == (320, 240)
+    assert scaled_size(1080, 1920, 0) == (1080, 1920)
+
+
+def test_ffmpeg_frames_are_scaled_rgb(video):
+    frames = [(n, ts, image.copy()) for n, ts, image in FfmpegFrameSource(video, target_width=160)]
+    assert [n for n, _, _ in frames] == list(range(1, 13))
+    assert frames[3][1] == pytest.approx(0.1)
+    image = frames[5][2]
+    assert image.shape == (120, 160, 3)
+    # RGB：紅色在第 0 個 channel
+    assert abs(int(image[60, 80, 0]) - (40 + 5 * 15)) <= 6
+    assert image[60, 80, 2] <= 6
+
+
+def test_every_and_start_frame(video):
+    source = FfmpegFrameSource(video, target_width=160, start_frame=4, every=3)
+    frames = [(n, int(image[60, 80, 0])) for n, _, image in source]
+    assert [n for n, _ in frames] == [5, 8, 11]
+    for n, red in frames:
+        assert abs(red - (40 + (n - 1) * 15)) <= 6
+
+
+def test_close_stops_ffmpeg(video):
+    source = FfmpegFrameSource(video, target_width=160)
+    frames = iter(source)
+    next(frames)
+    frames.close()
+    assert source._proc.returncode is not None
+
+
+@pytest.fixture
+def ntsc_video(tmp_path):
+    """30000/1001 fps（29.97）：第 i 幀的灰階值為 i"""
+    path = tmp_path / "ntsc.mp4"
+    frames = np.arange(160, dtype=np.uint8)[:, None, None, None] * np.ones((1, 48, 64, 3), dtype=np.uint8)
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", "64x48",
+         "-framerate", "30000/1001", "-i", "pipe:", "-c:v", "mjpeg", "-q:v", "1", "-pix_fmt", "yuvj444p", str(path)],
+        input=frames.tobytes(), check=True,
+    )
+    return str(path)
+
+
+def test_ntsc_frame_rate_is_exact(ntsc_video):
+    source = FfmpegFrameSource(ntsc_video, target_width=64)
+    assert source.frame_rate == Fraction(30000, 1001)
+    frames = [(n, ts) for n, ts, _ in source]
+    assert len(frames) == 160
+    cap = cv2.VideoCapture(ntsc_video)
+    assert source.fps == pytest.approx(cap.get(cv2.CAP_PROP_FPS))
+    cap.release()
+    assert frames[-1][1] == pytest.approx(159 * 1001 / 30000)  # 取整數 29 fps 時會是 5.483
+
+
+def test_ntsc_seek_offset(ntsc_video):
+    rate = Fraction(30000, 1001)
+    assert seek_time(60, rate) == "2.002000"
+    assert seek_time(150000, rate) == "5005.000000"  # 29 fps 會跳到 5172.4s，多出約 5000 幀
+
+    source = FfmpegFrameSource(ntsc_video, target_width=64, start_frame=150)
+    frames = [(n, ts, int(image[20, 30, 0])) for n, ts, image in source]
+    assert [n for n, _, _ in frames] == list(range(151, 161))
+    assert frames[0][1] == pytest.approx(5.005)
+    for n, _, gray in frames:
+        assert abs(gray - (n - 1)) <= 1
@@ -0,0 +1,57 @@
+import hashlib
+import os
+
+import pytest
+
+from backend.utils.hashing import (
+    HASH_STRATEGIES,
+    benchmark_hash_strategies,
+    calculate_file_hash,
+    calculate_quick_hash,
+    quick_hash_offsets,
+)
+
+
+@pytest.mark.parametrize("strategy", sorted(HASH_STRATEGIES))
+@pytest.mark.parametrize("size", [0, 1, 4096, 3 * 1024 * 1024 + 17])
+def test_hash_strategies_match_sha256(tmp_path, strategy, size):
+    data = os.urandom(size)
+    video = tmp_path / "v.mp4"
+    video.write_bytes(data)
+    assert calculate_file_hash(str(video), strategy=strategy) == hashlib.sha256(data).hexdigest()
+
+
+def test_benchmark_reports_every_strategy(tmp_path):
+    video = tmp_path / "v.mp4"
+    video.write_bytes(os.urandom(256 * 1024))
+    results = benchmark_hash_strategies([str(video)])
+    assert set(results) == set(HASH_STRATEGIES)
+    assert all(rate > 0 for rate in results.values())
+
+
+def test_quick_hash_offsets_cover_head_and_tail():
+    offsets = quick_hash_offsets(10_000_000, samples=4, block_size=1000)
+    assert offsets[0] == 0
+    assert offsets[-1] == 10_000_000 - 1000
+    assert len(offsets) == 6
+    assert offsets == sorted(offsets)
+
+
+def test_quick_hash_detects_sampled_change(tmp_path):
+    a = tmp_path / "a.mp4"
+    b = tmp_path / "b.mp4"
+    data = os.urandom(2_000_000)
+    a.write_bytes(data)
+    b.write_bytes(data[:-1] + bytes([data[-1] ^ 0xFF]))  # tail is always sampled
+    assert calculate_quick_hash(str(a)) != calculate_quick_hash(str(b))
+
+    b.write_bytes(data)
+    assert calculate_quick_hash(str(a)) == calculate_quick_hash(str(b))
+
+
+def test_quick_hash_includes_size(tmp_path):
+    a = tmp_path / "a.mp4"
+    b = tmp_path / "b.mp4"
+    a.write_bytes(b"\0" * 100)
+    b.write_bytes(b"\0" * 101)
+    assert calculate_quick_hash(str(a)) != calculate_quick_hash(str(b))
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from backend.utils.landmark_file import (
+    HEADER_SIZE,
+    RECORD_DTYPE,
+    LandmarkFile,
+    LandmarkWriter,
+    write_landmark_file,
+)
+
+
+def _frame(n, interpolated=False):
+    return {
+        "frame": n,
+        "timestamp": n / 30.0,
+        "landmarks": [{"x": n + i / 100, "y": 0.5, "z": -0.1, "visibility": 0.9} for i in range(33)],
+        "interpolated": interpolated,
+    }
+
+
+def test_record_layout_is_aligned():
+    assert RECORD_DTYPE.itemsize % 8 == 0
+    assert RECORD_DTYPE.fields["timestamp"][1] % 8 == 0
+
+
+def test_roundtrip(tmp_path):
+    path = tmp_path / "a.lmk"
+    frames = [_frame(n, interpolated=n % 2 == 0) for n in range(1, 8)]
+    frames[0]["landmarks"][3]["visibility"] = None
+    assert write_landmark_file(path, frames, meta={"fps": 30.0, "video_path": "拳擊基地/a.mp4"}) == 7
+
+    lf = LandmarkFile(path)
+    assert len(lf) == 7
+    assert lf.meta["fps"] == 30.0
+    assert lf.meta["video_path"] == "拳擊基地/a.mp4"
+    assert lf.landmarks.shape == (7, 33, 4)
+    assert lf.interpolated.tolist() == [False, True, False, True, False, True, False]
+    assert np.isnan(lf.landmarks[0, 3, 3])
+
+    back = lf.to_frame_dicts()
+    assert back[0]["landmarks"][3]["visibility"] is None
+    assert back[4]["frame"] == 5
+    assert back[4]["landmarks"][7]["x"] == pytest.approx(5.07)
+
+
+def test_slice_frames_is_a_view(tmp_path):
+    path = tmp_path / "a.lmk"
+    write_landmark_file(path, (_frame(n) for n in range(1, 1001)))
+    lf = LandmarkFile(path)
+    part = lf.slice_frames(100, 110)
+    assert part["frame"].tolist() == list(range(100, 110))
+    assert np.shares_memory(part["landmarks"], lf.records)
+
+
+def test_truncated_file_keeps_complete_records(tmp_path):
+    path = tmp_path / "a.lmk"
+    with LandmarkWriter(path, chunk_size=4) as writer:
+        for n in range(1, 11):
+            fd = _frame(n)
+            writer.write(fd["frame"], fd["timestamp"], fd["landmarks"])
+    with open(path, "r+b") as f:
+        f.truncate(HEADER_SIZE + RECORD_DTYPE.itemsize * 6 + 100)
+    assert LandmarkFile(path).frames.tolist() == [1, 2, 3, 4, 5, 6]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "a.json"
+    path.write_text("{}" * 3000)
+    with pytest.raises(ValueError):
+        LandmarkFile(path)
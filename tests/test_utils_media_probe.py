@@ -0,0 +1,44 @@
+import cv2
+import numpy as np
+import pytest
+
+from backend.utils.media_probe import probe_video
+
+
+def _write_video(path, fourcc, fps=30, frames=12, size=(64, 48)):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*fourcc), fps, size)
+    if not writer.isOpened():
+        pytest.skip(f"OpenCV build cannot write {fourcc}")
+    frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+    for i in range(frames):
+        frame[:] = i * 10
+        writer.write(frame)
+    writer.release()
+
+
+@pytest.mark.parametrize("name,fourcc", [("v.mp4", "mp4v"), ("v.mov", "mp4v"), ("v.avi", "MJPG")])
+def test_probe_matches_cv2(tmp_path, name, fourcc):
+    video = tmp_path / name
+    _write_video(video, fourcc, fps=25, frames=20)
+
+    cap = cv2.VideoCapture(str(video))
+    expected = {
+        "fps": int(cap.get(cv2.CAP_PROP_FPS)),
+        "total_frames": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+    }
+    cap.release()
+
+    info = probe_video(video)
+    assert info is not None
+    assert {k: info[k] for k in expected} == expected
+    assert info["resolution"] == "64x48"
+    assert info["duration_seconds"] == pytest.approx(20 / 25)
+
+
+def test_probe_returns_none_for_unsupported(tmp_path):
+    garbage = tmp_path / "broken.mp4"
+    garbage.write_bytes(b"\x00" * 100)
+    assert probe_video(garbage) is None
+    assert probe_video(tmp_path / "clip.mkv") is None
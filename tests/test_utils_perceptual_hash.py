@@ -0,0 +1,43 @@
+import random
+
+from backend.utils.perceptual_hash import HammingIndex, group_near_duplicates, hamming_distance
+
+
+def _flip(value, bits):
+    for b in bits:
+        value ^= 1 << b
+    return value
+
+
+def test_hamming_index_matches_brute_force():
+    rng = random.Random(7)
+    values = []
+    for _ in range(300):
+        base = rng.getrandbits(64)
+        values.append(base)
+        values.append(_flip(base, rng.sample(range(64), rng.randint(1, 12))))
+    index = HammingIndex((v, i) for i, v in enumerate(values))
+    assert len(index) == len(values)
+
+    for q in rng.sample(values, 40):
+        got = index.search(q)
+        expected = sorted(i for i, v in enumerate(values) if hamming_distance(q, v) <= index.max_distance)
+        assert sorted(i for _, i in got) == expected
+        assert [d for d, _ in got] == sorted(d for d, _ in got)
+
+
+def test_search_beyond_index_radius_falls_back_to_scan():
+    base = 0x0123456789ABCDEF
+    far = _flip(base, range(14))
+    index = HammingIndex([(base, "a"), (far, "b")], max_distance=4)
+    assert index.search(base) == [(0, "a")]
+    assert index.search(base, max_distance=14) == [(0, "a"), (14, "b")]
+
+
+def test_group_near_duplicates_is_transitive():
+    a = 0xF0F0F0F0F0F0F0F0
+    b = _flip(a, range(6))
+    c = _flip(b, range(40, 46))  # a–c 距離 12，經由 b 連成一群
+    lonely = ~a & (2 ** 64 - 1)
+    groups = group_near_duplicates([(a, "a"), (b, "b"), (c, "c"), (lonely, "x")], max_distance=9)
+    assert [sorted(g) for g in groups] == [["a", "b", "c"]]
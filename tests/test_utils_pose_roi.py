@@ -0,0 +1,48 @@
+import pytest
+
+from backend.utils.pose_roi import RoiTracker, roi_from_landmarks, to_frame_coords
+
+
+def _box(x0, y0, x1, y1):
+    """外接框為 (x0, y0)–(x1, y1) 的 33 個 landmarks"""
+    pts = [{"x": x0, "y": y0, "z": 0.0, "visibility": 1.0}, {"x": x1, "y": y1, "z": 0.0, "visibility": 1.0}]
+    return pts + [{"x": (x0 + x1) / 2, "y": (y0 + y1) / 2, "z": 0.0, "visibility": 1.0}] * 31
+
+
+def test_roi_is_padded_square_around_pose():
+    # 1920x1080 畫面中 200x400 px 的人 → 長邊 400 加上 2 * 30% padding
+    x0, y0, x1, y1 = roi_from_landmarks(_box(0.5, 0.3, 0.5 + 200 / 1920, 0.3 + 400 / 1080), 1920, 1080)
+    assert x1 - x0 == y1 - y0 == 640
+    assert (x0 + x1) / 2 == pytest.approx(960 + 100, abs=1)
+
+
+def test_roi_is_shifted_inside_frame():
+    roi = roi_from_landmarks(_box(0.0, 0.8, 0.05, 1.0), 1920, 1080)
+    x0, y0, x1, y1 = roi
+    assert x0 == 0 and y1 == 1080
+    assert x1 - x0 == y1 - y0
+
+
+def test_roi_minimum_size():
+    x0, y0, x1, y1 = roi_from_landmarks(_box(0.5, 0.5, 0.5, 0.5), 1920, 1080, min_size=0.2)
+    assert x1 - x0 == 216
+
+
+def test_to_frame_coords():
+    lm = to_frame_coords([{"x": 0.5, "y": 0.25, "z": -0.2, "visibility": 0.7}], (100, 200, 500, 600), 1000, 800)
+    assert lm[0]["x"] == pytest.approx(0.3)
+    assert lm[0]["y"] == pytest.approx(0.375)
+    assert lm[0]["z"] == pytest.approx(-0.08)
+    assert lm[0]["visibility"] == 0.7
+
+
+def test_tracker_keeps_roi_until_pose_nears_edge():
+    tracker = RoiTracker()
+    assert tracker.update(_box(0.4, 0.3, 0.5, 0.6), 1920, 1080)
+    roi = tracker.roi
+    assert not tracker.update(_box(0.41, 0.31, 0.51, 0.61), 1920, 1080)
+    assert tracker.roi == roi
+    assert tracker.update(_box(0.55, 0.3, 0.65, 0.6), 1920, 1080)
+    assert tracker.roi != roi
+    tracker.lost()
+    assert tracker.roi is None
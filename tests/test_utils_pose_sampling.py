@@ -0,0 +1,60 @@
+import pytest
+
+from backend.utils.pose_sampling import StrideSampler, interpolate_landmarks, motion_velocity
+
+
+def _pose(dx=0.0, vis=1.0):
+    return [{"x": 0.5 + dx, "y": 0.5, "z": 0.0, "visibility": vis} for _ in range(33)]
+
+
+def _keyframes(sampler, frames, landmarks_at):
+    keys = []
+    for n in range(1, frames + 1):
+        if sampler.is_keyframe(n):
+            keys.append(n)
+            sampler.record(n, landmarks_at(n))
+    return keys
+
+
+def test_interpolate_landmarks_midpoint():
+    mid = interpolate_landmarks(_pose(0.0, vis=0.2), _pose(0.1, vis=0.6), 0.5)
+    assert mid[15]["x"] == pytest.approx(0.55)
+    assert mid[15]["visibility"] == pytest.approx(0.4)
+
+
+def test_interpolate_landmarks_keeps_missing_visibility():
+    a, b = _pose(), _pose(0.1)
+    a[0]["visibility"] = None
+    assert interpolate_landmarks(a, b, 0.5)[0]["visibility"] is None
+
+
+def test_motion_velocity_is_per_frame():
+    assert motion_velocity(_pose(0.0), _pose(0.12), 4) == pytest.approx(0.03)
+
+
+def test_fixed_stride():
+    keys = _keyframes(StrideSampler(stride=3), 10, lambda n: _pose())
+    assert keys == [1, 4, 7, 10]
+
+
+def test_adaptive_stride_widens_when_still():
+    sampler = StrideSampler(adaptive=True, max_stride=4)
+    keys = _keyframes(sampler, 20, lambda n: _pose())
+    assert keys[:4] == [1, 2, 4, 8]
+    assert sampler.stride == 4
+
+
+def test_adaptive_stride_drops_to_one_on_fast_motion():
+    sampler = StrideSampler(adaptive=True, max_stride=4)
+    # 前 8 幀靜止，之後手腕每幀移動 0.05
+    keys = _keyframes(sampler, 14, lambda n: _pose(0.0 if n <= 8 else (n - 8) * 0.05))
+    assert keys == [1, 2, 4, 8, 12, 13, 14]
+
+
+def test_adaptive_stride_resets_when_pose_lost():
+    sampler = StrideSampler(adaptive=True, max_stride=8)
+    for n in (1, 2, 4, 8):
+        sampler.record(n, _pose())
+    assert sampler.stride == 8
+    sampler.record(16, None)
+    assert sampler.stride == 1